@@ -39,6 +39,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'employees.middleware.RequestProfilerMiddleware',
+    'employees.middleware.PrimaryStickinessMiddleware',
 ]
 
 ROOT_URLCONF = 'employee_management.urls'
@@ -82,6 +84,30 @@ else:
         }
     }
 
+# Optional read replica for reporting views (see employees/routers.py). Set
+# REPLICA_DATABASE_URL, or REPLICA_DB_NAME (plus REPLICA_DB_HOST/PORT when
+# they differ from the primary) without dj_database_url.
+if dj_database_url and os.environ.get('REPLICA_DATABASE_URL'):
+    DATABASES['replica'] = dj_database_url.parse(
+        os.environ['REPLICA_DATABASE_URL'],
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+elif os.environ.get('REPLICA_DB_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['REPLICA_DB_NAME'],
+        'HOST': os.environ.get('REPLICA_DB_HOST', DATABASES['default'].get('HOST', '')),
+        'PORT': os.environ.get('REPLICA_DB_PORT', DATABASES['default'].get('PORT', '')),
+    }
+if 'replica' in DATABASES:
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['employees.routers.ReplicaRouter']
+
+# After a write, a client keeps reading from the primary for this many
+# seconds so it sees its own changes despite replication lag.
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '15'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -110,7 +136,7 @@ LOGIN_URL = '/accounts/login/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 
 STATIC_URL = '/static/'
-STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATIC_ROOT = os.environ.get('STATIC_ROOT', BASE_DIR / 'staticfiles')
 
 STATICFILES_DIRS = [
     BASE_DIR / "static",
@@ -123,6 +149,46 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Where the attendance page reads its cells from: 'rows' (the attendance
+# table plus the archive) or 'monthly' (the compact bitmap store).
+ATTENDANCE_READ_MODEL = os.environ.get('ATTENDANCE_READ_MODEL', 'rows')
+
+# Opt-in: stream the attendance page. The head, filters and date picker are
+# flushed first and the grid follows in chunks of ATTENDANCE_LIST_STREAM_CHUNK
+# employees.
+ATTENDANCE_LIST_STREAMING = os.environ.get('ATTENDANCE_LIST_STREAMING', 'False') == 'True'
+ATTENDANCE_LIST_STREAM_CHUNK = int(os.environ.get('ATTENDANCE_LIST_STREAM_CHUNK', '200'))
+
+# Worker processes used to render monthly timesheets (0 = one per CPU) from
+# generate_timesheets. Exports downloaded from the site render inside the web
+# worker with at most TIMESHEET_WEB_WORKERS processes (1 = no pool, capped at
+# 2), one export at a time.
+TIMESHEET_WORKERS = int(os.environ.get('TIMESHEET_WORKERS', '0'))
+TIMESHEET_WEB_WORKERS = int(os.environ.get('TIMESHEET_WEB_WORKERS', '1'))
+
+# Seconds between dashboard stream recounts when no write notification
+# arrives, and the EventSource reconnect delay when served over WSGI.
+DASHBOARD_STREAM_POLL_SECONDS = int(os.environ.get('DASHBOARD_STREAM_POLL_SECONDS', '15'))
+DASHBOARD_STREAM_MAX_SECONDS = int(os.environ.get('DASHBOARD_STREAM_MAX_SECONDS', '300'))
+
+# Opt-in: with PROFILING_ENABLED=True, staff can profile a single request with
+# ?_profile=1 or an "X-Profile: 1" header; profiles are written to
+# PROFILING_DIR and summarised in the log.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_DIR = os.environ.get('PROFILING_DIR', BASE_DIR / 'profiles')
+PROFILING_TOP_N = int(os.environ.get('PROFILING_TOP_N', '15'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'employees.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 if not DEBUG:
     if not ALLOWED_HOSTS:
         raise ValueError("ALLOWED_HOSTS must be set when DEBUG=False. Set it via environment variable ALLOWED_HOSTS.")
@@ -2,10 +2,15 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
 from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.functional import lazy
+
+# Resolved on first request: with the manifest storage, resolving it at import
+# time breaks any management command run before collectstatic.
+favicon_url = lazy(staticfiles_storage.url, str)('logo-icon.svg')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('favicon.ico', RedirectView.as_view(url=staticfiles_storage.url('logo-icon.svg'), permanent=True), name='favicon'),
+    path('favicon.ico', RedirectView.as_view(url=favicon_url, permanent=True), name='favicon'),
     path('', include('employees.urls')),
     path('employees/', include('employees.urls')),
 ]
@@ -1,10 +1,295 @@
-from django.contrib import admin
-from .models import Employee, Department, Holiday
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from urllib.parse import urlparse
+from .models import (
+    Employee, Department, Holiday, Attendance, AttendanceArchive, AttendanceChangeLog, AttendanceMonth,
+    IngestBatch, IngestToken,
+)
+from .services import EmployeeService, IngestService
+from .signals import AttendanceChange, send_attendance_changed
+
+
+class EstimatedCountPaginator(Paginator):
+    # COUNT(*) over millions of rows is a full scan on PostgreSQL. For an
+    # unfiltered changelist the planner's row estimate is good enough to page
+    # with; filtered lists and small tables still get the exact count.
+    ESTIMATE_THRESHOLD = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where:
+            connection = connections[queryset.db]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                        [connection.ops.quote_name(queryset.model._meta.db_table)],
+                    )
+                    row = cursor.fetchone()
+                if row and row[0] >= self.ESTIMATE_THRESHOLD:
+                    return int(row[0])
+        return super().count
+
+
+@admin.register(Department)
+class DepartmentAdmin(admin.ModelAdmin):
+    list_display = ('name', 'headcount')
+    search_fields = ('^name',)
+    ordering = ('name',)
+
+
+@admin.register(Employee)
+class EmployeeAdmin(admin.ModelAdmin):
+    list_display = ('first_name', 'last_name', 'email', 'department', 'hire_date')
+    list_select_related = ('department',)
+    list_filter = ('department',)
+    search_fields = ('^first_name', '^last_name', '=email', '=badge_id')
+    date_hierarchy = 'hire_date'
+    autocomplete_fields = ('department',)
+    show_full_result_count = False
+    actions = ['delete_employees']
+
+    def get_actions(self, request):
+        # The stock action collects every attendance row of the selected
+        # employees before deleting them.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description='Delete selected employees and their attendance', permissions=['delete'])
+    def delete_employees(self, request, queryset):
+        progress = {'employees': 0, 'records': 0}
+        for progress in EmployeeService.bulk_delete(queryset.values_list('pk', flat=True)):
+            pass
+        self.message_user(
+            request,
+            f"{progress['employees']} employee(s) and {progress['records']} related record(s) deleted.",
+            messages.SUCCESS,
+        )
+
+    def get_deleted_objects(self, objs, request):
+        # The stock confirmation page lists every related attendance row;
+        # counts are enough to confirm an offboarding.
+        objs = list(objs)
+        employee_ids = [obj.pk for obj in objs]
+        model_count = {Employee._meta.verbose_name_plural: len(objs)}
+        for model in (Attendance, AttendanceArchive, AttendanceMonth):
+            model_count[model._meta.verbose_name_plural] = model.objects.filter(employee_id__in=employee_ids).count()
+        perms_needed = set() if self.has_delete_permission(request) else {Employee._meta.verbose_name}
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        for _ in EmployeeService.bulk_delete([obj.pk]):
+            pass
+
+
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+    list_display = ('name', 'date', 'is_recurring')
+    list_filter = ('is_recurring',)
+    search_fields = ('name',)
+    date_hierarchy = 'date'
+
+
+def _set_status_action(status, label):
+    @admin.action(description=f'Mark selected records as {label}')
+    def action(modeladmin, request, queryset):
+        with transaction.atomic():
+            # Read under lock, so the count and the announced changes are the
+            # rows this UPDATE actually changes.
+            changed = list(
+                Attendance.objects.filter(pk__in=queryset.values('pk')).exclude(status=status)
+                .select_for_update().order_by('pk').values_list('pk', 'employee_id', 'date', 'status')
+            )
+            updated = Attendance.objects.filter(pk__in=[row[0] for row in changed]).update(status=status)
+            send_attendance_changed([
+                AttendanceChange(employee_id, date, previous, status) for _, employee_id, date, previous in changed
+            ])
+        modeladmin.message_user(request, f'{updated} attendance record(s) marked as {label}.', messages.SUCCESS)
+
+    action.__name__ = f'mark_{status}'
+    return action
+
+
+class HolidayRecordFilter(admin.SimpleListFilter):
+    # Records marked on a holiday, e.g. before the holiday was added; matched
+    # in the database rather than against a list of dates.
+    title = 'holiday'
+    parameter_name = 'holiday'
+
+    def lookups(self, request, model_admin):
+        return [('yes', 'On a holiday'), ('no', 'Not on a holiday')]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.on_holidays()
+        if self.value() == 'no':
+            return queryset.exclude_holidays()
+        return queryset
+
+
+@admin.register(Attendance)
+class AttendanceAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'date', 'status', 'department', 'holiday', 'created_at')
+    list_select_related = ('employee', 'employee__department')
+    list_filter = ('status', 'employee__department', HolidayRecordFilter)
+    date_hierarchy = 'date'
+    ordering = ('-date',)
+    autocomplete_fields = ('employee',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    actions = [
+        _set_status_action('present', 'present'),
+        _set_status_action('absent', 'absent'),
+        'delete_records',
+    ]
+
+    @admin.display(description='Department', ordering='employee__department__name')
+    def department(self, obj):
+        return obj.employee.department
+
+    @admin.display(description='Holiday')
+    def holiday(self, obj):
+        return obj.holiday_name or ''
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_holidays()
+
+    def changelist_view(self, request, extra_context=None):
+        # Unfiltered, the date hierarchy needs a DISTINCT over every row to list
+        # the years, so open on the current month. The "All dates" link is a
+        # bare "?" too, so requests coming from the changelist itself are let
+        # through and the unfiltered list stays one click away.
+        changelist_url = reverse(
+            f'admin:{self.opts.app_label}_{self.opts.model_name}_changelist', current_app=self.admin_site.name,
+        )
+        came_from_changelist = urlparse(request.META.get('HTTP_REFERER', '')).path == changelist_url
+        if request.method == 'GET' and not request.GET and not came_from_changelist:
+            today = timezone.now().date()
+            return redirect(f'{changelist_url}?date__year={today.year}&date__month={today.month}')
+        return super().changelist_view(request, extra_context)
+
+    def get_actions(self, request):
+        # The stock action loads and lists every object before deleting them.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description='Delete selected records', permissions=['delete'])
+    def delete_records(self, request, queryset):
+        # Attendance has no delete signal receivers or dependent rows, so the
+        # queryset delete is a single DELETE statement.
+        removed = list(queryset.values_list('employee_id', 'date', 'status'))
+        with transaction.atomic():
+            deleted, _ = queryset.delete()
+            send_attendance_changed([
+                AttendanceChange(employee_id, date, previous, None) for employee_id, date, previous in removed
+            ])
+        self.message_user(request, f'{deleted} attendance record(s) deleted.', messages.SUCCESS)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            send_attendance_changed([AttendanceChange(obj.employee_id, obj.date, obj.status, None)])
+
+
+@admin.register(AttendanceArchive)
+class AttendanceArchiveAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'date', 'status', 'archived_at')
+    list_select_related = ('employee',)
+    list_filter = ('status',)
+    date_hierarchy = 'date'
+    ordering = ('-date',)
+    raw_id_fields = ('employee',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AttendanceMonth)
+class AttendanceMonthAdmin(admin.ModelAdmin):
+    # Derived from attendance records; rebuild it with rebuild_attendance_months.
+    list_display = ('employee', 'year', 'month', 'marked_mask', 'present_mask')
+    list_select_related = ('employee',)
+    list_filter = ('year', 'month')
+    raw_id_fields = ('employee',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AttendanceChangeLog)
+class AttendanceChangeLogAdmin(admin.ModelAdmin):
+    # Append-only; entries are written by the attendance_changed receiver.
+    list_display = ('seq', 'operation', 'employee_id', 'date', 'previous', 'status', 'recorded_at')
+    list_filter = ('operation',)
+    ordering = ('-seq',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(IngestToken)
+class IngestTokenAdmin(admin.ModelAdmin):
+    list_display = ('name', 'is_active', 'created_at', 'last_used_at')
+    list_filter = ('is_active',)
+    fields = ('name', 'is_active')
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            key = IngestService.set_key(obj)
+            self.message_user(
+                request,
+                f'Token for {obj.name}: {key} (copy it now; it is not stored and cannot be shown again).',
+                messages.WARNING,
+            )
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(IngestBatch)
+class IngestBatchAdmin(admin.ModelAdmin):
+    list_display = ('idempotency_key', 'token', 'event_count', 'received_at')
+    list_select_related = ('token',)
+    list_filter = ('token',)
+    date_hierarchy = 'received_at'
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
-admin.site.register(Employee)
-admin.site.register(Department)
-admin.site.register(Holiday)
 
 admin.site.site_header = "Employee Management System"
 admin.site.site_title = "Admin Panel"
-admin.site.index_title = "Employee Management System"  
\ No newline at end of file
+admin.site.index_title = "Employee Management System"
@@ -11,6 +11,7 @@ class EmployeesConfig(AppConfig):
     name = 'employees'
 
     def ready(self):
+        from . import signals, events, receivers  # noqa: F401
         post_migrate.connect(create_superuser, sender=self)
 
 def create_superuser(sender, **kwargs):
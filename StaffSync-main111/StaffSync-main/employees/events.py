@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Employee
+from .signals import attendance_changed
+
+
+class DashboardEventBroker:
+    # Streams only need to know *that* today's numbers changed, so each queue
+    # holds at most one pending notification and bursts collapse into one recount.
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=1)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = {item for item in self._subscribers if item[1] is not queue}
+
+    def publish(self) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._notify, queue)
+            except RuntimeError:
+                # The subscriber's event loop has already been closed.
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _notify(queue: asyncio.Queue) -> None:
+        if not queue.full():
+            queue.put_nowait(True)
+
+
+dashboard_events = DashboardEventBroker()
+
+
+@receiver(attendance_changed)
+def publish_attendance_change(sender, changes, **kwargs):
+    today = timezone.now().date()
+    if any(change.date == today for change in changes):
+        transaction.on_commit(dashboard_events.publish)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def publish_roster_change(sender, **kwargs):
+    dashboard_events.publish()
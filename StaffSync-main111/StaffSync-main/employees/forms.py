@@ -1,13 +1,15 @@
 from django import forms
-from django.core.exceptions import ValidationError
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.urls import reverse
 from .models import Employee, Attendance, Department, Holiday
+from .services import HolidayCalendar
 from django.utils import timezone
 from django.db.models import Q
 
 class EmployeeForm(forms.ModelForm):
     class Meta:
         model = Employee
-        fields = ['first_name', 'last_name', 'email', 'phone_number', 'department', 'hire_date']
+        fields = ['first_name', 'last_name', 'email', 'phone_number', 'department', 'hire_date', 'badge_id']
         widgets = {
             'first_name': forms.TextInput(attrs={
                 'class': 'form-input',
@@ -37,10 +39,18 @@ class EmployeeForm(forms.ModelForm):
                 'class': 'form-input',
                 'max': timezone.now().date().isoformat(),
             }),
+            'badge_id': forms.TextInput(attrs={
+                'class': 'form-input',
+                'placeholder': 'Enter door badge number',
+            }),
+        }
+        labels = {
+            'badge_id': 'Badge ID',
         }
         help_texts = {
             'email': 'Enter a valid email address.',
             'hire_date': 'Select the date when the employee was hired.',
+            'badge_id': 'Optional. Used to match clock-in punch logs to this employee.',
         }
     
     def clean_email(self):
@@ -62,14 +72,34 @@ class EmployeeForm(forms.ModelForm):
         return hire_date
 
 
+class EmployeeAutocompleteWidget(forms.Widget):
+    """Hidden employee id plus a search box backed by the autocomplete endpoint.
+
+    Only the selected employee is loaded for rendering, never the full roster.
+    """
+    template_name = 'widgets/employee_autocomplete.html'
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        label = ''
+        if value:
+            employee = Employee.objects.filter(pk=value).only('first_name', 'last_name').first()
+            label = str(employee) if employee else ''
+        context['widget'].update({
+            'label': label,
+            'search_url': reverse('employee_autocomplete'),
+        })
+        return context
+
+
 class AttendanceForm(forms.ModelForm):
     class Meta:
         model = Attendance
         fields = ['employee', 'date', 'status']
         widgets = {
-            'employee': forms.Select(attrs={
-                'class': 'form-select',
-                'required': True,
+            'employee': EmployeeAutocompleteWidget(attrs={
+                'class': 'form-input',
+                'placeholder': 'Start typing a name',
             }),
             'date': forms.DateInput(attrs={
                 'type': 'date',
@@ -81,16 +111,19 @@ class AttendanceForm(forms.ModelForm):
                 'required': True,
             }),
         }
+        # The unique (employee, date) constraint is checked once by the model
+        # validation; this only replaces its generic message.
+        error_messages = {
+            NON_FIELD_ERRORS: {
+                'unique_together': 'Attendance for this employee on this date already exists.',
+            }
+        }
     
     def is_weekend(self, date_obj):
         return date_obj.weekday() >= 5
     
     def is_holiday(self, date_obj):
-        if Holiday.objects.filter(date=date_obj).exists():
-            return True
-        if Holiday.objects.filter(is_recurring=True, date__month=date_obj.month, date__day=date_obj.day).exists():
-            return True
-        return False
+        return HolidayCalendar.cached().is_holiday(date_obj)
     
     def clean_date(self):
         date = self.cleaned_data.get('date')
@@ -105,28 +138,65 @@ class AttendanceForm(forms.ModelForm):
                 raise ValidationError(f'Attendance cannot be marked on {day_name}s (weekends). Please select a working day.')
             
             # Check if date is a holiday
-            if self.is_holiday(date):
-                holiday = Holiday.objects.filter(
-                    Q(date=date) | 
-                    Q(is_recurring=True, date__month=date.month, date__day=date.day)
-                ).first()
-                holiday_name = holiday.name if holiday else 'a holiday'
+            holiday_name = HolidayCalendar.cached().get_holiday_name(date)
+            if holiday_name:
                 raise ValidationError(f'Attendance cannot be marked on {holiday_name}. Please select a working day.')
         
         return date
+
+
+class BulkAttendanceForm(forms.Form):
+    employees = forms.ModelMultipleChoiceField(
+        queryset=Employee.objects.select_related('department').order_by('first_name', 'last_name'),
+        widget=forms.CheckboxSelectMultiple,
+    )
+    start_date = forms.DateField(widget=forms.DateInput(attrs={
+        'type': 'date',
+        'class': 'form-input',
+        'max': timezone.now().date().isoformat(),
+    }))
+    end_date = forms.DateField(widget=forms.DateInput(attrs={
+        'type': 'date',
+        'class': 'form-input',
+        'max': timezone.now().date().isoformat(),
+    }))
+    status = forms.ChoiceField(choices=Attendance.STATUS_CHOICES, widget=forms.Select(attrs={
+        'class': 'form-select',
+    }))
+    
+    MAX_DAYS = 92
     
     def clean(self):
         cleaned_data = super().clean()
-        employee = cleaned_data.get('employee')
-        date = cleaned_data.get('date')
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
         
-        if employee and date:
-            queryset = Attendance.objects.filter(employee=employee, date=date)
-            if self.instance and self.instance.pk:
-                queryset = queryset.exclude(pk=self.instance.pk)
-            if queryset.exists():
-                raise ValidationError({
-                    'date': f'Attendance for {employee} on {date} already exists.'
-                })
+        if start_date and end_date:
+            if start_date > end_date:
+                raise ValidationError({'end_date': 'End date cannot be before start date.'})
+            if end_date > timezone.now().date():
+                raise ValidationError({'end_date': 'Attendance cannot be marked for future dates.'})
+            if (end_date - start_date).days + 1 > self.MAX_DAYS:
+                raise ValidationError({'end_date': f'A bulk update can cover at most {self.MAX_DAYS} days.'})
         
         return cleaned_data
+
+
+class PunchLogForm(forms.Form):
+    DELIMITER_CHOICES = [
+        ('', 'Detect automatically'),
+        (',', 'Comma'),
+        (';', 'Semicolon'),
+        ('\t', 'Tab'),
+        ('|', 'Pipe'),
+        (' ', 'Whitespace'),
+    ]
+
+    log_file = forms.FileField(
+        label='Punch log',
+        help_text='One punch per line: badge ID, then a timestamp starting with the date (e.g. 1042,2026-10-19 08:58).',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-input', 'accept': '.csv,.txt,.log,text/plain'}),
+    )
+    delimiter = forms.ChoiceField(choices=DELIMITER_CHOICES, required=False, widget=forms.Select(attrs={
+        'class': 'form-select',
+    }))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.services import AttendanceArchiveService
+
+
+class Command(BaseCommand):
+    help = 'Move attendance records of closed years into the attendance archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=int, required=True, metavar='YEAR',
+                            help='Archive every record dated before January 1 of this year.')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of records moved per transaction (default: 5000).')
+
+    def handle(self, *args, **options):
+        year = options['before']
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be a positive number.')
+
+        moved = 0
+        try:
+            for count in AttendanceArchiveService.archive_before(year, batch_size=batch_size):
+                moved += count
+                self.stdout.write(f'Archived {moved} record(s)...')
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} attendance record(s) dated before {year}.'))
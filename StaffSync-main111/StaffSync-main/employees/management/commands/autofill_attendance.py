@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from employees.services import AttendanceService
+
+
+class Command(BaseCommand):
+    help = 'Mark employees without attendance on past working days as absent.'
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument('--date', metavar='YYYY-MM-DD',
+                           help='Fill a single day (default: yesterday).')
+        group.add_argument('--range', nargs=2, metavar=('START', 'END'),
+                           help='Fill every day from START to END inclusive (YYYY-MM-DD).')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of records inserted per statement (default: 5000).')
+
+    def parse_date(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'"{value}" is not a valid date, use YYYY-MM-DD.')
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        if options['range']:
+            start_date, end_date = (self.parse_date(value) for value in options['range'])
+        elif options['date']:
+            start_date = end_date = self.parse_date(options['date'])
+        else:
+            start_date = end_date = today - timedelta(days=1)
+
+        if start_date > end_date:
+            raise CommandError('The start date cannot be after the end date.')
+        if start_date > today:
+            raise CommandError('Attendance cannot be filled for future dates.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive number.')
+
+        total = 0
+        for counts in AttendanceService.autofill_absent(start_date, end_date, batch_size=options['batch_size']):
+            for day, count in counts.items():
+                total += count
+                self.stdout.write(f'{day}: marked {count} employee(s) absent')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Marked {total} missing attendance record(s) as absent between {start_date} and {min(end_date, today)}.'
+        ))
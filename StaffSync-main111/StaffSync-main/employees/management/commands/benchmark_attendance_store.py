@@ -0,0 +1,97 @@
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from employees.models import Attendance, AttendanceMonth, Employee
+from employees.services import AttendanceMonthService
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare latency and memory of the row-per-day attendance table with the '
+        'monthly bitmap store. Seeds synthetic data inside a transaction that is '
+        'rolled back, so the database is left untouched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=200)
+        parser.add_argument('--year', type=int, default=date.today().year - 1)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['employees'], options['year'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, employee_count, year, repeat):
+        self.stdout.write(f'Seeding {employee_count} employees x working days of {year}...')
+        employees = Employee.objects.bulk_create([
+            Employee(first_name='Bench', last_name=str(i), email=f'bench-{i}@benchmark.invalid',
+                     phone_number='0', hire_date=date(year - 1, 1, 1))
+            for i in range(employee_count)
+        ])
+        working_days = [
+            date(year, 1, 1) + timedelta(days=i)
+            for i in range((date(year, 12, 31) - date(year, 1, 1)).days + 1)
+            if (date(year, 1, 1) + timedelta(days=i)).weekday() < 5
+        ]
+        Attendance.objects.bulk_create(
+            [
+                Attendance(employee=employee, date=day, status=random.choice(['present', 'present', 'absent']))
+                for employee in employees
+                for day in working_days
+            ],
+            batch_size=2000,
+        )
+        for _ in AttendanceMonthService.rebuild():
+            pass
+
+        sample = [employee.pk for employee in random.sample(employees, min(repeat, len(employees)))]
+        start_date, end_date = date(year, 1, 1), date(year, 12, 31)
+
+        self.report('Employee year, rows', sample, lambda pk: list(
+            Attendance.objects.filter(employee_id=pk, date__range=(start_date, end_date))
+        ))
+        self.report('Employee year, months', sample, lambda pk: list(
+            AttendanceMonth.objects.filter(employee_id=pk, year=year)
+        ))
+        self.report('Employee year stats, rows', sample, lambda pk: (
+            Attendance.objects.filter(employee_id=pk, date__range=(start_date, end_date), status='present').count()
+        ))
+        self.report('Employee year stats, popcount', sample, lambda pk: (
+            AttendanceMonthService.get_stats(start_date, end_date, employee_ids=[pk])
+        ))
+
+        month_start, month_end = date(year, 3, 1), date(year, 3, 31)
+        self.report('Roster month grid, rows', [None], lambda _: {
+            (a.employee_id, a.date): a
+            for a in Attendance.objects.filter(date__range=(month_start, month_end))
+        })
+        self.report('Roster month grid, months', [None], lambda _: (
+            AttendanceMonthService.get_cells(month_start, month_end)
+        ))
+
+    def report(self, label, keys, fetch):
+        started = time.perf_counter()
+        for key in keys:
+            fetch(key)
+        average_ms = (time.perf_counter() - started) / len(keys) * 1000
+
+        peak = 0
+        for key in keys:
+            tracemalloc.start()
+            fetch(key)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self.stdout.write(f'{label:<32} {average_ms:9.2f} ms avg   {peak / 1024:9.1f} KiB peak')
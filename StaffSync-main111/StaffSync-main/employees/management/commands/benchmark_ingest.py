@@ -0,0 +1,92 @@
+import json
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+
+from employees.models import Employee
+from employees.services import HolidayCalendar, IngestService
+from employees.views import ingest_attendance
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure throughput of the attendance ingestion endpoint for several batch '
+        'sizes. Seeds synthetic employees inside a transaction that is rolled back, '
+        'so the database is left untouched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=200)
+        parser.add_argument('--days', type=int, default=20,
+                            help='Working days per employee to send events for (default: 20).')
+        parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 50, 200, 1000])
+
+    def handle(self, *args, **options):
+        if options['employees'] < 1 or options['days'] < 1:
+            raise CommandError('--employees and --days must be positive.')
+        if any(size < 1 or size > IngestService.MAX_EVENTS for size in options['batch_sizes']):
+            raise CommandError(f'Batch sizes must be between 1 and {IngestService.MAX_EVENTS}.')
+        try:
+            with transaction.atomic():
+                self.run(options['employees'], options['days'], options['batch_sizes'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, employee_count, day_count, batch_sizes):
+        today = date.today()
+        Employee.objects.bulk_create([
+            Employee(first_name='Bench', last_name=str(i), email=f'ingest-{i}@benchmark.invalid',
+                     phone_number='0', hire_date=today - timedelta(days=365))
+            for i in range(employee_count)
+        ])
+        emails = list(Employee.objects.filter(
+            email__endswith='@benchmark.invalid',
+        ).values_list('email', flat=True))
+        working_days = HolidayCalendar.load().working_days(today - timedelta(days=day_count * 2), today)[-day_count:]
+        _, key = IngestService.create_token('benchmark')
+        factory = RequestFactory()
+
+        self.stdout.write(f'{len(emails) * len(working_days)} events per run, statuses flip between runs.')
+        for run, batch_size in enumerate(batch_sizes):
+            status = 'present' if run % 2 == 0 else 'absent'
+            events = [
+                {'employee': email, 'date': day.isoformat(), 'status': status}
+                for email in emails
+                for day in working_days
+            ]
+            batches = [events[i:i + batch_size] for i in range(0, len(events), batch_size)]
+            latencies = []
+            started = time.perf_counter()
+            for batch in batches:
+                request = factory.post(
+                    '/attendance/ingest/', json.dumps({'events': batch}), content_type='application/json',
+                    HTTP_AUTHORIZATION=f'Token {key}', HTTP_IDEMPOTENCY_KEY=str(uuid.uuid4()),
+                )
+                batch_started = time.perf_counter()
+                response = ingest_attendance(request)
+                latencies.append(time.perf_counter() - batch_started)
+                if response.status_code != 200:
+                    raise CommandError(f'Batch failed with {response.status_code}: {response.content[:200]!r}')
+            elapsed = time.perf_counter() - started
+
+            replay_started = time.perf_counter()
+            ingest_attendance(request)
+            replay_ms = (time.perf_counter() - replay_started) * 1000
+
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(
+                f'batch {batch_size:>5}: {len(events) / elapsed:10.0f} events/s   '
+                f'p50 {statistics.median(latencies) * 1000:8.2f} ms   p95 {p95 * 1000:8.2f} ms   '
+                f'replay {replay_ms:6.2f} ms'
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from employees.services import IngestService
+
+
+class Command(BaseCommand):
+    help = 'Create an API token for the attendance ingestion endpoint and print it once.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Which kiosk or reader the token is for.')
+
+    def handle(self, *args, **options):
+        token, key = IngestService.create_token(options['name'])
+        self.stdout.write(self.style.SUCCESS(f'Created ingest token "{token.name}". It is shown only once:'))
+        self.stdout.write(key)
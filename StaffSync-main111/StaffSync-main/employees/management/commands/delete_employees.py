@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.models import Employee
+from employees.services import EmployeeService
+
+
+class Command(BaseCommand):
+    help = 'Delete employees and their attendance history in bounded batches.'
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument('--ids', nargs='+', type=int, metavar='ID',
+                           help='Primary keys of the employees to delete.')
+        group.add_argument('--department', type=int, metavar='ID',
+                           help='Delete every employee of this department.')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of attendance records deleted per statement (default: 5000).')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive number.')
+
+        if options['ids']:
+            employee_ids = list(Employee.objects.filter(pk__in=options['ids']).values_list('pk', flat=True))
+        else:
+            employee_ids = list(
+                Employee.objects.filter(department_id=options['department']).values_list('pk', flat=True)
+            )
+        if not employee_ids:
+            raise CommandError('No matching employees found.')
+
+        progress = {'employees': 0, 'records': 0}
+        for progress in EmployeeService.bulk_delete(employee_ids, batch_size=options['batch_size']):
+            self.stdout.write(
+                f"Deleted {progress['records']} record(s), {progress['employees']}/{len(employee_ids)} employee(s)..."
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {progress['employees']} employee(s) and {progress['records']} related record(s)."
+        ))
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from employees.timesheets import FORMATS, TimesheetService
+
+
+class Command(BaseCommand):
+    help = (
+        'Render a printable HTML and/or CSV timesheet for every employee for one month, '
+        'in parallel worker processes, into a single zip archive.'
+    )
+
+    def add_arguments(self, parser):
+        today = timezone.now().date()
+        parser.add_argument('--month', type=int, default=today.month)
+        parser.add_argument('--year', type=int, default=today.year)
+        parser.add_argument('--department', type=int, default=None,
+                            help='Only employees of this department id.')
+        parser.add_argument('--format', nargs='+', choices=FORMATS, default=list(FORMATS), dest='formats')
+        parser.add_argument('--workers', type=int, default=settings.TIMESHEET_WORKERS,
+                            help='Worker processes (default: TIMESHEET_WORKERS, 0 = one per CPU).')
+        parser.add_argument('--output', default=None,
+                            help='Zip file to write (default: timesheets-YYYY-MM.zip).')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['month'] <= 12:
+            raise CommandError('--month must be between 1 and 12.')
+        if options['workers'] < 0:
+            raise CommandError('--workers must not be negative.')
+        output = options['output'] or f"timesheets-{options['year']}-{options['month']:02d}.zip"
+
+        started = time.perf_counter()
+        snapshot = TimesheetService.build_snapshot(
+            options['year'], options['month'], options['department'], options['formats'],
+        )
+        with open(output, 'wb') as fileobj:
+            count = TimesheetService.write_archive(fileobj, snapshot, workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {count} timesheet(s) for {snapshot.month_name} {snapshot.year} to {output} '
+            f'in {time.perf_counter() - started:.1f}s.'
+        ))
@@ -0,0 +1,43 @@
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.punches import DELIMITERS, PunchLogImport
+
+
+class Command(BaseCommand):
+    help = (
+        'Mark employees present from door controller punch logs (badge id, timestamp per line). '
+        'Files are streamed, so logs of any size run in constant memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', metavar='FILE', help='Punch log(s) to import; "-" reads stdin.')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Attendance records upserted per transaction (default: 5000).')
+        parser.add_argument('--delimiter', choices=[*DELIMITERS, ' '], default=None,
+                            help='Field separator (default: detected from the first line).')
+        parser.add_argument('--date-format', default=None,
+                            help='strptime format of the date part when it is not ISO, e.g. %%d/%%m/%%Y.')
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive number.')
+        started = time.perf_counter()
+        importer = PunchLogImport(options['batch_size'], options['delimiter'], options['date_format'])
+        for path in options['files']:
+            try:
+                # stdin belongs to the caller, so only files opened here are closed.
+                opened = nullcontext(sys.stdin) if path == '-' else open(path, encoding=options['encoding'], errors='replace')
+            except OSError as error:
+                raise CommandError(f'Cannot read {path}: {error}')
+            with opened as fileobj:
+                for stats in importer.run(fileobj):
+                    self.stdout.write(f"{path}: {stats.get('lines', 0)} line(s) read...")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{importer.summary()} ({importer.stats['lines'] / max(elapsed, 1e-9):.0f} lines/s)"
+        ))
@@ -0,0 +1,326 @@
+import math
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.cookies import SimpleCookie
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_MIX = 'dashboard=3,attendance=3,mark=1,employees=2,employee_detail=2'
+
+
+class NoRedirect(HTTPRedirectHandler):
+    # A redirect after a POST is the success response; following it would time
+    # the next page too.
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    # Nearest rank: the smallest value with at least this fraction of the
+    # samples at or below it. Rounded first so float noise such as
+    # 0.07 * 100 = 7.000000000000001 doesn't push it up a rank.
+    rank = math.ceil(round(fraction * len(sorted_values), 9))
+    index = min(len(sorted_values) - 1, max(0, rank - 1))
+    return sorted_values[index]
+
+
+class LoadClient:
+    """One simulated user with its own session and CSRF cookies.
+
+    Cookies are kept by hand: with DEBUG=False they are marked Secure, and a
+    cookie jar would never send them back to the plain-HTTP local server.
+    """
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = {}
+        self.opener = build_opener(NoRedirect)
+
+    def csrf_token(self):
+        return self.cookies.get('csrftoken', '')
+
+    def request(self, path, data=None):
+        body = urlencode(data, doseq=True).encode() if data is not None else None
+        request = Request(self.base_url + path, data=body)
+        if self.cookies:
+            request.add_header('Cookie', '; '.join(f'{name}={value}' for name, value in self.cookies.items()))
+        if body is not None:
+            request.add_header('X-CSRFToken', self.csrf_token())
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                content = response.read()
+                status, headers = response.status, response.headers
+        except HTTPError as error:
+            content = error.read()
+            status, headers = error.code, error.headers
+        for header in headers.get_all('Set-Cookie') or []:
+            cookie = SimpleCookie(header)
+            for name, morsel in cookie.items():
+                self.cookies[name] = morsel.value
+        return status, content
+
+
+class Command(BaseCommand):
+    help = (
+        'Boot the app under gunicorn against a freshly seeded local database and fire '
+        'concurrent mixed traffic at it. Reports throughput, p50/p95/p99 latency and '
+        'error rate per endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Load test an already running server instead of booting one.')
+        parser.add_argument('--database-url',
+                            help='Database for the booted server (default: a temporary SQLite file).')
+        parser.add_argument('--workers', type=int, default=2, help='Gunicorn worker processes (default: 2).')
+        parser.add_argument('--threads', type=int, default=1, help='Gunicorn threads per worker (default: 1).')
+        parser.add_argument('--port', type=int, default=0, help='Port for the booted server (default: any free port).')
+        parser.add_argument('--concurrency', type=int, default=10, help='Simultaneous simulated users (default: 10).')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds of traffic (default: 30).')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help=f'Relative weight per endpoint (default: "{DEFAULT_MIX}").')
+        parser.add_argument('--employees', type=int, default=300, help='Employees to seed (default: 300).')
+        parser.add_argument('--days', type=int, default=60, help='Days of attendance to seed (default: 60).')
+        parser.add_argument('--mark-batch', type=int, default=25,
+                            help='Employees included in each mark_attendance post (default: 25).')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds.')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.mix = self.parse_mix(options['mix'])
+        if options['concurrency'] < 1 or options['duration'] <= 0:
+            raise CommandError('--concurrency and --duration must be positive.')
+
+        if options['url']:
+            self.run_traffic(options['url'])
+            return
+
+        workdir = tempfile.mkdtemp(prefix='staffsync-loadtest-')
+        server = None
+        try:
+            env = self.server_env(workdir)
+            self.prepare_database(env)
+            server, base_url = self.boot_server(env)
+            self.run_traffic(base_url)
+        finally:
+            if server is not None:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def parse_mix(self, value):
+        endpoints = {
+            'dashboard': self.hit_dashboard,
+            'attendance': self.hit_attendance,
+            'mark': self.hit_mark,
+            'employees': self.hit_employees,
+            'employee_detail': self.hit_employee_detail,
+        }
+        mix = []
+        for part in value.split(','):
+            name, _, weight = part.partition('=')
+            name = name.strip()
+            if name not in endpoints:
+                raise CommandError(f'Unknown endpoint "{name}" in --mix. Choose from: {", ".join(endpoints)}.')
+            try:
+                weight = float(weight or 1)
+            except ValueError:
+                raise CommandError(f'Invalid weight for "{name}" in --mix.')
+            if weight > 0:
+                mix.append((name, endpoints[name], weight))
+        if not mix:
+            raise CommandError('--mix needs at least one endpoint with a positive weight.')
+        return mix
+
+    def server_env(self, workdir):
+        env = os.environ.copy()
+        env.update({
+            'DATABASE_URL': self.options['database_url'] or f'sqlite:///{os.path.join(workdir, "loadtest.sqlite3")}',
+            'DEBUG': 'False',
+            'STATIC_ROOT': os.path.join(workdir, 'static'),
+            'ALLOWED_HOSTS': '127.0.0.1,localhost',
+            'PROFILING_ENABLED': 'False',
+            'PYTHONUNBUFFERED': '1',
+        })
+        return env
+
+    def manage(self, env, *arguments):
+        result = subprocess.run(
+            [sys.executable, 'manage.py', *arguments],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'manage.py {" ".join(arguments)} failed:\n{result.stderr}')
+        return result.stdout
+
+    def prepare_database(self, env):
+        self.stdout.write('Migrating and seeding the load test database...')
+        # DEBUG=False serves static files through the manifest storage.
+        self.manage(env, 'collectstatic', '--noinput')
+        self.manage(env, 'migrate', '--noinput')
+        self.stdout.write(self.manage(
+            env, 'seed_demo_data', '--employees', str(self.options['employees']),
+            '--days', str(self.options['days']), '--seed', '1',
+        ).strip())
+
+    def boot_server(self, env):
+        port = self.options['port'] or self.free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', 'employee_management.wsgi:application',
+                '--bind', f'127.0.0.1:{port}',
+                '--workers', str(self.options['workers']),
+                '--threads', str(self.options['threads']),
+                '--timeout', str(int(self.options['timeout']) + 30),
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR, env=env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('gunicorn exited during startup.')
+            try:
+                status, _ = LoadClient(base_url, timeout=2).request('/dashboard/')
+                if status < 500:
+                    break
+            except (URLError, ConnectionError, socket.timeout):
+                time.sleep(0.25)
+        else:
+            server.terminate()
+            raise CommandError('gunicorn did not start serving within 30 seconds.')
+        self.stdout.write(
+            f'gunicorn serving on {base_url} with {self.options["workers"]} worker(s) x '
+            f'{self.options["threads"]} thread(s).'
+        )
+        return server, base_url
+
+    @staticmethod
+    def free_port():
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    def run_traffic(self, base_url):
+        # The mark page lists every employee, so one fetch provides the IDs used
+        # by detail views and mark posts.
+        status, content = LoadClient(base_url, self.options['timeout']).request('/attendance/mark/')
+        if status != 200:
+            raise CommandError(f'Could not load /attendance/mark/ from {base_url} (HTTP {status}).')
+        self.employee_ids = sorted({int(pk) for pk in re.findall(rb'name="status_(\d+)"', content)})
+        if not self.employee_ids:
+            raise CommandError('No employees found; seed the database first.')
+
+        today = date.today()
+        self.mark_days = [today - timedelta(days=i) for i in range(1, 30) if (today - timedelta(days=i)).weekday() < 5]
+        self.results = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+        concurrency, duration = self.options['concurrency'], self.options['duration']
+        self.stdout.write(f'Running {concurrency} simulated user(s) for {duration:g}s against {base_url}...')
+        started = time.perf_counter()
+        deadline = started + duration
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for index in range(concurrency):
+                executor.submit(self.user_loop, base_url, deadline, random.Random(index))
+        self.report(time.perf_counter() - started)
+
+    def user_loop(self, base_url, deadline, rng):
+        client = LoadClient(base_url, self.options['timeout'])
+        names = [name for name, _, _ in self.mix]
+        actions = [action for _, action, _ in self.mix]
+        weights = [weight for _, _, weight in self.mix]
+        while time.perf_counter() < deadline:
+            index = rng.choices(range(len(actions)), weights)[0]
+            started = time.perf_counter()
+            try:
+                ok = actions[index](client, rng)
+            except (URLError, ConnectionError, socket.timeout, OSError):
+                ok = False
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.results[names[index]].append(elapsed)
+                if not ok:
+                    self.errors[names[index]] += 1
+
+    def hit_dashboard(self, client, rng):
+        status, _ = client.request('/dashboard/')
+        return status == 200
+
+    def hit_attendance(self, client, rng):
+        end = date.today() - timedelta(days=rng.randint(0, 30))
+        start = end - timedelta(days=rng.choice([6, 13, 29]))
+        status, _ = client.request(f'/attendance/?start_date={start}&end_date={end}')
+        return status == 200
+
+    def hit_mark(self, client, rng):
+        if not client.csrf_token():
+            client.request('/attendance/mark/')
+        day = rng.choice(self.mark_days)
+        batch = rng.sample(self.employee_ids, min(self.options['mark_batch'], len(self.employee_ids)))
+        data = {'selected_date': day.isoformat()}
+        for employee_id in batch:
+            data[f'status_{employee_id}'] = rng.choice(['present', 'present', 'absent'])
+        status, _ = client.request(f'/attendance/mark/?date={day}', data)
+        return status in (200, 302)
+
+    def hit_employees(self, client, rng):
+        status, _ = client.request('/')
+        return status == 200
+
+    def hit_employee_detail(self, client, rng):
+        status, _ = client.request(f'/employee/{rng.choice(self.employee_ids)}/')
+        return status == 200
+
+    def report(self, elapsed):
+        header = f'{"endpoint":<16}{"requests":>10}{"req/s":>9}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"errors":>9}'
+        self.stdout.write('')
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        total_requests = total_errors = 0
+        all_latencies = []
+        for name, _, _ in self.mix:
+            latencies = sorted(self.results.get(name, []))
+            errors = self.errors.get(name, 0)
+            total_requests += len(latencies)
+            total_errors += errors
+            all_latencies.extend(latencies)
+            self.stdout.write(self.format_row(name, latencies, errors, elapsed))
+        self.stdout.write('-' * len(header))
+        self.stdout.write(self.format_row('total', sorted(all_latencies), total_errors, elapsed))
+        if total_requests and total_errors:
+            self.stdout.write(self.style.WARNING(f'{total_errors} of {total_requests} request(s) failed.'))
+
+    @staticmethod
+    def format_row(name, latencies, errors, elapsed):
+        count = len(latencies)
+        error_rate = f'{errors * 100 / count:.1f}%' if count else '-'
+        return (
+            f'{name:<16}{count:>10}{count / elapsed:>9.1f}'
+            f'{percentile(latencies, 0.50) * 1000:>10.1f}'
+            f'{percentile(latencies, 0.95) * 1000:>10.1f}'
+            f'{percentile(latencies, 0.99) * 1000:>10.1f}'
+            f'{error_rate:>9}'
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.models import Department
+from employees.services import DepartmentService
+
+
+class Command(BaseCommand):
+    help = 'Move every employee of the source departments into the target department and delete the sources.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', type=int, help='Primary key of the department to keep.')
+        parser.add_argument('sources', nargs='+', type=int, help='Primary keys of the departments to merge into it.')
+
+    def handle(self, *args, **options):
+        target = Department.objects.filter(pk=options['target']).first()
+        if target is None:
+            raise CommandError(f"Department {options['target']} does not exist.")
+        sources = set(options['sources']) - {target.pk}
+        missing = sources - set(Department.objects.filter(pk__in=sources).values_list('pk', flat=True))
+        if missing:
+            raise CommandError(f"Unknown department(s): {', '.join(str(pk) for pk in sorted(missing))}.")
+        if not sources:
+            raise CommandError('Give at least one department other than the target.')
+
+        result = DepartmentService.merge(sources, target.pk)
+        self.stdout.write(self.style.SUCCESS(
+            f"Merged {result['departments']} department(s) into {target.name}, "
+            f"moving {result['employees']} employee(s)."
+        ))
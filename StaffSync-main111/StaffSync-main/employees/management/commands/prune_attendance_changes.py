@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from employees.services import AttendanceChangeLogService
+
+
+class Command(BaseCommand):
+    help = 'Delete attendance change log entries that every consumer has had time to read.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=90, metavar='DAYS',
+                            help='Delete entries recorded more than this many days ago (default: 90).')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of entries deleted per statement (default: 5000).')
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--older-than and --batch-size must be positive numbers.')
+
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        deleted = 0
+        for count in AttendanceChangeLogService.prune_before(cutoff, batch_size=options['batch_size']):
+            deleted += count
+            self.stdout.write(f'Deleted {deleted} entry(ies)...')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {deleted} change log entry(ies) recorded before {cutoff:%Y-%m-%d}."
+        ))
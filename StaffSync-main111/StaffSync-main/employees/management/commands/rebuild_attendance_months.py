@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from employees.services import AttendanceMonthService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly bitmap attendance store from attendance records.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Number of employees rebuilt per transaction (default: 200).')
+
+    def handle(self, *args, **options):
+        rebuilt = 0
+        for count in AttendanceMonthService.rebuild(chunk_size=options['chunk_size']):
+            rebuilt += count
+            self.stdout.write(f'Rebuilt {rebuilt} employee(s)...')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt monthly attendance for {rebuilt} employee(s).'))
@@ -0,0 +1,87 @@
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from employees.models import Department, Employee
+from employees.services import AttendanceService, DepartmentCounterService, EmployeeService, HolidayCalendar
+
+DEMO_EMAIL_DOMAIN = 'demo.invalid'
+FIRST_NAMES = ['Aisha', 'Ben', 'Carla', 'Dev', 'Elena', 'Femi', 'Grace', 'Hiro', 'Ines', 'Jonas',
+               'Kofi', 'Lena', 'Mateo', 'Nadia', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sami', 'Tara']
+LAST_NAMES = ['Adams', 'Brown', 'Chen', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Haddad', 'Ito', 'Jensen',
+              'Khan', 'Lopez', 'Meyer', 'Novak', 'Okafor', 'Patel', 'Rossi', 'Silva', 'Tanaka', 'Weber']
+
+
+class Command(BaseCommand):
+    help = 'Seed departments, employees and recent attendance for local testing and load tests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=500)
+        parser.add_argument('--departments', type=int, default=8)
+        parser.add_argument('--days', type=int, default=60,
+                            help='Calendar days of attendance history to generate (default: 60).')
+        parser.add_argument('--present-ratio', type=float, default=0.9)
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously seeded demo employees first.')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for repeatable data.')
+
+    def handle(self, *args, **options):
+        if options['employees'] < 1 or options['departments'] < 1 or options['days'] < 0:
+            raise CommandError('--employees and --departments must be positive and --days not negative.')
+        rng = random.Random(options['seed'])
+        today = timezone.now().date()
+
+        if options['clear']:
+            # Through bulk_delete() so the removed attendance is announced and
+            # the counters, change log and cached reports follow.
+            progress = {'employees': 0, 'records': 0}
+            for progress in EmployeeService.bulk_delete(
+                Employee.objects.filter(email__endswith=f'@{DEMO_EMAIL_DOMAIN}').values_list('pk', flat=True),
+            ):
+                pass
+            self.stdout.write(
+                f"Removed {progress['employees']} previously seeded employee(s) "
+                f"and {progress['records']} related record(s)."
+            )
+
+        with transaction.atomic():
+            departments = [
+                Department.objects.get_or_create(name=f'Demo Department {i + 1}')[0]
+                for i in range(options['departments'])
+            ]
+            offset = Employee.objects.filter(email__endswith=f'@{DEMO_EMAIL_DOMAIN}').count()
+            employees = Employee.objects.bulk_create([
+                Employee(
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    email=f'demo-{offset + i}@{DEMO_EMAIL_DOMAIN}',
+                    phone_number=f'555{offset + i:07d}'[:15],
+                    department=rng.choice(departments),
+                    hire_date=today - timedelta(days=options['days'] + rng.randint(0, 365)),
+                )
+                for i in range(options['employees'])
+            ])
+            # bulk_create doesn't return primary keys on every backend, and
+            # skips the receivers that keep department headcounts.
+            employee_ids = list(Employee.objects.filter(
+                email__in=[employee.email for employee in employees],
+            ).values_list('pk', flat=True))
+            DepartmentCounterService.apply(headcount=Counter(employee.department_id for employee in employees))
+
+        calendar = HolidayCalendar.load()
+        working_days = calendar.working_days(today - timedelta(days=options['days']), today - timedelta(days=1))
+        statuses = {
+            (employee_id, day): 'present' if rng.random() < options['present_ratio'] else 'absent'
+            for employee_id in employee_ids
+            for day in working_days
+        }
+        summary = AttendanceService.bulk_upsert(statuses, batch_size=2000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(employee_ids)} employee(s) in {len(departments)} department(s) '
+            f'and {summary["created"]} attendance record(s) over {len(working_days)} working day(s).'
+        ))
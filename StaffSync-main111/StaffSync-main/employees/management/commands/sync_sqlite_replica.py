@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from employees.routers import REPLICA, replica_configured
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database over the replica file, to try replica '
+        'routing locally. Run it again to simulate the replica catching up.'
+    )
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError('No replica database is configured; set REPLICA_DATABASE_URL.')
+        for alias in ('default', REPLICA):
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'The {alias} database is not SQLite; use the server\'s own replication.')
+            connections[alias].ensure_connection()
+
+        connections['default'].connection.backup(connections[REPLICA].connection)
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {connections['default'].settings_dict['NAME']} to {connections[REPLICA].settings_dict['NAME']}."
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.services import DepartmentCounterService
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare each department's maintained headcount and today's present/absent "
+        'counters with a recount from the employee and attendance tables.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true',
+                            help='Recount the departments that drifted.')
+        parser.add_argument('--fail-on-drift', action='store_true',
+                            help='Exit with an error when drift is found and not repaired (for cron alerts).')
+
+    def handle(self, *args, **options):
+        drift = DepartmentCounterService.find_drift()
+        for entry in drift:
+            self.stdout.write(
+                f"{entry['department'].name} (#{entry['department'].pk}): "
+                'stored headcount/present/absent {}/{}/{}, actual {}/{}/{}'.format(*entry['stored'], *entry['actual'])
+            )
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All department counters match.'))
+            return
+
+        if options['repair']:
+            repaired = DepartmentCounterService.recount([entry['department'].pk for entry in drift])
+            self.stdout.write(self.style.SUCCESS(f'Recounted {repaired} department(s).'))
+        elif options['fail_on_drift']:
+            raise CommandError(f'{len(drift)} department(s) drifted; rerun with --repair.')
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} department(s) drifted; rerun with --repair.'))
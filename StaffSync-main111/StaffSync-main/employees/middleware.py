@@ -0,0 +1,198 @@
+import cProfile
+import io
+import logging
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .routers import PRIMARY_COOKIE, replica_configured
+
+logger = logging.getLogger('employees.profiling')
+
+
+class RequestProfilerMiddleware:
+    """Run a single request under cProfile and tracemalloc when staff ask for it.
+
+    Triggered by ``?_profile=1`` or an ``X-Profile: 1`` header and gated by the
+    PROFILING_ENABLED setting. The profile is written to PROFILING_DIR (open it
+    with ``python -m pstats`` or snakeviz), and a summary of the slowest
+    functions and the largest allocations goes to the ``employees.profiling``
+    logger and the ``X-Profile-*`` response headers. Streamed responses are
+    profiled until their body has been produced and report to the log only.
+    """
+
+    # tracemalloc is process-wide, so only one request is profiled at a time.
+    _lock = threading.Lock()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self._should_profile(request):
+            return self.get_response(request)
+        if not self._lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response['X-Profile-Skipped'] = 'another request is being profiled'
+            return response
+        try:
+            response = self._profile(request)
+        except BaseException:
+            self._lock.release()
+            raise
+        if not response.streaming or getattr(response, 'is_async', False):
+            self._lock.release()
+        # A streamed response keeps the lock until its body has been sent.
+        return response
+
+    def _should_profile(self, request):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            return False
+        if request.GET.get('_profile') != '1' and request.headers.get('X-Profile') != '1':
+            return False
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_active and user.is_staff)
+
+    def _profile(self, request):
+        tracemalloc.start()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            response = self.get_response(request)
+        except BaseException:
+            tracemalloc.stop()
+            raise
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+        if response.streaming and not getattr(response, 'is_async', False):
+            # A streamed page does most of its work while the body is read,
+            # after the view has returned, so profiling goes on chunk by chunk
+            # until the body ends. The headers are gone by then: the results
+            # only reach the log and the profile file.
+            path = self._get_path(request)
+            response['X-Profile-File'] = path.name
+            response['X-Profile-Time'] = 'streamed, see log'
+            state = {'elapsed': elapsed, 'finished': False}
+
+            def finish():
+                # Runs once, when the body ends or when the server closes the
+                # response: a body that is never read (e.g. for HEAD) never
+                # starts the generator, so its finally can't be relied on.
+                if state['finished']:
+                    return
+                state['finished'] = True
+                try:
+                    self._report(request, profiler, state['elapsed'], path)
+                finally:
+                    self._lock.release()
+
+            response.streaming_content = self._profile_stream(response.streaming_content, profiler, state, finish)
+            response._resource_closers.append(finish)
+            return response
+
+        # Async streamed bodies are consumed on the event loop and not profiled.
+        elapsed, peak, functions, allocations, path = self._report(
+            request, profiler, elapsed, self._get_path(request),
+        )
+        response['X-Profile-Time'] = f'{elapsed * 1000:.1f}ms'
+        response['X-Profile-Peak-Memory'] = f'{peak / 1024:.1f}KiB'
+        response['X-Profile-File'] = path.name
+        response['X-Profile-Top'] = '; '.join(
+            f'{name} {cumtime * 1000:.1f}ms' for name, cumtime in functions[:5]
+        )
+        if allocations:
+            frame = allocations[0].traceback[0]
+            response['X-Profile-Top-Allocation'] = (
+                f'{Path(frame.filename).name}:{frame.lineno} {allocations[0].size / 1024:.1f}KiB'
+            )
+        return response
+
+    def _profile_stream(self, content, profiler, state, finish):
+        # Only the time spent producing chunks is counted, not the time the
+        # server spends sending them.
+        chunks = iter(content)
+        try:
+            while True:
+                started = time.perf_counter()
+                profiler.enable()
+                try:
+                    chunk = next(chunks, None)
+                finally:
+                    profiler.disable()
+                    state['elapsed'] += time.perf_counter() - started
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            finish()
+
+    def _report(self, request, profiler, elapsed, path):
+        top = getattr(settings, 'PROFILING_TOP_N', 15)
+        _, peak = tracemalloc.get_traced_memory()
+        allocations = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ]).statistics('lineno')[:top]
+        tracemalloc.stop()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        stats = pstats.Stats(profiler)
+        functions = self._top_functions(stats, top)
+
+        report = io.StringIO()
+        stats.stream = report
+        stats.sort_stats('cumulative').print_stats(top)
+        logger.info(
+            'Profiled %s %s: %.1f ms, peak %.1f KiB, saved to %s\n%s\nLargest allocations:\n%s',
+            request.method, request.get_full_path(), elapsed * 1000, peak / 1024, path,
+            report.getvalue(), '\n'.join(str(stat) for stat in allocations),
+        )
+        return elapsed, peak, functions, allocations, path
+
+    def _top_functions(self, stats, limit):
+        # Functions of this project first: the framework frames around every
+        # view would otherwise fill the summary.
+        project_dir = str(settings.BASE_DIR)
+        rows = []
+        for (filename, lineno, name), (_, _, _, cumtime, _) in stats.stats.items():
+            if filename.startswith(project_dir) and not filename.endswith('middleware.py'):
+                rows.append((f'{Path(filename).name}:{lineno}({name})', cumtime))
+        rows.sort(key=lambda row: row[1], reverse=True)
+        return rows[:limit]
+
+    def _get_path(self, request):
+        directory = Path(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+        stamp = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+        return directory / f'{stamp}-{request.method.lower()}-{slug[:80]}.prof'
+
+
+class PrimaryStickinessMiddleware:
+    """Pin a client to the primary database for a while after it writes.
+
+    Any request with an unsafe method counts as a write. The response sets a
+    short-lived cookie that ``replica_reads`` views check before routing
+    their reads to the replica (REPLICA_STICKY_SECONDS).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE') and replica_configured():
+            response.set_cookie(
+                PRIMARY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
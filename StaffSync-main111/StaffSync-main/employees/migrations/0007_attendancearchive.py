@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0006_holiday_alter_attendance_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('status', models.CharField(choices=[('present', 'Present'), ('absent', 'Absent')], max_length=20)),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendances', to='employees.employee')),
+            ],
+            options={
+                'verbose_name_plural': 'Archived attendances',
+                'ordering': ['-date', 'employee__first_name'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='attendancearchive',
+            constraint=models.UniqueConstraint(fields=('employee', 'date'), name='unique_archived_employee_date'),
+        ),
+    ]
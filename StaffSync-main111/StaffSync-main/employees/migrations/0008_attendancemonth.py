@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_attendancearchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('marked_mask', models.IntegerField(default=0)),
+                ('present_mask', models.IntegerField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_months', to='employees.employee')),
+            ],
+            options={
+                'verbose_name_plural': 'Attendance months',
+                'ordering': ['year', 'month'],
+                'indexes': [models.Index(fields=['year', 'month'], name='attendance_month_period_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='attendancemonth',
+            constraint=models.UniqueConstraint(fields=('employee', 'year', 'month'), name='unique_employee_month'),
+        ),
+    ]
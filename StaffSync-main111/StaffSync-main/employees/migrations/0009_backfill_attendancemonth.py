@@ -0,0 +1,46 @@
+from django.db import migrations
+
+
+def build_attendance_months(apps, schema_editor, chunk_size=200):
+    Attendance = apps.get_model('employees', 'Attendance')
+    AttendanceArchive = apps.get_model('employees', 'AttendanceArchive')
+    AttendanceMonth = apps.get_model('employees', 'AttendanceMonth')
+    Employee = apps.get_model('employees', 'Employee')
+
+    # A chunk of employees at a time, like AttendanceMonthService.rebuild(),
+    # so memory is bounded by the chunk's records rather than the whole table.
+    employee_ids = list(Employee.objects.order_by('pk').values_list('pk', flat=True))
+    for i in range(0, len(employee_ids), chunk_size):
+        chunk = employee_ids[i:i + chunk_size]
+        statuses = {}
+        for model in (AttendanceArchive, Attendance):
+            records = model.objects.filter(employee_id__in=chunk).values_list('employee_id', 'date', 'status')
+            for employee_id, date, status in records.iterator():
+                statuses[(employee_id, date)] = status
+
+        masks = {}
+        for (employee_id, date), status in statuses.items():
+            key = (employee_id, date.year, date.month)
+            marked, present = masks.get(key, (0, 0))
+            bit = 1 << (date.day - 1)
+            masks[key] = (marked | bit, present | bit if status == 'present' else present)
+
+        AttendanceMonth.objects.bulk_create(
+            [
+                AttendanceMonth(employee_id=employee_id, year=year, month=month,
+                                marked_mask=marked, present_mask=present)
+                for (employee_id, year, month), (marked, present) in masks.items()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_attendancemonth'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_attendance_months, migrations.RunPython.noop),
+    ]
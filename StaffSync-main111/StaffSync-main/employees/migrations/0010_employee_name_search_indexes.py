@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:26
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0009_backfill_attendancemonth'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(django.db.models.functions.text.Upper('first_name'), name='employee_first_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(django.db.models.functions.text.Upper('last_name'), name='employee_last_name_upper_idx'),
+        ),
+    ]
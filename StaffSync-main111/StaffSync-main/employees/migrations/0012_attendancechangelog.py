@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0011_attendance_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceChangeLog',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('employee_id', models.BigIntegerField()),
+                ('date', models.DateField()),
+                ('operation', models.CharField(choices=[('insert', 'Insert'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('previous', models.CharField(blank=True, choices=[('present', 'Present'), ('absent', 'Absent')], max_length=20, null=True)),
+                ('status', models.CharField(blank=True, choices=[('present', 'Present'), ('absent', 'Absent')], max_length=20, null=True)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Attendance change log',
+                'ordering': ['seq'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0013_ingesttoken_ingestbatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='absent_today',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='counters_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='headcount',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='present_today',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
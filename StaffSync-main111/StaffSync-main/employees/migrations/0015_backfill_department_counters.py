@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:01
+
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def count_per_department(queryset, department_field):
+    counts = queryset.filter(**{department_field: OuterRef('pk')}).order_by().values(department_field).annotate(
+        count=Count('pk'),
+    ).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def backfill_counters(apps, schema_editor):
+    Attendance = apps.get_model('employees', 'Attendance')
+    Department = apps.get_model('employees', 'Department')
+    Employee = apps.get_model('employees', 'Employee')
+
+    today = timezone.now().date()
+    attendance = Attendance.objects.filter(date=today)
+    Department.objects.update(
+        headcount=count_per_department(Employee.objects.all(), 'department'),
+        present_today=count_per_department(attendance.filter(status='present'), 'employee__department'),
+        absent_today=count_per_department(attendance.filter(status='absent'), 'employee__department'),
+        counters_date=today,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0014_department_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
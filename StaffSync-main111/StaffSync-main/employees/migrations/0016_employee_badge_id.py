@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0015_backfill_department_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='badge_id',
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:02
+
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def backfill_month_day(apps, schema_editor):
+    Holiday = apps.get_model('employees', 'Holiday')
+    Holiday.objects.update(month=ExtractMonth('date'), day=ExtractDay('date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0016_employee_badge_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='holiday',
+            name='day',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='month',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_month_day, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='holiday',
+            index=models.Index(fields=['month', 'day'], name='holiday_month_day_idx'),
+        ),
+    ]
@@ -1,7 +1,15 @@
 from django.db import models
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Upper
 
 class Department(models.Model):
     name = models.CharField(max_length=100)
+    # Maintained by DepartmentCounterService from every employee and attendance
+    # write path; present_today and absent_today count for counters_date only.
+    headcount = models.IntegerField(default=0, editable=False)
+    present_today = models.IntegerField(default=0, editable=False)
+    absent_today = models.IntegerField(default=0, editable=False)
+    counters_date = models.DateField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return self.name
@@ -13,9 +21,15 @@ class Employee(models.Model):
     phone_number = models.CharField(max_length=15)
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True)
     hire_date = models.DateField()
+    # Identifier printed on the door badge; punch logs refer to employees by it.
+    badge_id = models.CharField(max_length=32, unique=True, null=True, blank=True)
     
     class Meta:
         ordering = ['first_name', 'last_name']
+        indexes = [
+            models.Index(Upper('first_name'), name='employee_first_name_upper_idx'),
+            models.Index(Upper('last_name'), name='employee_last_name_upper_idx'),
+        ]
         verbose_name_plural = 'Employees'
     
     def __str__(self):
@@ -24,18 +38,84 @@ class Employee(models.Model):
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
     
+class HolidayQuerySet(models.QuerySet):
+
+    def on(self, date_obj):
+        """Holidays falling on ``date_obj``: on that exact date, or recurring on its month and day."""
+        return self.filter(Q(date=date_obj) | Q(is_recurring=True, month=date_obj.month, day=date_obj.day))
+
+    # The expressions below match against a date column of the enclosing query
+    # (``date_field`` as in OuterRef), so attendance rows or any other dated
+    # rows can be flagged or filtered in the same statement. The exact and the
+    # recurring match are separate subqueries: each is an indexed lookup, the
+    # unique date index and the (month, day) index, where an OR of the two
+    # would have to scan the holiday table for every outer row.
+
+    def falls_on(self, date_field: str = 'date') -> Q:
+        return Q(Exists(self.filter(date=OuterRef(date_field)))) | Q(Exists(self.filter(
+            is_recurring=True, month=OuterRef(f'{date_field}__month'), day=OuterRef(f'{date_field}__day'),
+        )))
+
+    def name_on(self, date_field: str = 'date') -> Coalesce:
+        # An exact holiday's name wins over a recurring one, as in HolidayCalendar.
+        return Coalesce(
+            Subquery(self.filter(date=OuterRef(date_field)).values('name')[:1]),
+            Subquery(self.filter(
+                is_recurring=True, month=OuterRef(f'{date_field}__month'), day=OuterRef(f'{date_field}__day'),
+            ).order_by('date').values('name')[:1]),
+        )
+
+    def bulk_create(self, objs, *args, **kwargs):
+        for holiday in objs:
+            holiday.set_month_day()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Holiday(models.Model):
     name = models.CharField(max_length=200)
     date = models.DateField(unique=True)
     is_recurring = models.BooleanField(default=False, help_text="If checked, this holiday repeats every year on the same date")
+    # Copies of date's month and day, kept by save() so recurring holidays are
+    # matched through an index instead of extracting them from every row.
+    month = models.PositiveSmallIntegerField(editable=False)
+    day = models.PositiveSmallIntegerField(editable=False)
+
+    objects = HolidayQuerySet.as_manager()
     
     class Meta:
         ordering = ['date']
         verbose_name_plural = 'Holidays'
+        indexes = [
+            models.Index(fields=['month', 'day'], name='holiday_month_day_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.date}"
 
+    def set_month_day(self):
+        self.month = self.date.month
+        self.day = self.date.day
+
+    def save(self, *args, **kwargs):
+        self.set_month_day()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'date' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'month', 'day'}
+        super().save(*args, **kwargs)
+
+
+class AttendanceQuerySet(models.QuerySet):
+
+    def with_holidays(self):
+        """Annotate each record with ``holiday_name``, None on ordinary days."""
+        return self.annotate(holiday_name=Holiday.objects.name_on('date'))
+
+    def on_holidays(self):
+        return self.filter(Holiday.objects.falls_on('date'))
+
+    def exclude_holidays(self):
+        return self.exclude(Holiday.objects.falls_on('date'))
+
 
 class Attendance(models.Model):
     STATUS_CHOICES = [
@@ -46,13 +126,130 @@ class Attendance(models.Model):
     date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+
+    objects = AttendanceQuerySet.as_manager()
     
     class Meta:
         ordering = ['-date', 'employee__first_name']
         constraints = [
             models.UniqueConstraint(fields=['employee', 'date'], name='unique_employee_date')
         ]
+        indexes = [
+            models.Index(fields=['date'], name='attendance_date_idx'),
+        ]
         verbose_name_plural = 'Attendances'
     
     def __str__(self):
-        return f"{self.employee} - {self.date} - {self.status}"
\ No newline at end of file
+        return f"{self.employee} - {self.date} - {self.status}"
+
+class AttendanceArchive(models.Model):
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='archived_attendances')
+    date = models.DateField(db_index=True)
+    status = models.CharField(max_length=20, choices=Attendance.STATUS_CHOICES)
+    created_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = AttendanceQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['-date', 'employee__first_name']
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'date'], name='unique_archived_employee_date')
+        ]
+        verbose_name_plural = 'Archived attendances'
+    
+    def __str__(self):
+        return f"{self.employee} - {self.date} - {self.status}"
+
+
+class AttendanceMonth(models.Model):
+    # Compact read model of one employee's month: bit (day - 1) of marked_mask
+    # is set when that day has a record and the same bit of present_mask when
+    # the record is 'present'. Kept in sync from attendance writes.
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='attendance_months')
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    marked_mask = models.IntegerField(default=0)
+    present_mask = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['year', 'month']
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'year', 'month'], name='unique_employee_month')
+        ]
+        indexes = [
+            models.Index(fields=['year', 'month'], name='attendance_month_period_idx'),
+        ]
+        verbose_name_plural = 'Attendance months'
+    
+    def __str__(self):
+        return f"{self.employee} - {self.year}-{self.month:02d}"
+    
+    def get_status(self, day):
+        bit = 1 << (day - 1)
+        if not self.marked_mask & bit:
+            return None
+        return 'present' if self.present_mask & bit else 'absent'
+
+
+class AttendanceChangeLog(models.Model):
+    # Append-only log of attendance writes for incremental sync. ``seq`` only
+    # grows, so consumers keep the last one they saw as their cursor. Employee
+    # is a plain id on purpose: entries outlive deleted employees.
+    OPERATION_CHOICES = [
+        ('insert', 'Insert'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    ]
+    seq = models.BigAutoField(primary_key=True)
+    employee_id = models.BigIntegerField()
+    date = models.DateField()
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
+    previous = models.CharField(max_length=20, choices=Attendance.STATUS_CHOICES, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Attendance.STATUS_CHOICES, null=True, blank=True)
+    recorded_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['seq']
+        verbose_name_plural = 'Attendance change log'
+    
+    def __str__(self):
+        return f"#{self.seq} {self.operation} {self.employee_id} - {self.date}"
+
+
+class IngestToken(models.Model):
+    # API credential for kiosks and badge readers. Only a SHA-256 digest of
+    # the token is stored; the token itself is shown once when it is created.
+    name = models.CharField(max_length=100)
+    key_digest = models.CharField(max_length=64, unique=True, editable=False)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'Ingest tokens'
+    
+    def __str__(self):
+        return self.name
+
+
+class IngestBatch(models.Model):
+    # One accepted ingestion request. The stored response is replayed when a
+    # client retries with the same idempotency key.
+    token = models.ForeignKey(IngestToken, on_delete=models.CASCADE, related_name='batches')
+    idempotency_key = models.CharField(max_length=100)
+    payload_digest = models.CharField(max_length=64)
+    event_count = models.PositiveIntegerField()
+    response = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['-received_at']
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'idempotency_key'], name='unique_ingest_batch_key')
+        ]
+        verbose_name_plural = 'Ingest batches'
+    
+    def __str__(self):
+        return f"{self.token} - {self.idempotency_key}"
@@ -0,0 +1,143 @@
+from collections import Counter
+from datetime import date, datetime
+from typing import Iterator, Optional
+
+from django.utils import timezone
+
+from .models import Employee
+from .services import AttendanceService, HolidayCalendar
+
+DELIMITERS = (',', ';', '\t', '|')
+
+
+class PunchLogImport:
+    """Turns door controller punch logs into 'present' attendance.
+
+    A log has one punch per line: a badge id, then a timestamp starting with
+    the date (``1042,2026-10-19 08:58:41``; comma, semicolon, tab, pipe or
+    whitespace separated). Lines flow through a chain of generators, so only
+    the current batch and the set of (employee, date) keys already taken are
+    kept in memory, whatever the size of the file. Several punches of one
+    employee on one day collapse into one record. Punches on weekends,
+    holidays, future dates or before the hire date are dropped.
+
+    Every ``batch_size`` distinct keys are upserted in their own transaction,
+    so an interrupted import can simply be run again.
+    """
+
+    def __init__(self, batch_size: int = 5000, delimiter: Optional[str] = None,
+                 date_format: Optional[str] = None, calendar: Optional[HolidayCalendar] = None):
+        self.batch_size = batch_size
+        self.delimiter = delimiter
+        self.date_format = date_format
+        self.calendar = calendar or HolidayCalendar.cached()
+        self.today = timezone.now().date()
+        self.stats = Counter()
+        # One query up front; every later badge lookup is a dict hit.
+        self.badges = {
+            badge_id: (employee_id, hire_date)
+            for badge_id, employee_id, hire_date in Employee.objects.exclude(badge_id=None).values_list(
+                'badge_id', 'id', 'hire_date',
+            )
+        }
+        # Date text -> date, or the reason punches on that day are dropped.
+        self._days = {}
+
+    def run(self, lines) -> Iterator[dict]:
+        """Import ``lines`` (any iterable of text lines); yields running totals after each batch."""
+        statuses = {}
+        for key in self.collapse(self.check_days(self.resolve(self.parse(lines)))):
+            statuses[key] = 'present'
+            if len(statuses) >= self.batch_size:
+                self.save(statuses)
+                statuses = {}
+                yield dict(self.stats)
+        if statuses:
+            self.save(statuses)
+        yield dict(self.stats)
+
+    def parse(self, lines) -> Iterator[tuple]:
+        """Yields (badge id, date text) per punch line."""
+        stats = self.stats
+        delimiter = self.delimiter
+        for line in lines:
+            stats['lines'] += 1
+            line = line.strip()
+            if not line or line[0] == '#':
+                continue
+            if delimiter is None:
+                delimiter = next((candidate for candidate in DELIMITERS if candidate in line), ' ')
+            if delimiter == ' ':
+                badge, _, timestamp = line.partition(' ')
+            else:
+                badge, _, timestamp = line.partition(delimiter)
+            timestamp = timestamp.strip().strip('"')
+            if not timestamp[:1].isdigit():
+                # Also skips a header row.
+                stats['malformed'] += 1
+                continue
+            yield badge.strip().strip('"'), timestamp[:10] if self.date_format is None else timestamp.split()[0]
+
+    def resolve(self, punches) -> Iterator[tuple]:
+        """Yields (employee id, hire date, date text); unknown badges are counted and dropped."""
+        badges = self.badges
+        stats = self.stats
+        for badge, day_text in punches:
+            employee = badges.get(badge)
+            if employee is None:
+                stats['unknown_badge'] += 1
+                continue
+            yield employee[0], employee[1], day_text
+
+    def check_days(self, punches) -> Iterator[tuple]:
+        """Yields (employee id, date) for punches on days that can be marked."""
+        days = self._days
+        stats = self.stats
+        for employee_id, hire_date, day_text in punches:
+            day = days.get(day_text)
+            if day is None:
+                day = days[day_text] = self._classify(day_text)
+            if isinstance(day, str):
+                stats[day] += 1
+            elif day < hire_date:
+                stats['before_hire'] += 1
+            else:
+                yield employee_id, day
+
+    def collapse(self, punches) -> Iterator[tuple]:
+        """Yields each (employee id, date) once, however many punches it has."""
+        seen = set()
+        stats = self.stats
+        for key in punches:
+            if key in seen:
+                stats['duplicate'] += 1
+                continue
+            seen.add(key)
+            stats['punches'] += 1
+            yield key
+
+    def save(self, statuses: dict) -> None:
+        self.stats.update(AttendanceService.upsert(statuses).values())
+
+    def _classify(self, day_text: str):
+        try:
+            if self.date_format is None:
+                day = date.fromisoformat(day_text)
+            else:
+                day = datetime.strptime(day_text, self.date_format).date()
+        except ValueError:
+            return 'malformed'
+        if day > self.today:
+            return 'future'
+        if not self.calendar.is_working_day(day):
+            return 'non_working'
+        return day
+
+    def summary(self) -> str:
+        stats = self.stats
+        return (
+            f"{stats['lines']} line(s): {stats['created']} created, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged; {stats['duplicate']} repeated punch(es) merged; skipped "
+            f"{stats['unknown_badge']} unknown badge(s), {stats['non_working']} weekend/holiday, "
+            f"{stats['future']} future, {stats['before_hire']} before hire and {stats['malformed']} malformed."
+        )
@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Attendance, Department, Employee, Holiday
+from .services import (
+    AttendanceChangeLogService, AttendanceMonthService, DepartmentCounterService, EmployeeRoster, EmployeeService,
+    HolidayCalendar, ReportService,
+)
+from .signals import attendance_changed
+
+
+@receiver(attendance_changed)
+def refresh_attendance_months(sender, changes, **kwargs):
+    AttendanceMonthService.apply_changes(changes)
+
+
+@receiver(attendance_changed)
+def record_attendance_changes(sender, changes, **kwargs):
+    AttendanceChangeLogService.record(changes)
+
+
+@receiver(attendance_changed)
+def count_department_presence(sender, changes, **kwargs):
+    DepartmentCounterService.record_attendance(changes)
+
+
+@receiver(pre_save, sender=Employee)
+def remember_previous_department(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None
+    if instance.pk:
+        previous = Employee.objects.filter(pk=instance.pk).values_list('department_id', flat=True).first()
+    instance._previous_department_id = previous
+
+
+@receiver(post_save, sender=Employee)
+def count_department_headcount(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        DepartmentCounterService.apply(headcount={instance.department_id: 1})
+        return
+    previous = getattr(instance, '_previous_department_id', None)
+    if previous != instance.department_id:
+        # Today's attendance, if any, moves to the new department with them.
+        today = timezone.now().date()
+        status = Attendance.objects.filter(employee=instance, date=today).values_list('status', flat=True).first()
+        DepartmentCounterService.move(
+            [(previous, 1, int(status == 'present'), int(status == 'absent'))], instance.department_id, today,
+        )
+
+
+@receiver(post_delete, sender=Employee)
+def uncount_department_headcount(sender, instance, **kwargs):
+    # bulk_delete() has already announced the attendance it removed, so only
+    # the headcount is left to adjust, and it adjusts that itself per chunk.
+    if EmployeeService.is_bulk_deleting():
+        return
+    DepartmentCounterService.apply(headcount={instance.department_id: -1})
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_holiday_calendar(sender, **kwargs):
+    HolidayCalendar.invalidate()
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_employee_roster(sender, **kwargs):
+    EmployeeRoster.invalidate()
+
+
+@receiver(attendance_changed)
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def bump_report_version(sender, **kwargs):
+    # After commit, so a report computed mid-transaction can't be cached under
+    # the new version with the old data.
+    transaction.on_commit(ReportService.bump_data_version)
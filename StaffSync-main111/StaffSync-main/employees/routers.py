@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.core import mail
+from django.db import connections
+
+REPLICA = 'replica'
+PRIMARY_COOKIE = 'read_primary'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def _database_address(alias):
+    settings_dict = connections[alias].settings_dict
+    return tuple(str(settings_dict.get(key) or '') for key in ('HOST', 'PORT', 'NAME'))
+
+
+def _is_test_mirror(alias) -> bool:
+    # The test runner points a mirror at the primary's test database by name
+    # only, keeping its own host; mail.outbox exists only under the runner.
+    return bool(connections[alias].settings_dict.get('TEST', {}).get('MIRROR')) and hasattr(mail, 'outbox')
+
+
+def replica_configured() -> bool:
+    # A replica usually has the primary's database name on another host, so
+    # the whole address is compared. Under the test runner the replica mirrors
+    # the primary's test database; a second connection to it would not see
+    # the uncommitted test data, so it is treated as not configured.
+    if REPLICA not in connections.settings or _is_test_mirror(REPLICA):
+        return False
+    return _database_address(REPLICA) != _database_address('default')
+
+
+def reading_from_replica() -> bool:
+    return _replica_reads.get() and replica_configured()
+
+
+@contextmanager
+def use_replica():
+    """Send the reads made inside the block to the replica, when one is configured."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_reads(view):
+    # For views that only read. Clients that wrote recently carry the
+    # PRIMARY_COOKIE set by PrimaryStickinessMiddleware and keep reading from
+    # the primary, so they see their own changes despite replication lag.
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or PRIMARY_COOKIE in request.COOKIES:
+            return view(request, *args, **kwargs)
+        with use_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    # Reads of this app's models go to the replica only inside use_replica().
+    # Everything else, including every write and the auth and session tables
+    # a login has just written, stays on the primary.
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'employees' and reading_from_replica():
+            return REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema with the data it replicates.
+        return db != REPLICA
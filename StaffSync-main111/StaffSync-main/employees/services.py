@@ -1,6 +1,72 @@
+import hashlib
+import secrets
+from collections import Counter, namedtuple
+from contextvars import ContextVar
 from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
-from typing import Tuple, Optional
+from typing import Iterator, Tuple, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, router, transaction
+from django.db.models import (
+    Q, Case, Count, Exists, F, FilteredRelation, IntegerField, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.constants import OnConflict
+from django.db.models.functions import Coalesce, Upper
+from django.utils import timezone
+from .models import (
+    Attendance, AttendanceArchive, AttendanceChangeLog, AttendanceMonth, Department, Employee, Holiday,
+    IngestBatch, IngestToken,
+)
+from .routers import reading_from_replica
+from .signals import AttendanceChange, send_attendance_changed
+
+
+AttendanceCell = namedtuple('AttendanceCell', ['employee_id', 'date', 'status'])
+
+# Set while EmployeeService.bulk_delete() deletes employees; it adjusts the
+# department headcounts once per chunk instead of the per-employee receiver.
+_bulk_deleting_employees = ContextVar('bulk_deleting_employees', default=False)
+
+
+def insert_rows(model, field_names, rows, batch_size: int = 1000, ignore_conflicts: bool = False,
+                returning=None) -> Optional[list]:
+    # bulk_create() builds and prepares a model instance per row, which is
+    # most of the cost at high volumes; plain executemany() batches of rows
+    # the caller already adapted insert the same rows several times faster.
+    # With ``returning`` (field names; needs
+    # connection.features.can_return_rows_from_bulk_insert) each batch is one
+    # multi-row INSERT and the returned columns of the rows it actually
+    # inserted are collected: rows skipped as conflicts return nothing.
+    ops = connection.ops
+    fields = [model._meta.get_field(name) for name in field_names]
+    on_conflict = OnConflict.IGNORE if ignore_conflicts else None
+    row_sql = '(%s)' % ', '.join(['%s'] * len(fields))
+    head = '%s %s (%s) VALUES ' % (
+        ops.insert_statement(on_conflict=on_conflict),
+        ops.quote_name(model._meta.db_table),
+        ', '.join(ops.quote_name(field.column) for field in fields),
+    )
+    suffix = ops.on_conflict_suffix_sql(fields, on_conflict, None, None)
+    with connection.cursor() as cursor:
+        if returning is None:
+            for i in range(0, len(rows), batch_size):
+                cursor.executemany(head + row_sql + suffix, rows[i:i + batch_size])
+            return None
+
+        returned = []
+        returning_sql = ' RETURNING %s' % ', '.join(
+            ops.quote_name(model._meta.get_field(name).column) for name in returning
+        )
+        batch_size = max(min(batch_size, ops.bulk_batch_size(fields, rows)), 1)
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            cursor.execute(
+                head + ', '.join([row_sql] * len(batch)) + suffix + returning_sql,
+                [value for row in batch for value in row],
+            )
+            returned.extend(cursor.fetchall())
+        return returned
 
 
 class DateRangeService:
@@ -80,6 +146,16 @@ class DateRangeService:
         last_day = next_month - timedelta(days=1)
         return first_day, last_day
     
+    @staticmethod
+    def split_range_by_month(start_date: date, end_date: date) -> list:
+        chunks = []
+        current = start_date
+        while current <= end_date:
+            _, month_end = DateRangeService.get_month_range(current.month, current.year)
+            chunks.append((current, min(month_end, end_date)))
+            current = month_end + timedelta(days=1)
+        return chunks
+    
     @staticmethod
     def generate_calendar_months(center_month: int, center_year: int, months_count: int = 6) -> list:
         months = []
@@ -90,3 +166,1243 @@ class DateRangeService:
             months.append((new_date.month, new_date.year))
         
         return months
+
+
+class HolidayCalendar:
+    # In-memory view of the Holiday table, loaded with one query, for code
+    # that has to classify many dates at once.
+
+    def __init__(self, holidays=()):
+        self._fixed = {}
+        self._recurring = {}
+        for holiday_date, name, is_recurring in holidays:
+            self._fixed[holiday_date] = name
+            if is_recurring:
+                self._recurring[(holiday_date.month, holiday_date.day)] = name
+
+    CACHE_KEY = 'holiday_calendar'
+    CACHE_SECONDS = 300
+
+    @classmethod
+    def load(cls) -> 'HolidayCalendar':
+        return cls(Holiday.objects.values_list('date', 'name', 'is_recurring'))
+
+    @classmethod
+    def cached(cls) -> 'HolidayCalendar':
+        # Holidays change a few times a year; saves and deletes invalidate the
+        # entry, the timeout bounds staleness in other processes.
+        holidays = cache.get(cls.CACHE_KEY)
+        if holidays is None:
+            # Filled from the primary: a lagging replica would be cached for
+            # the full timeout after the invalidation.
+            holidays = list(Holiday.objects.using(router.db_for_write(Holiday)).values_list(
+                'date', 'name', 'is_recurring',
+            ))
+            cache.set(cls.CACHE_KEY, holidays, cls.CACHE_SECONDS)
+        return cls(holidays)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cache.delete(cls.CACHE_KEY)
+
+    def get_holiday_name(self, date_obj: date) -> Optional[str]:
+        return self._fixed.get(date_obj) or self._recurring.get((date_obj.month, date_obj.day))
+
+    def is_holiday(self, date_obj: date) -> bool:
+        return self.get_holiday_name(date_obj) is not None
+
+    def is_working_day(self, date_obj: date) -> bool:
+        return date_obj.weekday() < 5 and not self.is_holiday(date_obj)
+
+    def working_days(self, start_date: date, end_date: date) -> list:
+        days = []
+        current = start_date
+        while current <= end_date:
+            if self.is_working_day(current):
+                days.append(current)
+            current += timedelta(days=1)
+        return days
+
+
+class EmployeeRoster:
+    # In-memory view of who can be marked: employee ids, emails and hire dates,
+    # for validating a batch of events without a query per event.
+
+    CACHE_KEY = 'employee_roster'
+    CACHE_SECONDS = 300
+
+    def __init__(self, employees=()):
+        self._hire_dates = {}
+        self._ids_by_email = {}
+        for employee_id, email, hire_date in employees:
+            self._hire_dates[employee_id] = hire_date
+            self._ids_by_email[email.lower()] = employee_id
+
+    @classmethod
+    def load(cls) -> 'EmployeeRoster':
+        return cls(Employee.objects.values_list('id', 'email', 'hire_date'))
+
+    @classmethod
+    def cached(cls) -> 'EmployeeRoster':
+        # Employee saves and deletes invalidate the entry; the timeout bounds
+        # staleness in other processes. Filled from the primary, like
+        # HolidayCalendar.cached().
+        employees = cache.get(cls.CACHE_KEY)
+        if employees is None:
+            employees = list(Employee.objects.using(router.db_for_write(Employee)).values_list(
+                'id', 'email', 'hire_date',
+            ))
+            cache.set(cls.CACHE_KEY, employees, cls.CACHE_SECONDS)
+        return cls(employees)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cache.delete(cls.CACHE_KEY)
+
+    def add(self, employees) -> None:
+        for employee_id, email, hire_date in employees:
+            self._hire_dates[employee_id] = hire_date
+            self._ids_by_email[email.lower()] = employee_id
+
+    def resolve(self, identifier) -> Optional[int]:
+        # Employees are identified by primary key or by email address.
+        if isinstance(identifier, int) and not isinstance(identifier, bool):
+            return identifier if identifier in self._hire_dates else None
+        if isinstance(identifier, str):
+            identifier = identifier.strip()
+            if identifier.isdigit():
+                return self.resolve(int(identifier))
+            return self._ids_by_email.get(identifier.lower())
+        return None
+
+    def get_hire_date(self, employee_id: int) -> Optional[date]:
+        return self._hire_dates.get(employee_id)
+
+
+class EmployeeService:
+
+    @staticmethod
+    def _prefix_filter(field: str, term: str) -> Q:
+        # A range on UPPER(field) instead of ILIKE so the expression indexes on
+        # Employee are usable for the prefix search on every backend.
+        prefix = term.upper()
+        upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return Q(**{f'{field}_upper__gte': prefix, f'{field}_upper__lt': upper_bound})
+
+    @staticmethod
+    def search(term: str, limit: int = 20):
+        tokens = term.split()
+        if not tokens:
+            return Employee.objects.none()
+
+        employees = Employee.objects.annotate(
+            first_name_upper=Upper('first_name'),
+            last_name_upper=Upper('last_name'),
+        )
+        if len(tokens) == 1:
+            condition = (
+                EmployeeService._prefix_filter('first_name', tokens[0]) |
+                EmployeeService._prefix_filter('last_name', tokens[0])
+            )
+        else:
+            condition = (
+                EmployeeService._prefix_filter('first_name', tokens[0]) &
+                EmployeeService._prefix_filter('last_name', ' '.join(tokens[1:]))
+            )
+        return employees.filter(condition).select_related('department').order_by('first_name', 'last_name')[:limit]
+
+    @staticmethod
+    def bulk_delete(employee_ids, batch_size: int = 5000, employee_batch_size: int = 500) -> Iterator[dict]:
+        # Deleting an employee through the collector would gather every related
+        # attendance row first. The dependent rows are removed in bounded
+        # batches instead (these models have no delete receivers, so each batch
+        # is one DELETE), then the now childless employees, with one headcount
+        # UPDATE per chunk. Attendance deletes are still announced batch by
+        # batch. Yields running totals.
+        employee_ids = sorted(set(employee_ids))
+        progress = {'employees': 0, 'records': 0}
+        for start in range(0, len(employee_ids), employee_batch_size):
+            chunk = employee_ids[start:start + employee_batch_size]
+            for model in (Attendance, AttendanceArchive, AttendanceMonth):
+                rows = model.objects.filter(employee_id__in=chunk).order_by('pk')
+                if model is Attendance:
+                    rows = rows.values_list('pk', 'employee_id', 'date', 'status')
+                else:
+                    rows = rows.values_list('pk')
+                while True:
+                    with transaction.atomic():
+                        batch = list(rows[:batch_size])
+                        if not batch:
+                            break
+                        deleted, _ = model.objects.filter(pk__in=[row[0] for row in batch]).delete()
+                        if model is Attendance:
+                            send_attendance_changed([
+                                AttendanceChange(employee_id, date_obj, status, None)
+                                for _, employee_id, date_obj, status in batch
+                            ])
+                    progress['records'] += deleted
+                    yield dict(progress)
+            with transaction.atomic():
+                employees = Employee.objects.filter(pk__in=chunk)
+                headcount = {
+                    department_id: -count
+                    for department_id, count in employees.values_list('department_id').annotate(
+                        count=Count('pk'),
+                    ).order_by()
+                }
+                token = _bulk_deleting_employees.set(True)
+                try:
+                    _, per_model = employees.delete()
+                finally:
+                    _bulk_deleting_employees.reset(token)
+                DepartmentCounterService.apply(headcount=headcount)
+            progress['employees'] += per_model.get(Employee._meta.label, 0)
+            yield dict(progress)
+
+    @staticmethod
+    def is_bulk_deleting() -> bool:
+        return _bulk_deleting_employees.get()
+
+    @staticmethod
+    def reassign_department(employee_ids, department_id: Optional[int]) -> int:
+        today = timezone.now().date()
+        with transaction.atomic():
+            employees = Employee.objects.filter(pk__in=employee_ids)
+            moving = DepartmentCounterService.get_totals(employees.exclude(department_id=department_id), today)
+            updated = employees.update(department_id=department_id)
+            # update() skips post_save, so the report and counter receivers
+            # never see it.
+            DepartmentCounterService.move(moving, department_id, today)
+            transaction.on_commit(ReportService.bump_data_version)
+        return updated
+
+
+class DepartmentService:
+
+    @staticmethod
+    def merge(source_ids, target_id: int) -> dict:
+        source_ids = set(source_ids) - {target_id}
+        today = timezone.now().date()
+        with transaction.atomic():
+            # The sources' own counters are what moves, so nothing is recounted.
+            moving = Department.objects.filter(pk__in=source_ids).aggregate(
+                headcount=Sum('headcount'),
+                present=Sum('present_today', filter=Q(counters_date=today)),
+                absent=Sum('absent_today', filter=Q(counters_date=today)),
+            )
+            moved = Employee.objects.filter(department_id__in=source_ids).update(department_id=target_id)
+            deleted, _ = Department.objects.filter(pk__in=source_ids).delete()
+            DepartmentCounterService.apply(
+                headcount={target_id: moving['headcount'] or 0},
+                present={target_id: moving['present'] or 0},
+                absent={target_id: moving['absent'] or 0},
+                today=today,
+            )
+            transaction.on_commit(ReportService.bump_data_version)
+        return {'employees': moved, 'departments': deleted}
+
+
+class DepartmentCounterService:
+    # Department.headcount and today's present/absent counts are adjusted with
+    # F() deltas inside the transaction of every employee and attendance write,
+    # so department widgets read one table. The presence pair belongs to
+    # counters_date: on a later day it reads as zero, and the first delta of
+    # the new day resets it before adding.
+
+    @staticmethod
+    def _per_department(deltas: dict):
+        return Case(
+            *[When(pk=department_id, then=Value(delta)) for department_id, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+
+    @staticmethod
+    def apply(headcount=None, present=None, absent=None, today: Optional[date] = None) -> int:
+        """Add ``{department_id: delta}`` mappings to the counters in one UPDATE."""
+        headcount, present, absent = (
+            {department_id: delta for department_id, delta in (deltas or {}).items() if department_id and delta}
+            for deltas in (headcount, present, absent)
+        )
+        department_ids = set(headcount) | set(present) | set(absent)
+        if not department_ids:
+            return 0
+        updates = {}
+        if headcount:
+            updates['headcount'] = F('headcount') + DepartmentCounterService._per_department(headcount)
+        if present or absent:
+            today = today or timezone.now().date()
+            for field, deltas in (('present_today', present), ('absent_today', absent)):
+                updates[field] = Case(
+                    When(counters_date=today, then=F(field)), default=Value(0),
+                ) + DepartmentCounterService._per_department(deltas)
+            # Last, so backends that assign left to right still compare the
+            # old counters_date above.
+            updates['counters_date'] = today
+        return Department.objects.filter(pk__in=department_ids).update(**updates)
+
+    @staticmethod
+    def get_totals(employees, today: date) -> list:
+        """(department_id, employees, present today, absent today) of a queryset, per department."""
+        return list(employees.annotate(
+            today_attendance=FilteredRelation('attendances', condition=Q(attendances__date=today)),
+        ).values_list('department_id').annotate(
+            count=Count('pk'),
+            present=Count('today_attendance', filter=Q(today_attendance__status='present')),
+            absent=Count('today_attendance', filter=Q(today_attendance__status='absent')),
+        ).order_by())
+
+    @staticmethod
+    def move(totals, department_id: Optional[int], today: date) -> None:
+        # Takes get_totals() rows, read before the employees were moved.
+        headcount, present, absent = Counter(), Counter(), Counter()
+        for previous_id, count, present_count, absent_count in totals:
+            for deltas, delta in ((headcount, count), (present, present_count), (absent, absent_count)):
+                deltas[previous_id] -= delta
+                deltas[department_id] += delta
+        DepartmentCounterService.apply(headcount, present, absent, today)
+
+    @staticmethod
+    def record_attendance(changes, today: Optional[date] = None) -> None:
+        today = today or timezone.now().date()
+        per_employee = {}
+        for change in changes:
+            if change.date != today:
+                continue
+            present, absent = per_employee.get(change.employee_id, (0, 0))
+            per_employee[change.employee_id] = (
+                present + (change.status == 'present') - (change.previous == 'present'),
+                absent + (change.status == 'absent') - (change.previous == 'absent'),
+            )
+        per_employee = {employee_id: deltas for employee_id, deltas in per_employee.items() if any(deltas)}
+        if not per_employee:
+            return
+        present, absent = Counter(), Counter()
+        departments = Employee.objects.using(router.db_for_write(Employee)).filter(
+            pk__in=per_employee, department__isnull=False,
+        ).values_list('pk', 'department_id')
+        for employee_id, department_id in departments:
+            present[department_id] += per_employee[employee_id][0]
+            absent[department_id] += per_employee[employee_id][1]
+        DepartmentCounterService.apply(present=present, absent=absent, today=today)
+
+    @staticmethod
+    def _actual_counts(today: date) -> dict:
+        # Per-department counts from the source tables, as correlated subqueries.
+        def count_per_department(queryset, department_field):
+            counts = queryset.filter(**{department_field: OuterRef('pk')}).order_by().values(
+                department_field,
+            ).annotate(count=Count('pk')).values('count')
+            return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+        attendance = Attendance.objects.filter(date=today)
+        return {
+            'headcount': count_per_department(Employee.objects.all(), 'department'),
+            'present_today': count_per_department(attendance.filter(status='present'), 'employee__department'),
+            'absent_today': count_per_department(attendance.filter(status='absent'), 'employee__department'),
+        }
+
+    @staticmethod
+    def find_drift(today: Optional[date] = None) -> list:
+        today = today or timezone.now().date()
+        departments = Department.objects.annotate(**{
+            f'actual_{field}': expression
+            for field, expression in DepartmentCounterService._actual_counts(today).items()
+        }).order_by('pk')
+        drift = []
+        for department in departments:
+            current = department.counters_date == today
+            stored = (
+                department.headcount,
+                department.present_today if current else 0,
+                department.absent_today if current else 0,
+            )
+            actual = (department.actual_headcount, department.actual_present_today, department.actual_absent_today)
+            if stored != actual:
+                drift.append({'department': department, 'stored': stored, 'actual': actual})
+        return drift
+
+    @staticmethod
+    def recount(department_ids=None, today: Optional[date] = None) -> int:
+        # One UPDATE from subqueries rather than writing back values read
+        # earlier, so deltas committed in between are not overwritten.
+        today = today or timezone.now().date()
+        departments = Department.objects.all()
+        if department_ids is not None:
+            departments = departments.filter(pk__in=department_ids)
+        return departments.update(**DepartmentCounterService._actual_counts(today), counters_date=today)
+
+
+class AttendanceService:
+
+    @staticmethod
+    def get_holiday(date_obj: date) -> Optional[Holiday]:
+        return Holiday.objects.on(date_obj).first()
+
+    @staticmethod
+    def get_lock_reason(date_obj: date, calendar: Optional[HolidayCalendar] = None) -> Optional[str]:
+        if date_obj > timezone.now().date():
+            return 'Attendance cannot be marked for future dates.'
+
+        if date_obj.weekday() >= 5:
+            day_name = date_obj.strftime('%A')
+            return f'Attendance cannot be marked on {day_name}s (weekends). Please select a working day.'
+
+        holiday_name = (calendar or HolidayCalendar.cached()).get_holiday_name(date_obj)
+        if holiday_name:
+            return f'Attendance cannot be marked on {holiday_name}. Please select a working day.'
+
+        return None
+
+    @staticmethod
+    def set_status(employee_id: int, date_obj: date, status: Optional[str]) -> Optional[str]:
+        key = (employee_id, date_obj)
+        with transaction.atomic():
+            if status:
+                previous = AttendanceService._write({key: status})[key]
+            else:
+                previous = AttendanceService._lock_statuses([key]).get(key)
+                if previous:
+                    Attendance.objects.filter(employee_id=employee_id, date=date_obj).delete()
+            send_attendance_changed([AttendanceChange(employee_id, date_obj, previous, status)])
+        return previous
+
+    @staticmethod
+    def bulk_upsert(statuses: dict, batch_size: int = 1000) -> dict:
+        # statuses maps (employee_id, date) to the status to store.
+        summary = {'created': 0, 'updated': 0, 'unchanged': 0}
+        for outcome in AttendanceService.upsert(statuses, batch_size).values():
+            summary[outcome] += 1
+        return summary
+
+    @staticmethod
+    def upsert(statuses: dict, batch_size: int = 1000) -> dict:
+        # Like bulk_upsert(), but reports 'created', 'updated' or 'unchanged'
+        # for every (employee_id, date) key.
+        outcomes = {}
+        if not statuses:
+            return outcomes
+
+        changes = []
+        with transaction.atomic():
+            for key, previous in AttendanceService._write(statuses, batch_size).items():
+                status = statuses[key]
+                if previous is None:
+                    outcomes[key] = 'created'
+                elif previous != status:
+                    outcomes[key] = 'updated'
+                else:
+                    outcomes[key] = 'unchanged'
+                    continue
+                changes.append(AttendanceChange(key[0], key[1], previous, status))
+            send_attendance_changed(changes)
+        return outcomes
+
+    @staticmethod
+    def _write(statuses: dict, batch_size: int = 1000) -> dict:
+        # Stores the statuses and returns each key's previous status, None
+        # where the record was created. Run inside a transaction: the previous
+        # statuses are read under row locks and new records are inserted with
+        # conflicts skipped, so a concurrent writer cannot slip a change in
+        # between that the announced changes would miss.
+        previous = AttendanceService._lock_statuses(statuses)
+        missing = [key for key in statuses if key not in previous]
+        created = AttendanceService._insert_ignoring_conflicts(
+            [AttendanceChange(key[0], key[1], None, statuses[key]) for key in missing], batch_size,
+        )
+        if len(created) < len(missing):
+            # Inserted by another writer after the read. Its transaction has
+            # committed for the conflict to be seen, so they can be locked now.
+            previous.update(AttendanceService._lock_statuses([key for key in missing if key not in created]))
+
+        changed = [key for key in statuses if key not in created and previous.get(key) != statuses[key]]
+        Attendance.objects.bulk_create(
+            [Attendance(employee_id=key[0], date=key[1], status=statuses[key]) for key in changed],
+            update_conflicts=True,
+            unique_fields=['employee', 'date'],
+            update_fields=['status'],
+            batch_size=batch_size,
+        )
+        return {key: None if key in created else previous.get(key) for key in statuses}
+
+    @staticmethod
+    def _lock_statuses(keys) -> dict:
+        # The statuses of the records at ``keys``, locked until the end of the
+        # transaction (SQLite has no row locks; its writes are serialized).
+        employee_ids = {employee_id for employee_id, _ in keys}
+        dates = [date_obj for _, date_obj in keys]
+        rows = Attendance.objects.select_for_update().filter(
+            employee_id__in=employee_ids,
+            date__range=(min(dates), max(dates)),
+        ).order_by('pk').values_list('employee_id', 'date', 'status')
+        return {(employee_id, date_obj): status for employee_id, date_obj, status in rows}
+
+    @staticmethod
+    def bulk_mark(employee_ids, start_date: date, end_date: date, status: str,
+                  calendar: Optional[HolidayCalendar] = None) -> dict:
+        # Only working days on or after each employee's hire date are marked,
+        # and days already in the archive are left alone: a hot record would
+        # shadow the archived one. Everything else counts as skipped.
+        calendar = calendar or HolidayCalendar.load()
+        employee_ids = list(employee_ids)
+        last_day = min(end_date, timezone.now().date())
+        working_days = calendar.working_days(start_date, last_day)
+        hire_dates = dict(
+            Employee.objects.filter(pk__in=employee_ids, hire_date__lte=last_day).values_list('pk', 'hire_date')
+        )
+        archived = set()
+        if working_days and AttendanceArchiveService.reaches_archive(start_date):
+            archived = set(AttendanceArchive.objects.filter(
+                employee_id__in=hire_dates, date__range=(start_date, last_day),
+            ).values_list('employee_id', 'date'))
+
+        statuses = {
+            (employee_id, day): status
+            for employee_id, hire_date in hire_dates.items()
+            for day in working_days
+            if day >= hire_date and (employee_id, day) not in archived
+        }
+        summary = AttendanceService.bulk_upsert(statuses)
+        total_days = (end_date - start_date).days + 1
+        summary['skipped'] = len(employee_ids) * total_days - len(statuses)
+        return summary
+
+    @staticmethod
+    def autofill_absent(start_date: date, end_date: date, calendar: Optional[HolidayCalendar] = None,
+                        batch_size: int = 5000) -> Iterator[dict]:
+        # Marks every employee without a record on a working day (on or after
+        # their hire date) as absent. Works one month at a time: the marked
+        # (employee, date) pairs of the month are read once and the missing
+        # ones are the set difference against the roster, so no per-employee
+        # queries are made. Yields {date: inserted_count} for each month.
+        calendar = calendar or HolidayCalendar.load()
+        last_day = min(end_date, timezone.now().date())
+        roster = list(Employee.objects.filter(hire_date__lte=last_day).values_list('id', 'hire_date'))
+
+        for chunk_start, chunk_end in DateRangeService.split_range_by_month(start_date, last_day):
+            working_days = calendar.working_days(chunk_start, chunk_end)
+            if not working_days:
+                continue
+
+            marked = set(Attendance.objects.filter(
+                date__range=(chunk_start, chunk_end),
+            ).values_list('employee_id', 'date'))
+            if AttendanceArchiveService.reaches_archive(chunk_start):
+                # Archived days count as marked too, otherwise the new hot rows
+                # would shadow them in the combined read.
+                marked.update(AttendanceArchive.objects.filter(
+                    date__range=(chunk_start, chunk_end),
+                ).values_list('employee_id', 'date'))
+
+            changes = []
+            counts = {}
+            for day in working_days:
+                missing = [
+                    employee_id for employee_id, hire_date in roster
+                    if hire_date <= day and (employee_id, day) not in marked
+                ]
+                counts[day] = len(missing)
+                changes.extend(AttendanceChange(employee_id, day, None, 'absent') for employee_id in missing)
+
+            with transaction.atomic():
+                # Rows another writer marked since the read are skipped by the
+                # insert; only the records actually inserted are announced.
+                inserted = AttendanceService._insert_ignoring_conflicts(changes, batch_size)
+                changes = [change for change in changes if (change.employee_id, change.date) in inserted]
+                send_attendance_changed(changes)
+            counts = dict.fromkeys(counts, 0)
+            for change in changes:
+                counts[change.date] += 1
+            yield counts
+
+    @staticmethod
+    def _insert_ignoring_conflicts(changes, batch_size: int) -> set:
+        # Returns the (employee_id, date) keys actually inserted.
+        if not changes:
+            return set()
+        ops = connection.ops
+        created_at = ops.adapt_datetimefield_value(timezone.now())
+        rows = [
+            (change.employee_id, ops.adapt_datefield_value(change.date), change.status, created_at)
+            for change in changes
+        ]
+        if connection.features.can_return_rows_from_bulk_insert:
+            returned = insert_rows(
+                Attendance, ['employee', 'date', 'status', 'created_at'], rows,
+                batch_size=batch_size, ignore_conflicts=True, returning=['employee', 'date'],
+            )
+            # Raw cursors return dates as text on some backends.
+            return {
+                (employee_id, day if isinstance(day, date) else date.fromisoformat(day))
+                for employee_id, day in returned
+            }
+
+        # Without RETURNING, whatever already exists inside this transaction
+        # is what the insert skips.
+        existing = set(Attendance.objects.filter(
+            employee_id__in={change.employee_id for change in changes},
+            date__range=(min(change.date for change in changes), max(change.date for change in changes)),
+        ).values_list('employee_id', 'date'))
+        insert_rows(Attendance, ['employee', 'date', 'status', 'created_at'], rows,
+                    batch_size=batch_size, ignore_conflicts=True)
+        return {
+            (change.employee_id, change.date) for change in changes
+            if (change.employee_id, change.date) not in existing
+        }
+
+    @staticmethod
+    def daily_counts(date_obj: date) -> dict:
+        return Attendance.objects.filter(date=date_obj).aggregate(
+            total=Count('id'),
+            present=Count('id', filter=Q(status='present')),
+            absent=Count('id', filter=Q(status='absent')),
+        )
+
+
+class DashboardService:
+
+    @staticmethod
+    def get_department_stats(today: date) -> list:
+        # Maintained counters (see DepartmentCounterService); presence recorded
+        # on an earlier day means nobody has been marked yet today.
+        departments = Department.objects.order_by('pk').values_list(
+            'id', 'name', 'headcount', 'present_today', 'absent_today', 'counters_date',
+        )
+        return [
+            {
+                'id': department_id,
+                'name': name,
+                'employee_count': headcount,
+                'today_present': present if counters_date == today else 0,
+                'today_absent': absent if counters_date == today else 0,
+            }
+            for department_id, name, headcount, present, absent, counters_date in departments
+        ]
+
+    @staticmethod
+    def get_daily_counts(start_date: date, end_date: date) -> dict:
+        def count_by_date(records):
+            return records.values('date').annotate(
+                total=Count('id'),
+                present=Count('id', filter=Q(status='present')),
+                absent=Count('id', filter=Q(status='absent')),
+            ).order_by()
+
+        rows = count_by_date(Attendance.objects.filter(date__range=(start_date, end_date)))
+        if AttendanceArchiveService.reaches_archive(start_date):
+            rows = rows.union(count_by_date(AttendanceArchiveService.get_archived(start_date, end_date)), all=True)
+        counts = {}
+        for row in rows:
+            # A date before the boundary can have rows in both tables.
+            day = counts.setdefault(row['date'], {'date': row['date'], 'total': 0, 'present': 0, 'absent': 0})
+            for key in ('total', 'present', 'absent'):
+                day[key] += row[key]
+        return counts
+
+    @staticmethod
+    def get_today_snapshot(today: date) -> dict:
+        counts = AttendanceService.daily_counts(today)
+        return {
+            'date': today.isoformat(),
+            'total_employees': Employee.objects.count(),
+            'today_total': counts['total'],
+            'today_present': counts['present'],
+            'today_absent': counts['absent'],
+            'departments': DashboardService.get_department_stats(today),
+        }
+
+
+class ReportService:
+    PRESETS = [
+        ('last7days', 'Last 7 days'),
+        ('last30days', 'Last 30 days'),
+        ('last90days', 'Last 90 days'),
+        ('thisweek', 'This week'),
+        ('lastweek', 'Last week'),
+        ('thismonth', 'This month'),
+        ('lastmonth', 'Last month'),
+        ('thisyear', 'This year'),
+        ('lastyear', 'Last year'),
+    ]
+    DEFAULT_PRESET = 'last30days'
+    VERSION_KEY = 'attendance_report_version'
+    CACHE_SECONDS = 3600
+
+    @staticmethod
+    def get_data_version() -> int:
+        version = cache.get(ReportService.VERSION_KEY)
+        if version is None:
+            version = 1
+            cache.add(ReportService.VERSION_KEY, version, None)
+        return version
+
+    @staticmethod
+    def bump_data_version() -> None:
+        # Cached reports are keyed by version, so bumping it makes every one of
+        # them stale at once without having to know their keys.
+        try:
+            cache.incr(ReportService.VERSION_KEY)
+        except ValueError:
+            cache.set(ReportService.VERSION_KEY, 2, None)
+
+    @staticmethod
+    def _load_pivot_rows(start_date: date, end_date: date) -> list:
+        # One statement: the (department, date) attendance counts UNION the
+        # (department, hire_date) hire counts that headcounts are built from,
+        # plus the archived counts when the range reaches the archive.
+        # Attendance rows carry hired=0, hire rows present=absent=0.
+        def count_by_department(records):
+            return records.values_list(
+                'employee__department_id', 'employee__department__name', 'date',
+            ).annotate(
+                present=Count('id', filter=Q(status='present')),
+                absent=Count('id', filter=Q(status='absent')),
+                hired=Value(0),
+            ).order_by()
+
+        counts = count_by_department(Attendance.objects.filter(date__range=(start_date, end_date)))
+        hires = Employee.objects.filter(hire_date__lte=end_date).values_list(
+            'department_id', 'department__name', 'hire_date',
+        ).annotate(
+            present=Value(0),
+            absent=Value(0),
+            hired=Count('id'),
+        ).order_by()
+        parts = [hires]
+        if AttendanceArchiveService.reaches_archive(start_date):
+            parts.append(count_by_department(AttendanceArchiveService.get_archived(start_date, end_date)))
+        return list(counts.union(*parts, all=True))
+
+    @staticmethod
+    def build_department_pivot(start_date: date, end_date: date, calendar: Optional[HolidayCalendar] = None) -> dict:
+        calendar = calendar or HolidayCalendar.cached()
+        days = []
+        current = start_date
+        while current <= end_date:
+            days.append(current)
+            current += timedelta(days=1)
+
+        departments = {}
+        for department_id, name, day, present, absent, hired in ReportService._load_pivot_rows(start_date, end_date):
+            department = departments.setdefault(department_id, {
+                'id': department_id,
+                'name': name or 'Unassigned',
+                'hired_before': 0,
+                'hires': {},
+                'counts': {},
+            })
+            if hired:
+                if day < start_date:
+                    department['hired_before'] += hired
+                else:
+                    department['hires'][day] = department['hires'].get(day, 0) + hired
+            else:
+                # Hot and archived counts of one day arrive as separate rows.
+                present_before, absent_before = department['counts'].get(day, (0, 0))
+                department['counts'][day] = (present_before + present, absent_before + absent)
+
+        working = {day: calendar.is_working_day(day) for day in days}
+        rows = []
+        for department in sorted(departments.values(), key=lambda item: (item['id'] is None, item['name'])):
+            cells = []
+            totals = {'present': 0, 'absent': 0, 'unmarked': 0}
+            headcount = department['hired_before']
+            for day in days:
+                headcount += department['hires'].get(day, 0)
+                present, absent = department['counts'].get(day, (0, 0))
+                unmarked = max(headcount - present - absent, 0) if working[day] else 0
+                expected = present + absent + unmarked
+                cells.append({
+                    'date': day,
+                    'working': working[day],
+                    'headcount': headcount,
+                    'present': present,
+                    'absent': absent,
+                    'unmarked': unmarked,
+                    'rate': round(present * 100 / expected) if expected else None,
+                })
+                totals['present'] += present
+                totals['absent'] += absent
+                totals['unmarked'] += unmarked
+            rows.append({
+                'id': department['id'],
+                'name': department['name'],
+                'headcount': headcount,
+                'days': cells,
+                **totals,
+            })
+
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'dates': days,
+            'departments': rows,
+        }
+
+    @staticmethod
+    def get_department_pivot(preset: str) -> dict:
+        start_date, end_date = DateRangeService.get_predefined_range(preset)
+        key = f'department_pivot:{preset}:{start_date}:{end_date}:{ReportService.get_data_version()}'
+        pivot = cache.get(key)
+        if pivot is None:
+            pivot = ReportService.build_department_pivot(start_date, end_date)
+            timeout = ReportService.CACHE_SECONDS
+            if reading_from_replica():
+                # The replica may not have caught up with the write that bumped
+                # the version yet, so don't keep its answer for long.
+                timeout = min(timeout, settings.REPLICA_STICKY_SECONDS)
+            cache.set(key, pivot, timeout)
+        return pivot
+
+
+class AttendanceArchiveService:
+    # Only closed years are archived, so the current year always lives in the
+    # hot table and reads that stay inside it never touch the archive.
+
+    @staticmethod
+    def get_archive_boundary() -> date:
+        return date(timezone.now().date().year, 1, 1)
+
+    @staticmethod
+    def reaches_archive(start_date: date) -> bool:
+        return start_date < AttendanceArchiveService.get_archive_boundary()
+
+    @staticmethod
+    def archive_before(year: int, batch_size: int = 5000) -> Iterator[int]:
+        boundary = AttendanceArchiveService.get_archive_boundary()
+        if date(year, 1, 1) > boundary:
+            raise ValueError(f'Only closed years can be archived; the year cannot be later than {boundary.year}.')
+
+        hot = Attendance.objects.filter(date__lt=date(year, 1, 1)).order_by('pk')
+        while True:
+            with transaction.atomic():
+                batch = list(hot.values('pk', 'employee_id', 'date', 'status', 'created_at')[:batch_size])
+                if not batch:
+                    return
+                AttendanceArchive.objects.bulk_create(
+                    [
+                        AttendanceArchive(
+                            employee_id=row['employee_id'],
+                            date=row['date'],
+                            status=row['status'],
+                            created_at=row['created_at'],
+                        )
+                        for row in batch
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['employee', 'date'],
+                    update_fields=['status', 'created_at'],
+                )
+                Attendance.objects.filter(pk__in=[row['pk'] for row in batch]).delete()
+            yield len(batch)
+
+    @staticmethod
+    def get_archived(start_date: date, end_date: date):
+        # Archived records of the range for aggregate queries to combine with
+        # the hot table's. A record written to the hot table after archiving
+        # wins over the archived copy, so shadowed ones are left out.
+        return AttendanceArchive.objects.filter(
+            date__gte=start_date,
+            date__lte=min(end_date, AttendanceArchiveService.get_archive_boundary() - timedelta(days=1)),
+        ).exclude(Exists(Attendance.objects.filter(employee_id=OuterRef('employee_id'), date=OuterRef('date'))))
+
+    @staticmethod
+    def get_cells(start_date: date, end_date: date, employee_ids=None) -> dict:
+        # Hot and archived records merged for grid views that only need the
+        # status of each (employee, date) cell; a record written to the hot
+        # table after archiving wins over the archived copy.
+        cells = {}
+        if AttendanceArchiveService.reaches_archive(start_date):
+            archived = AttendanceArchive.objects.filter(
+                date__gte=start_date,
+                date__lte=min(end_date, AttendanceArchiveService.get_archive_boundary() - timedelta(days=1)),
+            )
+            if employee_ids is not None:
+                archived = archived.filter(employee_id__in=employee_ids)
+            for employee_id, date_obj, status in archived.values_list('employee_id', 'date', 'status'):
+                cells[(employee_id, date_obj)] = AttendanceCell(employee_id, date_obj, status)
+        records = Attendance.objects.filter(date__gte=start_date, date__lte=end_date)
+        if employee_ids is not None:
+            records = records.filter(employee_id__in=employee_ids)
+        records = records.values_list('employee_id', 'date', 'status')
+        for employee_id, date_obj, status in records:
+            cells[(employee_id, date_obj)] = AttendanceCell(employee_id, date_obj, status)
+        return cells
+
+    @staticmethod
+    def get_recent_for_employee(employee, limit: int = 10) -> list:
+        records = list(Attendance.objects.filter(employee=employee).order_by('-date')[:limit])
+        if len(records) < limit:
+            archived = AttendanceArchive.objects.filter(employee=employee)
+            if records:
+                archived = archived.filter(date__lt=records[-1].date)
+            records.extend(archived.order_by('-date')[:limit - len(records)])
+        return records
+
+
+class AttendanceMonthService:
+
+    @staticmethod
+    def build_masks(records) -> dict:
+        masks = {}
+        for employee_id, date_obj, status in records:
+            key = (employee_id, date_obj.year, date_obj.month)
+            marked, present = masks.get(key, (0, 0))
+            bit = 1 << (date_obj.day - 1)
+            masks[key] = (marked | bit, present | bit if status == 'present' else present)
+        return masks
+
+    @staticmethod
+    def _load_records(employee_ids, start_date: Optional[date] = None, end_date: Optional[date] = None) -> list:
+        date_filter = {}
+        if start_date:
+            date_filter['date__gte'] = start_date
+        if end_date:
+            date_filter['date__lte'] = end_date
+
+        statuses = {}
+        if start_date is None or AttendanceArchiveService.reaches_archive(start_date):
+            archived = AttendanceArchive.objects.filter(employee_id__in=employee_ids, **date_filter)
+            for employee_id, date_obj, status in archived.values_list('employee_id', 'date', 'status'):
+                statuses[(employee_id, date_obj)] = status
+        hot = Attendance.objects.filter(employee_id__in=employee_ids, **date_filter)
+        for employee_id, date_obj, status in hot.values_list('employee_id', 'date', 'status'):
+            statuses[(employee_id, date_obj)] = status
+        return [(employee_id, date_obj, status) for (employee_id, date_obj), status in statuses.items()]
+
+    @staticmethod
+    def apply_changes(changes) -> None:
+        # Sets the changed days' bits from their new statuses without reading
+        # the months' records: one upsert merges them into the stored masks,
+        # so concurrent writers to the same month cannot overwrite each other.
+        # A removed record may uncover an archived one for the same day, so
+        # months with removals are rebuilt with refresh() instead.
+        updates = {}
+        removed = set()
+        for change in changes:
+            key = (change.employee_id, change.date.year, change.date.month)
+            if change.status is None:
+                removed.add(key)
+                continue
+            bit = 1 << (change.date.day - 1)
+            touched, present = updates.get(key, (0, 0))
+            updates[key] = (touched | bit, present | bit if change.status == 'present' else present & ~bit)
+
+        rows = [(*key, touched, present) for key, (touched, present) in updates.items() if key not in removed]
+        if rows:
+            quote = connection.ops.quote_name
+            table = quote(AttendanceMonth._meta.db_table)
+            employee, year, month, marked, present = (
+                quote(AttendanceMonth._meta.get_field(name).column)
+                for name in ('employee', 'year', 'month', 'marked_mask', 'present_mask')
+            )
+            # The inserted row's marked_mask holds the touched days: they are
+            # marked now, and their present bits are replaced.
+            sql = (
+                f'INSERT INTO {table} ({employee}, {year}, {month}, {marked}, {present}) '
+                f'VALUES (%s, %s, %s, %s, %s) '
+                f'ON CONFLICT ({employee}, {year}, {month}) DO UPDATE SET '
+                f'{marked} = {table}.{marked} | EXCLUDED.{marked}, '
+                f'{present} = ({table}.{present} & ~EXCLUDED.{marked}) | EXCLUDED.{present}'
+            )
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+        if removed:
+            AttendanceMonthService.refresh(removed)
+
+    @staticmethod
+    def refresh(keys, chunk_size: int = 500) -> None:
+        keys = sorted(set(keys))
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i:i + chunk_size]
+            start_date = min(date(year, month, 1) for _, year, month in chunk)
+            end_date = max(DateRangeService.get_month_range(month, year)[1] for _, year, month in chunk)
+            records = AttendanceMonthService._load_records({key[0] for key in chunk}, start_date, end_date)
+            masks = AttendanceMonthService.build_masks(records)
+            AttendanceMonth.objects.bulk_create(
+                [
+                    AttendanceMonth(
+                        employee_id=employee_id,
+                        year=year,
+                        month=month,
+                        marked_mask=masks.get((employee_id, year, month), (0, 0))[0],
+                        present_mask=masks.get((employee_id, year, month), (0, 0))[1],
+                    )
+                    for employee_id, year, month in chunk
+                ],
+                update_conflicts=True,
+                unique_fields=['employee', 'year', 'month'],
+                update_fields=['marked_mask', 'present_mask'],
+            )
+
+    @staticmethod
+    def rebuild(chunk_size: int = 200) -> Iterator[int]:
+        employee_ids = list(Employee.objects.order_by('pk').values_list('pk', flat=True))
+        for i in range(0, len(employee_ids), chunk_size):
+            chunk = employee_ids[i:i + chunk_size]
+            masks = AttendanceMonthService.build_masks(AttendanceMonthService._load_records(chunk))
+            with transaction.atomic():
+                AttendanceMonth.objects.filter(employee_id__in=chunk).delete()
+                AttendanceMonth.objects.bulk_create(
+                    [
+                        AttendanceMonth(employee_id=employee_id, year=year, month=month,
+                                        marked_mask=marked, present_mask=present)
+                        for (employee_id, year, month), (marked, present) in masks.items()
+                    ],
+                    batch_size=1000,
+                )
+            yield len(chunk)
+
+    @staticmethod
+    def _period_filter(start_date: date, end_date: date) -> Q:
+        after_start = Q(year__gt=start_date.year) | Q(year=start_date.year, month__gte=start_date.month)
+        before_end = Q(year__lt=end_date.year) | Q(year=end_date.year, month__lte=end_date.month)
+        return after_start & before_end
+
+    @staticmethod
+    def _day_range_mask(year: int, month: int, start_date: date, end_date: date) -> int:
+        first_day, last_day = DateRangeService.get_month_range(month, year)
+        first = max(first_day, start_date).day
+        last = min(last_day, end_date).day
+        if first > last:
+            return 0
+        return ((1 << last) - 1) & ~((1 << (first - 1)) - 1)
+
+    @staticmethod
+    def get_months(start_date: date, end_date: date, employee_ids=None):
+        months = AttendanceMonth.objects.filter(AttendanceMonthService._period_filter(start_date, end_date))
+        if employee_ids is not None:
+            months = months.filter(employee_id__in=employee_ids)
+        return months.exclude(marked_mask=0)
+
+    @staticmethod
+    def get_cells(start_date: date, end_date: date, employee_ids=None) -> dict:
+        cells = {}
+        months = AttendanceMonthService.get_months(start_date, end_date, employee_ids)
+        for employee_id, year, month, marked, present in months.values_list(
+            'employee_id', 'year', 'month', 'marked_mask', 'present_mask'
+        ):
+            marked &= AttendanceMonthService._day_range_mask(year, month, start_date, end_date)
+            while marked:
+                bit = marked & -marked
+                day = bit.bit_length()
+                date_obj = date(year, month, day)
+                cells[(employee_id, date_obj)] = AttendanceCell(
+                    employee_id, date_obj, 'present' if present & bit else 'absent'
+                )
+                marked ^= bit
+        return cells
+
+    @staticmethod
+    def get_stats(start_date: date, end_date: date, employee_ids=None) -> dict:
+        stats = {}
+        months = AttendanceMonthService.get_months(start_date, end_date, employee_ids)
+        for employee_id, year, month, marked, present in months.values_list(
+            'employee_id', 'year', 'month', 'marked_mask', 'present_mask'
+        ):
+            day_mask = AttendanceMonthService._day_range_mask(year, month, start_date, end_date)
+            marked_days = (marked & day_mask).bit_count()
+            present_days = (present & day_mask).bit_count()
+            employee_stats = stats.setdefault(employee_id, {'marked': 0, 'present': 0, 'absent': 0})
+            employee_stats['marked'] += marked_days
+            employee_stats['present'] += present_days
+            employee_stats['absent'] += marked_days - present_days
+        return stats
+
+
+class AttendanceChangeLogService:
+    DEFAULT_PAGE_SIZE = 500
+    MAX_PAGE_SIZE = 5000
+    # Held until commit while entries are written, so on PostgreSQL sequence
+    # numbers become visible in order and a reader never skips past an entry
+    # that an earlier transaction is still about to commit.
+    LOCK_ID = 0x5747_4C4F
+
+    @staticmethod
+    def operation_for(change: AttendanceChange) -> str:
+        if change.previous is None:
+            return 'insert'
+        if change.status is None:
+            return 'delete'
+        return 'update'
+
+    @staticmethod
+    def record(changes, batch_size: int = 1000) -> None:
+        ops = connection.ops
+        recorded_at = ops.adapt_datetimefield_value(timezone.now())
+        rows = [
+            (
+                change.employee_id,
+                ops.adapt_datefield_value(change.date),
+                AttendanceChangeLogService.operation_for(change),
+                change.previous,
+                change.status,
+                recorded_at,
+            )
+            for change in changes
+        ]
+        if not rows:
+            return
+        # No savepoint: entries stand or fall with the write they describe.
+        with transaction.atomic(savepoint=False):
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_xact_lock(%s)', [AttendanceChangeLogService.LOCK_ID])
+            insert_rows(
+                AttendanceChangeLog, ['employee_id', 'date', 'operation', 'previous', 'status', 'recorded_at'],
+                rows, batch_size=batch_size,
+            )
+
+    @staticmethod
+    def get_head() -> int:
+        return AttendanceChangeLog.objects.order_by('-seq').values_list('seq', flat=True).first() or 0
+
+    @staticmethod
+    def get_page(since: int, limit: int = DEFAULT_PAGE_SIZE) -> dict:
+        limit = max(1, min(limit, AttendanceChangeLogService.MAX_PAGE_SIZE))
+        # One row past the page tells whether another page follows.
+        rows = list(
+            AttendanceChangeLog.objects.filter(seq__gt=since).order_by('seq').values(
+                'seq', 'employee_id', 'date', 'operation', 'previous', 'status', 'recorded_at',
+            )[:limit + 1]
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            'changes': rows,
+            'next_cursor': rows[-1]['seq'] if rows else since,
+            'has_more': has_more,
+        }
+
+    @staticmethod
+    def is_expired(since: int) -> bool:
+        # After pruning, a cursor older than the oldest kept entry would
+        # silently miss changes; the consumer has to resync instead.
+        oldest = AttendanceChangeLog.objects.order_by('seq').values_list('seq', flat=True).first()
+        return oldest is not None and since < oldest - 1
+
+    @staticmethod
+    def prune_before(cutoff, batch_size: int = 5000) -> Iterator[int]:
+        entries = AttendanceChangeLog.objects.filter(recorded_at__lt=cutoff).order_by('seq')
+        while True:
+            seqs = list(entries.values_list('seq', flat=True)[:batch_size])
+            if not seqs:
+                return
+            deleted, _ = AttendanceChangeLog.objects.filter(seq__in=seqs).delete()
+            yield deleted
+
+
+class IngestService:
+    MAX_EVENTS = 1000
+
+    @staticmethod
+    def digest(value) -> str:
+        if isinstance(value, str):
+            value = value.encode()
+        return hashlib.sha256(value).hexdigest()
+
+    @staticmethod
+    def create_token(name: str) -> Tuple[IngestToken, str]:
+        token = IngestToken(name=name)
+        key = IngestService.set_key(token)
+        token.save()
+        return token, key
+
+    @staticmethod
+    def set_key(token: IngestToken) -> str:
+        key = secrets.token_urlsafe(32)
+        token.key_digest = IngestService.digest(key)
+        return key
+
+    @staticmethod
+    def authenticate(key: str) -> Optional[IngestToken]:
+        token = IngestToken.objects.filter(key_digest=IngestService.digest(key), is_active=True).first()
+        if token is not None:
+            IngestToken.objects.filter(pk=token.pk).update(last_used_at=timezone.now())
+        return token
+
+    @staticmethod
+    def get_replay(token: IngestToken, idempotency_key: str) -> Optional[IngestBatch]:
+        return IngestBatch.objects.filter(token=token, idempotency_key=idempotency_key).first()
+
+    @staticmethod
+    def validate(events: list, roster: EmployeeRoster, calendar: HolidayCalendar) -> Tuple[list, dict]:
+        """Check every event against the roster and holiday snapshots.
+
+        Returns one result per event, ``None`` where the event is accepted,
+        and the accepted events as {(employee_id, date): (index, status)}.
+        When an employee and date appear more than once, the last event wins.
+        """
+        results = [None] * len(events)
+        accepted = {}
+        valid_statuses = dict(Attendance.STATUS_CHOICES)
+        for index, event in enumerate(events):
+            error = None
+            if not isinstance(event, dict):
+                error = 'Event must be an object.'
+            elif (employee_id := roster.resolve(event.get('employee'))) is None:
+                error = 'Unknown employee.'
+            elif not isinstance(event.get('status'), str) or event['status'] not in valid_statuses:
+                error = f"Status must be one of: {', '.join(valid_statuses)}."
+            else:
+                try:
+                    date_obj = date.fromisoformat(str(event.get('date')))
+                except ValueError:
+                    error = 'Date must be YYYY-MM-DD.'
+                else:
+                    error = AttendanceService.get_lock_reason(date_obj, calendar)
+                    if error is None and date_obj < roster.get_hire_date(employee_id):
+                        error = 'Attendance cannot be marked before the hire date.'
+            if error:
+                results[index] = {'index': index, 'result': 'rejected', 'error': error}
+                continue
+
+            key = (employee_id, date_obj)
+            if key in accepted:
+                previous_index = accepted[key][0]
+                results[previous_index] = {'index': previous_index, 'result': 'superseded'}
+            accepted[key] = (index, event['status'])
+        return results, accepted
+
+    @staticmethod
+    def _resolve_missing(events: list, roster: EmployeeRoster) -> None:
+        # Employees added since the snapshot was cached are looked up directly
+        # rather than rejected.
+        identifiers = [
+            str(event.get('employee')).strip() for event in events
+            if isinstance(event, dict) and isinstance(event.get('employee'), (int, str))
+            and roster.resolve(event['employee']) is None
+        ]
+        if identifiers:
+            ids = [int(value) for value in identifiers if value.isdigit()]
+            emails = [value for value in identifiers if not value.isdigit()]
+            roster.add(Employee.objects.filter(
+                Q(pk__in=ids) | Q(email__in=emails)
+            ).values_list('id', 'email', 'hire_date'))
+
+    @staticmethod
+    def ingest(token: IngestToken, idempotency_key: str, payload_digest: str, events: list) -> dict:
+        """Validate and store one batch.
+
+        Raises IntegrityError when another request stored the same
+        idempotency key first; that request's response is the one to replay.
+        """
+        roster = EmployeeRoster.cached()
+        IngestService._resolve_missing(events, roster)
+        results, accepted = IngestService.validate(events, roster, HolidayCalendar.cached())
+        with transaction.atomic():
+            outcomes = AttendanceService.upsert({key: status for key, (_, status) in accepted.items()})
+            for key, (index, _) in accepted.items():
+                results[index] = {'index': index, 'result': outcomes[key]}
+            summary = {'created': 0, 'updated': 0, 'unchanged': 0, 'superseded': 0, 'rejected': 0}
+            for result in results:
+                summary[result['result']] += 1
+            response = {'batch': idempotency_key, 'summary': summary, 'results': results}
+            IngestBatch.objects.create(
+                token=token,
+                idempotency_key=idempotency_key,
+                payload_digest=payload_digest,
+                event_count=len(events),
+                response=response,
+            )
+        return response
@@ -0,0 +1,39 @@
+from collections import namedtuple
+
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Attendance
+
+# One changed (employee, date) cell. ``previous`` and ``status`` are the
+# attendance status before and after the write; ``None`` means no record.
+AttendanceChange = namedtuple('AttendanceChange', ['employee_id', 'date', 'previous', 'status'])
+
+# Sent with ``changes=[AttendanceChange, ...]`` by every attendance write path,
+# including bulk ones that bypass the model save/delete signals.
+attendance_changed = Signal()
+
+
+def send_attendance_changed(changes):
+    changes = [change for change in changes if change.previous != change.status]
+    if changes:
+        attendance_changed.send(sender=Attendance, changes=changes)
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_previous_status(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None
+    if instance.pk:
+        previous = Attendance.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+    instance._previous_status = previous
+
+
+@receiver(post_save, sender=Attendance)
+def announce_saved_attendance(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    send_attendance_changed([
+        AttendanceChange(instance.employee_id, instance.date, getattr(instance, '_previous_status', None), instance.status)
+    ])
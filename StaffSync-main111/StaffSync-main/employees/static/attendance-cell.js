@@ -0,0 +1,65 @@
+// Single-cell Attendance Updates
+
+/**
+ * Reads the CSRF token from the page or the csrftoken cookie
+ * @returns {string} The CSRF token
+ */
+function getCsrfToken() {
+    const input = document.querySelector('input[name="csrfmiddlewaretoken"]');
+    if (input) return input.value;
+
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return match ? decodeURIComponent(match[1]) : '';
+}
+
+/**
+ * Upserts or clears the attendance of one employee on one date
+ * @param {string} url - The attendance cell endpoint
+ * @param {string|number} employeeId - The employee ID
+ * @param {string} date - The date in YYYY-MM-DD format
+ * @param {string} status - 'present', 'absent', or '' to clear the cell
+ * @returns {Promise<Object>} The new cell state and the daily counts
+ */
+async function updateAttendanceCell(url, employeeId, date, status) {
+    const body = new FormData();
+    body.append('employee_id', employeeId);
+    body.append('date', date);
+    body.append('status', status || '');
+
+    const response = await fetch(url, {
+        method: 'POST',
+        body: body,
+        headers: {
+            'X-CSRFToken': getCsrfToken(),
+            'X-Requested-With': 'XMLHttpRequest',
+        },
+        credentials: 'same-origin',
+    });
+
+    let data = {};
+    try {
+        data = await response.json();
+    } catch (error) {
+        data = {};
+    }
+
+    if (!response.ok) {
+        throw new Error(data.error || 'Could not update attendance. Please try again.');
+    }
+    return data;
+}
+
+/**
+ * Returns the status that follows the current one when a grid cell is clicked
+ * @param {string} status - The current status ('present', 'absent' or '')
+ * @returns {string} The next status in the present → absent → not marked cycle
+ */
+function nextAttendanceStatus(status) {
+    if (status === 'present') return 'absent';
+    if (status === 'absent') return '';
+    return 'present';
+}
+
+window.getCsrfToken = getCsrfToken;
+window.updateAttendanceCell = updateAttendanceCell;
+window.nextAttendanceStatus = nextAttendanceStatus;
@@ -0,0 +1,77 @@
+// Employee Autocomplete
+
+/**
+ * Wires a search box to the employee autocomplete endpoint
+ * @param {HTMLElement} container - The element rendered by EmployeeAutocompleteWidget
+ */
+function initEmployeeAutocomplete(container) {
+    const url = container.dataset.searchUrl;
+    const valueInput = container.querySelector('[data-employee-value]');
+    const searchInput = container.querySelector('[data-employee-search]');
+    const resultsList = container.querySelector('[data-employee-results]');
+    let timer = null;
+    let lastTerm = null;
+
+    function hideResults() {
+        resultsList.classList.add('hidden');
+        resultsList.innerHTML = '';
+    }
+
+    function choose(result) {
+        valueInput.value = result.id;
+        searchInput.value = result.label;
+        lastTerm = result.label;
+        hideResults();
+    }
+
+    async function search(term) {
+        const response = await fetch(`${url}?q=${encodeURIComponent(term)}`, {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' },
+            credentials: 'same-origin',
+        });
+        if (!response.ok || term !== searchInput.value.trim()) return;
+
+        const data = await response.json();
+        resultsList.innerHTML = '';
+        if (!data.results.length) {
+            const empty = document.createElement('li');
+            empty.className = 'px-4 py-2 text-sm text-gray-500';
+            empty.textContent = 'No matching employees';
+            resultsList.appendChild(empty);
+        }
+        data.results.forEach(function(result) {
+            const item = document.createElement('li');
+            item.className = 'px-4 py-2 text-sm cursor-pointer hover:bg-blue-50';
+            item.textContent = result.department ? `${result.label} — ${result.department}` : result.label;
+            item.addEventListener('mousedown', function(event) {
+                event.preventDefault();
+                choose(result);
+            });
+            resultsList.appendChild(item);
+        });
+        resultsList.classList.remove('hidden');
+    }
+
+    searchInput.addEventListener('input', function() {
+        const term = searchInput.value.trim();
+        valueInput.value = '';
+        clearTimeout(timer);
+        if (!term) {
+            hideResults();
+            return;
+        }
+        if (term === lastTerm) return;
+        timer = setTimeout(function() {
+            lastTerm = term;
+            search(term).catch(hideResults);
+        }, 200);
+    });
+
+    searchInput.addEventListener('blur', hideResults);
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('[data-employee-autocomplete]').forEach(initEmployeeAutocomplete);
+});
+
+window.initEmployeeAutocomplete = initEmployeeAutocomplete;
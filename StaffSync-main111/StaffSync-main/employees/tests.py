@@ -1,2 +1,1362 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import pstats
+import tempfile
+import tracemalloc
+import zipfile
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
 
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from django.db.models.signals import post_init
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import routers, timesheets, views
+from .events import dashboard_events
+from .middleware import RequestProfilerMiddleware
+from .forms import AttendanceForm
+from .management.commands import loadtest
+from .punches import PunchLogImport
+from .models import Attendance, AttendanceArchive, AttendanceChangeLog, AttendanceMonth, Department, Employee, Holiday
+from .timesheets import TimesheetService
+from .signals import AttendanceChange
+from .services import (
+    AttendanceArchiveService, AttendanceChangeLogService, AttendanceMonthService, AttendanceService, DashboardService,
+    DepartmentCounterService, DepartmentService, EmployeeService, HolidayCalendar, IngestService, ReportService,
+)
+
+# The manifest storage needs collectstatic output, which tests don't have.
+PLAIN_STATIC_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+
+@contextmanager
+def count_instances():
+    """Count model instances initialised inside the block, per model name."""
+    counts = Counter()
+
+    def receiver(sender, **kwargs):
+        counts[sender.__name__] += 1
+
+    post_init.connect(receiver, weak=False)
+    try:
+        yield counts
+    finally:
+        post_init.disconnect(receiver)
+
+
+def recent_working_days(count):
+    days = []
+    current = timezone.now().date() - timedelta(days=1)
+    while len(days) < count:
+        if current.weekday() < 5:
+            days.append(current)
+        current -= timedelta(days=1)
+    return sorted(days)
+
+
+class QueryBudgetMixin:
+    """Every view gets one query budget that must hold at every fixture size.
+
+    Subclasses only choose the scale; if a count starts growing with the
+    number of employees, departments or days, the large scale fails first.
+    """
+    EMPLOYEES = None
+    DEPARTMENTS = None
+    DAYS = None
+
+    # Queries per request, identical for both scales.
+    BUDGETS = {
+        'dashboard': 5,
+        'attendance_list': 3,
+        # Streamed: queries before the first byte, then per chunk of rows.
+        'attendance_list_head': 2,
+        'attendance_list_chunk': 2,
+        'mark_attendance': 3,
+        'mark_attendance_post': 8,
+        'employee_list': 2,
+        'employee_detail': 4,
+        'department_report': 2,
+    }
+    # Instance bounds count an Employee plus its select_related Department per
+    # listed employee. Response bytes are allowed per rendered employee row or
+    # grid cell, on top of a fixed allowance for the page chrome.
+    PAGE_BYTES = 250_000
+    ROW_BYTES = 6_000
+    CELL_BYTES = 1_500
+
+    @classmethod
+    def setUpTestData(cls):
+        departments = Department.objects.bulk_create([
+            Department(name=f'Department {i}') for i in range(cls.DEPARTMENTS)
+        ])
+        cls.days = recent_working_days(cls.DAYS)
+        Employee.objects.bulk_create([
+            Employee(
+                first_name=f'First{i:04d}', last_name=f'Last{i:04d}', email=f'employee{i}@example.com',
+                phone_number='5550000', department=departments[i % len(departments)],
+                hire_date=cls.days[0] - timedelta(days=30),
+            )
+            for i in range(cls.EMPLOYEES)
+        ])
+        cls.employee_ids = list(Employee.objects.order_by('pk').values_list('pk', flat=True))
+        AttendanceService.bulk_upsert({
+            (employee_id, day): 'present' if (employee_id + day.day) % 4 else 'absent'
+            for employee_id in cls.employee_ids
+            for day in cls.days
+        })
+        Holiday.objects.create(name='Founders Day', date=date(2000, 1, 3), is_recurring=True)
+
+    def setUp(self):
+        cache.clear()
+        HolidayCalendar.cached()
+
+    def request_within_budget(self, budget, url, data=None, max_instances=None, max_bytes=None):
+        with CaptureQueriesContext(connection) as queries, count_instances() as instances:
+            if data is None:
+                response = self.client.get(url)
+            else:
+                response = self.client.post(url, data)
+        executed = [query['sql'] for query in queries.captured_queries]
+        self.assertLessEqual(
+            len(executed), self.BUDGETS[budget],
+            f'{budget} ran {len(executed)} queries at {self.EMPLOYEES} employees:\n' + '\n'.join(executed),
+        )
+        if max_instances is not None:
+            self.assertLessEqual(sum(instances.values()), max_instances, dict(instances))
+        if max_bytes is not None:
+            self.assertLessEqual(len(response.content), max_bytes)
+        return response
+
+    def test_dashboard(self):
+        response = self.request_within_budget(
+            'dashboard', reverse('dashboard'),
+            max_instances=self.DEPARTMENTS,
+            max_bytes=self.PAGE_BYTES + self.DEPARTMENTS * self.ROW_BYTES,
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(ATTENDANCE_LIST_STREAMING=False)
+    def test_attendance_list(self):
+        start, end = self.days[0], self.days[-1]
+        span = (end - start).days + 1
+        response = self.request_within_budget(
+            'attendance_list', f"{reverse('attendance_list')}?start_date={start}&end_date={end}",
+            max_instances=2 * self.EMPLOYEES,
+            max_bytes=self.PAGE_BYTES + self.EMPLOYEES * (self.ROW_BYTES + span * self.CELL_BYTES),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['attendance_matrix']), self.EMPLOYEES)
+
+    @override_settings(ATTENDANCE_LIST_STREAMING=True, ATTENDANCE_LIST_STREAM_CHUNK=50)
+    def test_attendance_list_streamed(self):
+        start, end = self.days[0], self.days[-1]
+        url = f"{reverse('attendance_list')}?start_date={start}&end_date={end}"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            head_queries = len(queries)
+            parts = [part.decode() for part in response.streaming_content]
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(head_queries, self.BUDGETS['attendance_list_head'])
+        chunks = -(-self.EMPLOYEES // 50)
+        self.assertLessEqual(len(queries) - head_queries, chunks * self.BUDGETS['attendance_list_chunk'])
+        # Head first, then one part per chunk of rows, then the tail.
+        self.assertIn('id="calendarModal"', parts[0])
+        self.assertNotIn('group/row', parts[0])
+        self.assertEqual(len(parts), chunks + 2)
+        self.assertIn('Daily Attendance Summary', parts[-1])
+        streamed = ''.join(parts)
+        self.assertEqual(streamed.count('group/row'), self.EMPLOYEES)
+        with self.settings(ATTENDANCE_LIST_STREAMING=False):
+            buffered = self.client.get(url).content.decode()
+        for marker in ('data-status="present"', 'data-status="absent"', 'data-attendance-cell'):
+            self.assertEqual(streamed.count(marker), buffered.count(marker), marker)
+        self.assertEqual(
+            streamed.split('Daily Attendance Summary')[1].strip(), buffered.split('Daily Attendance Summary')[1].strip(),
+        )
+
+    def test_mark_attendance(self):
+        response = self.request_within_budget(
+            'mark_attendance', f"{reverse('mark_attendance')}?date={self.days[-1]}",
+            max_instances=3 * self.EMPLOYEES,
+            max_bytes=self.PAGE_BYTES + self.EMPLOYEES * self.ROW_BYTES,
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_mark_attendance_post(self):
+        day = self.days[-1]
+        data = {'selected_date': day.isoformat()}
+        data.update({f'status_{employee_id}': 'present' for employee_id in self.employee_ids})
+        response = self.request_within_budget(
+            'mark_attendance_post', reverse('mark_attendance'), data=data,
+            max_instances=2 * self.EMPLOYEES,
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Attendance.objects.filter(date=day).exclude(status='present').exists())
+
+    def test_employee_list(self):
+        response = self.request_within_budget(
+            'employee_list', reverse('employee_list'),
+            max_instances=2 * self.EMPLOYEES + self.DEPARTMENTS,
+            max_bytes=self.PAGE_BYTES + self.EMPLOYEES * self.ROW_BYTES,
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_employee_detail(self):
+        response = self.request_within_budget(
+            'employee_detail', reverse('employee_detail', args=[self.employee_ids[-1]]),
+            max_instances=20,
+            max_bytes=self.PAGE_BYTES,
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_department_report(self):
+        response = self.request_within_budget(
+            'department_report', f"{reverse('department_report')}?range=last30days",
+            max_instances=0,
+            max_bytes=self.PAGE_BYTES + self.DEPARTMENTS * (self.ROW_BYTES + 31 * self.CELL_BYTES),
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC_STORAGE, ATTENDANCE_READ_MODEL='rows')
+class SmallScaleQueryBudgetTests(QueryBudgetMixin, TestCase):
+    EMPLOYEES = 4
+    DEPARTMENTS = 2
+    DAYS = 5
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC_STORAGE, ATTENDANCE_READ_MODEL='rows')
+class LargeScaleQueryBudgetTests(QueryBudgetMixin, TestCase):
+    EMPLOYEES = 150
+    DEPARTMENTS = 12
+    DAYS = 20
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC_STORAGE)
+class AttendanceCellTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(
+            first_name='Cell', last_name='Edit', email='cell@example.com', phone_number='5550000',
+            hire_date=date(2020, 1, 1),
+        )
+        cls.day = recent_working_days(1)[0]
+
+    def post(self, **data):
+        return self.client.post(reverse('attendance_cell'), {
+            'employee_id': self.employee.pk, 'date': self.day.isoformat(), **data,
+        })
+
+    def test_cell_is_set_and_cleared(self):
+        response = self.post(status='absent')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'absent')
+        self.assertEqual(response.json()['counts']['absent'], 1)
+
+        self.post(status='present')
+        month = AttendanceMonth.objects.get(employee=self.employee, year=self.day.year, month=self.day.month)
+        self.assertEqual(month.get_status(self.day.day), 'present')
+
+        response = self.post(status='')
+        self.assertIsNone(response.json()['status'])
+        self.assertFalse(Attendance.objects.filter(employee=self.employee).exists())
+        month.refresh_from_db()
+        self.assertIsNone(month.get_status(self.day.day))
+        self.assertEqual(
+            list(AttendanceChangeLog.objects.values_list('previous', 'status')),
+            [(None, 'absent'), ('absent', 'present'), ('present', None)],
+        )
+
+    def test_toggle_query_count(self):
+        self.post(status='absent')
+        # Read the cell under lock, upsert it, merge the month bits, log the
+        # change and recount the day for the response; the savepoint pair is
+        # set_status()'s transaction nested in the test's.
+        with self.assertNumQueries(7):
+            self.post(status='present')
+
+    def test_invalid_cells_are_rejected(self):
+        self.assertEqual(self.post(status='late').status_code, 400)
+        self.assertEqual(self.post(status='present', date='not-a-date').status_code, 400)
+        future = timezone.now().date() + timedelta(days=1)
+        self.assertEqual(self.post(status='present', date=future.isoformat()).status_code, 400)
+        self.assertFalse(Attendance.objects.exists())
+
+
+class DashboardStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Live')
+        cls.employee = Employee.objects.create(
+            first_name='Live', last_name='Feed', email='live@example.com', phone_number='5550000',
+            hire_date=date(2020, 1, 1), department=cls.department,
+        )
+
+    def test_wsgi_request_gets_one_snapshot(self):
+        AttendanceService.set_status(self.employee.pk, timezone.now().date(), 'present')
+        response = self.client.get(reverse('dashboard_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        retry, event, data = response.content.decode().strip().split('\n')
+        self.assertEqual(event, 'event: snapshot')
+        snapshot = json.loads(data.removeprefix('data: '))
+        self.assertEqual((snapshot['total_employees'], snapshot['today_present']), (1, 1))
+
+    def test_delta_holds_only_what_changed(self):
+        today = timezone.now().date()
+        before = DashboardService.get_today_snapshot(today)
+        AttendanceService.set_status(self.employee.pk, today, 'absent')
+        after = DashboardService.get_today_snapshot(today)
+        delta = views._dashboard_delta(before, after)
+        self.assertEqual(set(delta), {'today_total', 'today_absent', 'departments'})
+        self.assertEqual(views._dashboard_delta(after, after), {})
+
+    def test_only_changes_to_today_notify_streams(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        async def subscribe():
+            return dashboard_events.subscribe()
+
+        queue = loop.run_until_complete(subscribe())
+        self.addCleanup(dashboard_events.unsubscribe, queue)
+        with self.captureOnCommitCallbacks(execute=True):
+            AttendanceService.set_status(self.employee.pk, recent_working_days(1)[0], 'present')
+        loop.run_until_complete(asyncio.sleep(0))
+        self.assertTrue(queue.empty())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AttendanceService.set_status(self.employee.pk, timezone.now().date(), 'present')
+        self.assertTrue(loop.run_until_complete(asyncio.wait_for(queue.get(), timeout=1)))
+
+
+class EmployeeAutocompleteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Search')
+        Employee.objects.bulk_create([
+            Employee(first_name=first, last_name=last, email=f'{first}.{last}@example.com'.lower(),
+                     phone_number='5550000', hire_date=date(2020, 1, 1), department=cls.department)
+            for first, last in [('Ana', 'Lopez'), ('Andrew', 'Banks'), ('Bea', 'Anders'), ('Carl', 'Ng')]
+        ])
+
+    def search(self, term):
+        response = self.client.get(reverse('employee_autocomplete'), {'q': term})
+        return [result['label'] for result in response.json()['results']]
+
+    def test_matches_name_prefixes_case_insensitively(self):
+        self.assertEqual(self.search('an'), ['Ana Lopez', 'Andrew Banks', 'Bea Anders'])
+        self.assertEqual(self.search('ANDREW b'), ['Andrew Banks'])
+        self.assertEqual(self.search('ng'), ['Carl Ng'])
+        self.assertEqual(self.search(' '), [])
+        response = self.client.get(reverse('employee_autocomplete'), {'q': 'carl'})
+        self.assertEqual(response.json()['results'][0]['department'], 'Search')
+
+    def test_form_renders_only_the_selected_employee(self):
+        selected = Employee.objects.get(first_name='Bea')
+        with count_instances() as instances:
+            html = AttendanceForm(initial={'employee': selected.pk}).as_p()
+        self.assertEqual(instances['Employee'], 1)
+        self.assertIn('Bea Anders', html)
+        self.assertNotIn('Carl Ng', html)
+
+
+class EmployeeBulkOperationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales, cls.support, cls.field = Department.objects.bulk_create([
+            Department(name='Sales'), Department(name='Support'), Department(name='Field'),
+        ])
+        cls.days = recent_working_days(30)
+        Employee.objects.bulk_create([
+            Employee(
+                first_name=f'First{i}', last_name=f'Last{i}', email=f'bulk{i}@example.com', phone_number='5550000',
+                department=cls.sales if i % 2 else cls.support, hire_date=cls.days[0],
+            )
+            for i in range(6)
+        ])
+        cls.employee_ids = list(Employee.objects.order_by('pk').values_list('pk', flat=True))
+        AttendanceService.bulk_upsert({
+            (employee_id, day): 'present' for employee_id in cls.employee_ids for day in cls.days
+        })
+
+    def test_bulk_delete_removes_history_in_batches(self):
+        doomed = self.employee_ids[:4]
+        headcounts = dict(Department.objects.values_list('name', 'headcount'))
+        with count_instances() as instances, CaptureQueriesContext(connection) as queries:
+            steps = list(EmployeeService.bulk_delete(doomed, batch_size=25))
+        counter_updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "employees_department"')
+        ]
+        self.assertEqual(len(counter_updates), 1)
+        headcounts.update(Sales=headcounts['Sales'] - 2, Support=headcounts['Support'] - 2)
+        self.assertEqual(dict(Department.objects.values_list('name', 'headcount')), headcounts)
+        self.assertEqual(steps[-1]['employees'], 4)
+        self.assertGreater(len(steps), 4 * len(self.days) // 25)
+        self.assertEqual(instances['Attendance'], 0)
+        self.assertFalse(Attendance.objects.filter(employee_id__in=doomed).exists())
+        self.assertFalse(AttendanceMonth.objects.filter(employee_id__in=doomed).exists())
+        self.assertEqual(Attendance.objects.count(), 2 * len(self.days))
+
+    def test_reassign_is_a_single_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            updated = EmployeeService.reassign_department(self.employee_ids[:3], self.field.pk)
+        self.assertEqual(updated, 3)
+        updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "employees_employee"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Employee.objects.filter(department=self.field).count(), 3)
+
+    def test_merge_moves_employees_and_removes_sources(self):
+        result = DepartmentService.merge([self.sales.pk, self.support.pk], self.field.pk)
+        self.assertEqual(result, {'employees': 6, 'departments': 2})
+        self.assertEqual(list(Department.objects.values_list('name', flat=True)), ['Field'])
+        self.assertEqual(Employee.objects.filter(department=self.field).count(), 6)
+
+    def test_bulk_action_view(self):
+        response = self.client.post(reverse('employee_bulk_action'), {
+            'action': 'reassign', 'department': self.field.pk, 'employee_ids': self.employee_ids[:2],
+        })
+        self.assertRedirects(response, reverse('employee_list'), fetch_redirect_response=False)
+        self.assertEqual(Employee.objects.filter(department=self.field).count(), 2)
+
+        self.client.post(reverse('employee_bulk_action'), {'action': 'delete', 'employee_ids': self.employee_ids[:2]})
+        self.assertEqual(Employee.objects.count(), 4)
+
+
+class DepartmentCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.sales = Department.objects.create(name='Sales')
+        cls.support = Department.objects.create(name='Support')
+        cls.employees = [
+            Employee.objects.create(
+                first_name=f'Count{i}', last_name='Er', email=f'counter{i}@example.com', phone_number='5550000',
+                department=cls.sales if i < 3 else cls.support, hire_date=date(2020, 1, 1),
+            )
+            for i in range(5)
+        ]
+        AttendanceService.bulk_upsert({
+            (employee.pk, cls.today): 'present' if i % 2 == 0 else 'absent'
+            for i, employee in enumerate(cls.employees)
+        })
+
+    def counters(self, department):
+        department.refresh_from_db()
+        return department.headcount, department.present_today, department.absent_today
+
+    def test_counters_follow_writes(self):
+        self.assertEqual(self.counters(self.sales), (3, 2, 1))
+        self.assertEqual(self.counters(self.support), (2, 1, 1))
+
+        AttendanceService.set_status(self.employees[1].pk, self.today, 'present')
+        self.assertEqual(self.counters(self.sales), (3, 3, 0))
+
+        employee = self.employees[0]
+        employee.department = self.support
+        employee.save()
+        self.assertEqual(self.counters(self.sales), (2, 2, 0))
+        self.assertEqual(self.counters(self.support), (3, 2, 1))
+
+        EmployeeService.reassign_department([self.employees[3].pk, self.employees[4].pk], self.sales.pk)
+        self.assertEqual(self.counters(self.sales), (4, 3, 1))
+
+        for _ in EmployeeService.bulk_delete([self.employees[4].pk]):
+            pass
+        self.assertEqual(self.counters(self.sales), (3, 2, 1))
+
+        DepartmentService.merge([self.support.pk], self.sales.pk)
+        self.assertEqual(self.counters(self.sales), (4, 3, 1))
+        self.assertEqual(DepartmentCounterService.find_drift(), [])
+
+    def test_presence_rolls_over_at_date_change(self):
+        # As if today's marks were yesterday's: the counters still hold them.
+        Attendance.objects.filter(date=self.today).delete()
+        Department.objects.update(counters_date=self.today - timedelta(days=1))
+        stats = {row['id']: row for row in DashboardService.get_department_stats(self.today)}
+        self.assertEqual(stats[self.sales.pk]['employee_count'], 3)
+        self.assertEqual(stats[self.sales.pk]['today_present'], 0)
+
+        AttendanceService.set_status(self.employees[1].pk, self.today, 'present')
+        self.assertEqual(self.counters(self.sales), (3, 1, 0))
+        self.assertEqual(self.sales.counters_date, self.today)
+
+    def test_verify_counters_repairs_drift(self):
+        Department.objects.filter(pk=self.sales.pk).update(headcount=40, present_today=0)
+        self.assertEqual(len(DepartmentCounterService.find_drift()), 1)
+        call_command('verify_counters', '--repair', stdout=mock.MagicMock())
+        self.assertEqual(DepartmentCounterService.find_drift(), [])
+        self.assertEqual(self.counters(self.sales), (3, 2, 1))
+
+    def test_seed_clear_keeps_counters_and_change_log(self):
+        call_command('seed_demo_data', employees=4, departments=1, days=7, seed=1, stdout=io.StringIO())
+        department = Department.objects.get(name='Demo Department 1')
+        seeded = Attendance.objects.filter(employee__department=department).count()
+        call_command('seed_demo_data', employees=2, departments=1, days=0, clear=True, stdout=io.StringIO())
+        department.refresh_from_db()
+        self.assertEqual(department.headcount, 2)
+        self.assertEqual(AttendanceChangeLog.objects.filter(operation='delete').count(), seeded)
+        self.assertEqual(DepartmentCounterService.find_drift(), [])
+
+
+class AttendanceWriteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(
+            first_name='Write', last_name='Path', email='writepath@example.com', phone_number='5550000',
+            hire_date=date(2020, 1, 1),
+        )
+        cls.days = recent_working_days(3)
+
+    @contextmanager
+    def competing_insert(self, day, status):
+        # Another writer inserts the record after the service has read the
+        # existing statuses but before its own insert.
+        insert = AttendanceService._insert_ignoring_conflicts
+
+        def racing_insert(changes, batch_size):
+            Attendance.objects.create(employee=self.employee, date=day, status=status)
+            return insert(changes, batch_size)
+
+        with mock.patch.object(AttendanceService, '_insert_ignoring_conflicts', side_effect=racing_insert):
+            yield
+
+    def test_upsert_reports_the_status_a_concurrent_writer_left(self):
+        day = self.days[0]
+        with self.competing_insert(day, 'absent'):
+            outcomes = AttendanceService.upsert({(self.employee.pk, day): 'present'})
+        self.assertEqual(outcomes, {(self.employee.pk, day): 'updated'})
+        self.assertEqual(Attendance.objects.get(employee=self.employee, date=day).status, 'present')
+        self.assertEqual(
+            list(AttendanceChangeLog.objects.values_list('previous', 'status')),
+            [(None, 'absent'), ('absent', 'present')],
+        )
+
+    def test_set_status_reports_the_status_a_concurrent_writer_left(self):
+        day = self.days[1]
+        with self.competing_insert(day, 'present'):
+            previous = AttendanceService.set_status(self.employee.pk, day, 'absent')
+        self.assertEqual(previous, 'present')
+        self.assertEqual(AttendanceChangeLog.objects.last().previous, 'present')
+
+        self.assertEqual(AttendanceService.set_status(self.employee.pk, day, None), 'absent')
+        self.assertFalse(Attendance.objects.filter(employee=self.employee, date=day).exists())
+        self.assertIsNone(AttendanceService.set_status(self.employee.pk, day, None))
+        self.assertEqual(AttendanceChangeLog.objects.count(), 3)
+
+    def test_autofill_announces_only_rows_it_inserted(self):
+        day = self.days[2]
+        with self.competing_insert(day, 'present'):
+            counts = {}
+            for month in AttendanceService.autofill_absent(day, day):
+                counts.update(month)
+        self.assertEqual(counts, {day: 0})
+        self.assertEqual(Attendance.objects.get(employee=self.employee, date=day).status, 'present')
+        self.assertEqual(list(AttendanceChangeLog.objects.values_list('previous', 'status')), [(None, 'present')])
+
+        other = self.days[0]
+        self.assertEqual(list(AttendanceService.autofill_absent(other, other)), [{other: 1}])
+        self.assertEqual(AttendanceChangeLog.objects.last().status, 'absent')
+
+
+    def test_autofill_command_fills_unmarked_days_after_hire(self):
+        first, second, third = self.days
+        AttendanceService.set_status(self.employee.pk, second, 'present')
+        recruit = Employee.objects.create(
+            first_name='New', last_name='Hire', email='newhire@example.com', phone_number='5550000', hire_date=third,
+        )
+        output = io.StringIO()
+        call_command('autofill_attendance', '--range', str(first), str(third), stdout=output)
+        self.assertIn('Marked 3 missing attendance record(s)', output.getvalue())
+        self.assertEqual(
+            sorted(Attendance.objects.filter(status='absent').values_list('employee_id', 'date')),
+            [(self.employee.pk, first), (self.employee.pk, third), (recruit.pk, third)],
+        )
+
+        call_command('autofill_attendance', '--range', str(first), str(third), stdout=output)
+        self.assertIn('Marked 0 missing attendance record(s)', output.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('autofill_attendance', '--date', str(timezone.now().date() + timedelta(days=1)))
+
+    def test_bulk_view_marks_the_working_days_of_a_range(self):
+        end = timezone.now().date() - timedelta(days=1)
+        start = end - timedelta(days=6)
+        working_days = HolidayCalendar.load().working_days(start, end)
+        Attendance.objects.create(employee=self.employee, date=working_days[0], status='absent')
+        other = Employee.objects.create(
+            first_name='Other', last_name='Path', email='otherpath@example.com', phone_number='5550000',
+            hire_date=date(2020, 1, 1),
+        )
+        data = {'employees': [self.employee.pk, other.pk], 'start_date': start, 'end_date': end, 'status': 'present'}
+
+        response = self.client.post(reverse('bulk_attendance'), data, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json(), {
+            'created': 2 * len(working_days) - 1, 'updated': 1, 'unchanged': 0, 'skipped': 2 * (7 - len(working_days)),
+        })
+        self.assertEqual(Attendance.objects.filter(status='present').count(), 2 * len(working_days))
+
+        response = self.client.post(reverse('bulk_attendance'), data, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['unchanged'], 2 * len(working_days))
+        response = self.client.post(
+            reverse('bulk_attendance'), {**data, 'end_date': end + timedelta(days=2)}, HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+class DepartmentReportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Pivot')
+        cls.days = recent_working_days(2)
+        cls.veteran, cls.recruit = [
+            Employee.objects.create(
+                first_name=first, last_name='Pivot', email=f'{first}.pivot@example.com'.lower(),
+                phone_number='5550000', hire_date=hire_date, department=cls.department,
+            )
+            for first, hire_date in (('Veteran', date(2020, 1, 1)), ('Recruit', cls.days[1]))
+        ]
+        AttendanceService.bulk_upsert({
+            (cls.veteran.pk, cls.days[0]): 'present', (cls.veteran.pk, cls.days[1]): 'absent',
+        })
+
+    def setUp(self):
+        cache.clear()
+
+    def department_row(self, pivot):
+        return next(row for row in pivot['departments'] if row['id'] == self.department.pk)
+
+    def test_pivot_counts_unmarked_employees_from_their_hire_date(self):
+        pivot = ReportService.build_department_pivot(*self.days)
+        row = self.department_row(pivot)
+        self.assertEqual((row['present'], row['absent'], row['unmarked'], row['headcount']), (1, 1, 1, 2))
+        self.assertEqual([day['headcount'] for day in row['days']], [1, 2])
+        self.assertEqual([day['rate'] for day in row['days']], [100, 0])
+
+    def test_cached_report_is_refreshed_after_a_committed_write(self):
+        def present():
+            response = self.client.get(reverse('department_report_data'), {'range': 'last30days'})
+            self.assertEqual(response.json()['range'], 'last30days')
+            return response.json()['departments'][0]['present']
+
+        self.assertEqual(present(), 1)
+        AttendanceService.set_status(self.recruit.pk, self.days[1], 'present')
+        self.assertEqual(present(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            AttendanceService.set_status(self.veteran.pk, self.days[1], 'present')
+        self.assertEqual(present(), 3)
+
+
+class AttendanceArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Archive')
+        cls.employees = [
+            Employee.objects.create(
+                first_name=f'Arch{i}', last_name='Ive', email=f'archive{i}@example.com',
+                phone_number='5550000', hire_date=date(2020, 1, 1), department=cls.department,
+            )
+            for i in range(2)
+        ]
+        last_year = timezone.now().date().year - 1
+        cls.days = HolidayCalendar.load().working_days(date(last_year, 3, 1), date(last_year, 3, 10))[:2]
+
+    def test_reports_include_archived_records(self):
+        first, second = self.days
+        AttendanceService.bulk_upsert({
+            (self.employees[0].pk, first): 'present',
+            (self.employees[1].pk, first): 'absent',
+            (self.employees[0].pk, second): 'present',
+        })
+        self.assertEqual(sum(AttendanceArchiveService.archive_before(first.year + 1)), 3)
+        self.assertFalse(Attendance.objects.exists())
+        # Marked again after archiving: the hot record wins over the archived one.
+        AttendanceService.set_status(self.employees[0].pk, second, 'absent')
+
+        counts = DashboardService.get_daily_counts(first, second)
+        self.assertEqual((counts[first]['present'], counts[first]['absent']), (1, 1))
+        self.assertEqual((counts[second]['total'], counts[second]['absent']), (1, 1))
+
+        pivot = ReportService.build_department_pivot(first, second)
+        row = next(row for row in pivot['departments'] if row['id'] == self.department.pk)
+        self.assertEqual((row['present'], row['absent'], row['unmarked']), (1, 2, 1))
+
+
+    def test_bulk_mark_skips_archived_days_and_days_before_hire(self):
+        first, second = self.days
+        veteran, other = self.employees
+        recruit = Employee.objects.create(
+            first_name='Late', last_name='Hire', email='latehire@example.com', phone_number='5550000',
+            hire_date=second,
+        )
+        AttendanceService.set_status(veteran.pk, first, 'absent')
+        list(AttendanceArchiveService.archive_before(first.year + 1))
+
+        summary = AttendanceService.bulk_mark([veteran.pk, other.pk, recruit.pk], first, second, 'present')
+        total_days = (second - first).days + 1
+        self.assertEqual(summary, {'created': 4, 'updated': 0, 'unchanged': 0, 'skipped': 3 * total_days - 4})
+        self.assertEqual(
+            sorted(Attendance.objects.values_list('employee_id', 'date')),
+            sorted([(veteran.pk, second), (other.pk, first), (other.pk, second), (recruit.pk, second)]),
+        )
+        cells = AttendanceArchiveService.get_cells(first, first, employee_ids=[veteran.pk])
+        self.assertEqual(cells[(veteran.pk, first)].status, 'absent')
+
+    def test_command_moves_closed_years_only(self):
+        first, second = self.days
+        today = timezone.now().date()
+        employee = self.employees[0]
+        AttendanceService.bulk_upsert({
+            (employee.pk, first): 'present', (employee.pk, second): 'absent', (employee.pk, today): 'present',
+        })
+        with self.assertRaises(CommandError):
+            call_command('archive_attendance', before=today.year + 1, stdout=io.StringIO())
+
+        output = io.StringIO()
+        call_command('archive_attendance', before=today.year, batch_size=1, stdout=output)
+        self.assertIn('Archived 2 attendance record(s)', output.getvalue())
+        self.assertEqual(list(Attendance.objects.values_list('date', flat=True)), [today])
+        self.assertEqual(AttendanceArchive.objects.count(), 2)
+
+        cells = AttendanceArchiveService.get_cells(first, today, employee_ids=[employee.pk])
+        self.assertEqual(
+            [cells[(employee.pk, day)].status for day in (first, second, today)], ['present', 'absent', 'present'],
+        )
+        recent = AttendanceArchiveService.get_recent_for_employee(employee)
+        self.assertEqual([record.date for record in recent], [today, second, first])
+
+class AttendanceMonthTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employees = [
+            Employee.objects.create(
+                first_name=f'Bit{i}', last_name='Map', email=f'bitmap{i}@example.com', phone_number='5550000',
+                hire_date=date(2020, 1, 1),
+            )
+            for i in range(2)
+        ]
+        last_year = timezone.now().date().year - 1
+        cls.days = HolidayCalendar.load().working_days(date(last_year, 5, 1), date(last_year, 6, 15))
+
+    def statuses(self, employee):
+        months = {(month.year, month.month): month for month in AttendanceMonth.objects.filter(employee=employee)}
+        return {
+            day: months[(day.year, day.month)].get_status(day.day) if (day.year, day.month) in months else None
+            for day in self.days
+        }
+
+    def masks(self):
+        return sorted(AttendanceMonth.objects.exclude(marked_mask=0).values_list(
+            'employee_id', 'year', 'month', 'marked_mask', 'present_mask',
+        ))
+
+    def test_months_follow_writes_and_match_a_rebuild(self):
+        statuses = {
+            (employee.pk, day): 'present' if (i + j) % 3 else 'absent'
+            for i, employee in enumerate(self.employees)
+            for j, day in enumerate(self.days)
+        }
+        AttendanceService.bulk_upsert(statuses)
+        AttendanceService.upsert({(self.employees[0].pk, self.days[0]): 'present'})
+        AttendanceService.set_status(self.employees[1].pk, self.days[-1], None)
+        statuses[(self.employees[0].pk, self.days[0])] = 'present'
+        statuses[(self.employees[1].pk, self.days[-1])] = None
+
+        for employee in self.employees:
+            self.assertEqual(self.statuses(employee), {day: statuses[(employee.pk, day)] for day in self.days})
+        masks = self.masks()
+        call_command('rebuild_attendance_months', stdout=io.StringIO())
+        self.assertEqual(self.masks(), masks)
+
+    def test_removing_a_hot_record_uncovers_the_archived_one(self):
+        employee, day = self.employees[0], self.days[0]
+        AttendanceService.set_status(employee.pk, day, 'absent')
+        list(AttendanceArchiveService.archive_before(day.year + 1))
+        self.assertEqual(self.statuses(employee)[day], 'absent')
+
+        AttendanceService.set_status(employee.pk, day, 'present')
+        self.assertEqual(self.statuses(employee)[day], 'present')
+        AttendanceService.set_status(employee.pk, day, None)
+        self.assertEqual(self.statuses(employee)[day], 'absent')
+
+
+class TimesheetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.month_start = (timezone.now().date().replace(day=1) - timedelta(days=1)).replace(day=1)
+        Employee.objects.bulk_create([
+            Employee(first_name=f'Time{i}', last_name='Sheet', email=f'timesheet{i}@example.com',
+                     phone_number='5550000', hire_date=date(2020, 1, 1))
+            for i in range(5)
+        ])
+        cls.employee = Employee.objects.get(email='timesheet0@example.com')
+        cls.working_days = HolidayCalendar.load().working_days(
+            cls.month_start, cls.month_start.replace(day=28),
+        )
+        AttendanceService.bulk_upsert({
+            (cls.employee.pk, day): 'absent' if i == 0 else 'present' for i, day in enumerate(cls.working_days)
+        })
+
+    def archive_names(self, content):
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            return archive.namelist(), archive.read(
+                f'timesheets-{self.month_start:%Y-%m}/summary.csv',
+            ).decode().splitlines()
+
+    def test_pool_and_single_process_write_the_same_archive(self):
+        snapshot = TimesheetService.build_snapshot(self.month_start.year, self.month_start.month)
+        single, pooled = io.BytesIO(), io.BytesIO()
+        self.assertEqual(TimesheetService.write_archive(single, snapshot, workers=1, chunk_size=2), 5)
+        self.assertIsNone(timesheets._snapshot)
+        TimesheetService.write_archive(pooled, snapshot, workers=2, chunk_size=2)
+        names, summary = self.archive_names(pooled.getvalue())
+        self.assertEqual(self.archive_names(single.getvalue()), (names, summary))
+        self.assertEqual(len(names), 5 * 2 + 1)
+        row = next(line.split(',') for line in summary if line.startswith(f'{self.employee.pk},'))
+        present, absent = row[5:7]
+        self.assertEqual((int(present), int(absent)), (len(self.working_days) - 1, 1))
+
+    def test_export_view(self):
+        url = reverse('timesheet_export')
+        response = self.client.get(url, {'year': self.month_start.year, 'month': self.month_start.month})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'timesheets-{self.month_start:%Y-%m}.zip', response['Content-Disposition'])
+        names, summary = self.archive_names(b''.join(response.streaming_content))
+        self.assertIn(f'timesheets-{self.month_start:%Y-%m}/html/sheet-time0-{self.employee.pk}.html', names)
+        self.assertEqual(len(summary), 6)
+        self.assertEqual(self.client.get(url, {'month': 13}).status_code, 400)
+
+    def test_export_view_runs_one_export_at_a_time(self):
+        cache.add(TimesheetService.EXPORT_LOCK_KEY, True)
+        try:
+            response = self.client.get(reverse('timesheet_export'))
+        finally:
+            cache.delete(TimesheetService.EXPORT_LOCK_KEY)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '30')
+        with mock.patch.object(TimesheetService, 'write_archive') as write_archive:
+            self.client.get(reverse('timesheet_export'))
+        self.assertEqual(write_archive.call_args.kwargs['workers'], 1)
+        self.assertIsNone(cache.get(TimesheetService.EXPORT_LOCK_KEY))
+
+
+class PunchLogImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Employee.objects.bulk_create([
+            Employee(first_name=f'Punch{i}', last_name='Card', email=f'punch{i}@example.com',
+                     phone_number='5550000', hire_date=date(2020, 1, 1), badge_id=f'B{i:03d}')
+            for i in range(3)
+        ])
+        cls.employees = list(Employee.objects.filter(badge_id__isnull=False).order_by('badge_id'))
+        today = timezone.now().date()
+        calendar = HolidayCalendar.load()
+        cls.days = calendar.working_days(today - timedelta(days=14), today - timedelta(days=1))[-2:]
+        cls.weekend = next(
+            today - timedelta(days=offset) for offset in range(1, 8)
+            if (today - timedelta(days=offset)).weekday() >= 5
+        )
+
+    def log(self):
+        first, second = self.days
+        return [
+            'badge,timestamp\n',
+            f'B000,{first} 08:58:41\n',
+            f'B000,{first} 12:30:00\n',
+            f'B000,{first} 17:45:10\n',
+            f'B001,{first} 09:02:00\n',
+            f'B001,{second} 09:01:00\n',
+            f'B002,{self.weekend} 10:00:00\n',
+            f'B999,{first} 09:00:00\n',
+            f'B002,{timezone.now().date() + timedelta(days=3)} 09:00:00\n',
+            '\n',
+        ]
+
+    def test_punches_collapse_into_present_in_batches(self):
+        Attendance.objects.create(employee=self.employees[1], date=self.days[1], status='absent')
+        importer = PunchLogImport(batch_size=2)
+        progress = list(importer.run(self.log()))
+        self.assertEqual(len(progress), 2)
+        stats = importer.stats
+        self.assertEqual((stats['created'], stats['updated'], stats['duplicate']), (2, 1, 2))
+        self.assertEqual((stats['unknown_badge'], stats['non_working'], stats['future'], stats['malformed']),
+                         (1, 1, 1, 1))
+        self.assertEqual(Attendance.objects.filter(employee__badge_id__isnull=False).count(), 3)
+        self.assertFalse(Attendance.objects.filter(status='absent').exists())
+
+        again = PunchLogImport()
+        list(again.run(self.log()))
+        self.assertEqual((again.stats['created'], again.stats['unchanged']), (0, 3))
+
+    def test_upload_view_and_command(self):
+        upload = io.BytesIO(''.join(self.log()).replace(',', ';').encode())
+        upload.name = 'punches.csv'
+        response = self.client.post(
+            reverse('import_punches'), {'log_file': upload, 'delimiter': ';'}, HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 3)
+        self.assertEqual(self.client.post(reverse('import_punches'), {}, HTTP_ACCEPT='application/json').status_code, 400)
+
+        output = io.StringIO()
+        stdin = io.StringIO('B002\t' + f'{self.days[0]}T07:00:00\n')
+        with mock.patch('sys.stdin', stdin):
+            call_command('import_punches', '-', stdout=output)
+        self.assertIn('1 created', output.getvalue())
+        self.assertFalse(stdin.closed)
+
+    def test_imported_punches_set_month_bits(self):
+        first, second = self.days
+        employee = self.employees[0]
+        AttendanceMonth.objects.filter(employee=employee).delete()
+        list(PunchLogImport().run([f'B000,{first} 09:00:00\n', f'B000,{second} 09:00:00\n']))
+        Attendance.objects.filter(employee=employee, date=first).update(status='absent')
+        AttendanceMonthService.apply_changes([AttendanceChange(employee.pk, first, 'present', 'absent')])
+
+        for day, status in ((first, 'absent'), (second, 'present')):
+            month = AttendanceMonth.objects.get(employee=employee, year=day.year, month=day.month)
+            bit = 1 << (day.day - 1)
+            self.assertTrue(month.marked_mask & bit)
+            self.assertEqual(bool(month.present_mask & bit), status == 'present')
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC_STORAGE)
+class HolidayMatchingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(
+            first_name='Holi', last_name='Day', email='holiday@example.com',
+            phone_number='5550000', hire_date=date(2020, 1, 1),
+        )
+        Holiday.objects.create(name='Founders Day', date=date(2021, 3, 15), is_recurring=True)
+        Holiday.objects.create(name='Office Move', date=date(2024, 3, 15))
+        Holiday.objects.bulk_create([Holiday(name='Audit', date=date(2024, 6, 3))])
+        Attendance.objects.bulk_create([
+            Attendance(employee=cls.employee, date=day, status='present')
+            for day in (date(2023, 3, 15), date(2024, 3, 15), date(2024, 6, 3), date(2024, 6, 4), date(2025, 6, 3))
+        ])
+
+    def test_month_and_day_are_kept_in_sync(self):
+        holiday = Holiday.objects.get(name='Audit')
+        self.assertEqual((holiday.month, holiday.day), (6, 3))
+        holiday.date = date(2024, 7, 9)
+        holiday.save(update_fields=['date'])
+        self.assertEqual(Holiday.objects.values_list('month', 'day').get(pk=holiday.pk), (7, 9))
+        self.assertEqual(AttendanceService.get_holiday(date(2030, 3, 15)).name, 'Founders Day')
+        self.assertEqual(AttendanceService.get_holiday(date(2024, 3, 15)).name, 'Founders Day')
+        self.assertIsNone(AttendanceService.get_holiday(date(2025, 7, 9)))
+
+    def test_attendance_is_matched_in_one_query(self):
+        with self.assertNumQueries(1):
+            names = dict(Attendance.objects.with_holidays().values_list('date', 'holiday_name'))
+        self.assertEqual(names, {
+            date(2023, 3, 15): 'Founders Day',
+            date(2024, 3, 15): 'Office Move',
+            date(2024, 6, 3): 'Audit',
+            date(2024, 6, 4): None,
+            date(2025, 6, 3): None,
+        })
+        self.assertEqual(Attendance.objects.on_holidays().count(), 3)
+        self.assertEqual(
+            sorted(Attendance.objects.exclude_holidays().values_list('date', flat=True)),
+            [date(2024, 6, 4), date(2025, 6, 3)],
+        )
+
+    def test_holiday_lookups_use_indexes(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # The tables are tiny; make the planner show what it would do at scale.
+                cursor.execute('SET enable_seqscan = off')
+            plan = Attendance.objects.on_holidays().explain()
+            if connection.vendor == 'postgresql':
+                cursor.execute('RESET enable_seqscan')
+        self.assertIn('holiday_month_day_idx', plan)
+        self.assertNotIn('SCAN U0', plan)
+
+    def test_admin_filters_records_on_holidays(self):
+        admin_user = User.objects.create_superuser('holidayadmin', 'holidayadmin@example.com', 'pass')
+        self.client.force_login(admin_user)
+        url = reverse('admin:employees_attendance_changelist')
+        response = self.client.get(url, {'holiday': 'yes', 'date__year': 2024})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Office Move')
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+
+    def test_admin_all_dates_link_is_not_redirected(self):
+        admin_user = User.objects.create_superuser('alldates', 'alldates@example.com', 'pass')
+        self.client.force_login(admin_user)
+        url = reverse('admin:employees_attendance_changelist')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        response = self.client.get(url, HTTP_REFERER=f'http://testserver{url}?date__year=2024')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 5)
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC_STORAGE)
+class AdminActionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Admin')
+        cls.employees = [
+            Employee.objects.create(
+                first_name=f'Admin{i}', last_name='Action', email=f'adminaction{i}@example.com',
+                phone_number='5550000', hire_date=date(2020, 1, 1), department=cls.department,
+            )
+            for i in range(2)
+        ]
+        cls.days = recent_working_days(2)
+        AttendanceService.bulk_upsert({
+            (employee.pk, day): 'present' for employee in cls.employees for day in cls.days
+        })
+        cls.admin_user = User.objects.create_superuser('actions', 'actions@example.com', 'pass')
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def run_action(self, model, action, pks):
+        return self.client.post(
+            reverse(f'admin:employees_{model}_changelist'), {'action': action, '_selected_action': pks},
+        )
+
+    def test_status_action_updates_records_and_receivers(self):
+        first = self.employees[0]
+        AttendanceService.set_status(first.pk, self.days[1], 'absent')
+        records = Attendance.objects.filter(employee=first).values_list('pk', flat=True)
+        response = self.run_action('attendance', 'mark_absent', list(records))
+        self.assertEqual(
+            [str(message) for message in get_messages(response.wsgi_request)],
+            [f'{len(self.days) - 1} attendance record(s) marked as absent.'],
+        )
+        self.assertEqual(set(Attendance.objects.filter(employee=first).values_list('status', flat=True)), {'absent'})
+        self.assertEqual(
+            AttendanceChangeLog.objects.filter(previous='present', status='absent').count(), len(self.days),
+        )
+        day = self.days[0]
+        month = AttendanceMonth.objects.get(employee=first, year=day.year, month=day.month)
+        self.assertEqual(month.get_status(day.day), 'absent')
+        self.assertEqual(DepartmentCounterService.find_drift(), [])
+
+    def test_delete_actions_skip_the_stock_confirmation(self):
+        day = self.days[0]
+        records = list(Attendance.objects.filter(date=day).values_list('pk', flat=True))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.run_action('attendance', 'delete_records', records)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            len([query for query in queries.captured_queries if query['sql'].startswith('DELETE')]), 1,
+        )
+        self.assertFalse(Attendance.objects.filter(date=day).exists())
+        self.assertEqual(AttendanceChangeLog.objects.filter(operation='delete').count(), len(records))
+
+        response = self.client.get(reverse('admin:employees_employee_changelist'))
+        actions = [name for name, _ in response.context['action_form'].fields['action'].choices]
+        self.assertEqual(actions, ['', 'delete_employees'])
+        self.run_action('employee', 'delete_employees', [self.employees[1].pk])
+        self.assertFalse(Employee.objects.filter(pk=self.employees[1].pk).exists())
+        self.department.refresh_from_db()
+        self.assertEqual(self.department.headcount, 1)
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC_STORAGE)
+class AttendanceChangeFeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(
+            first_name='Feed', last_name='Reader', email='feed@example.com', phone_number='5550000',
+            hire_date=date(2020, 1, 1),
+        )
+        cls.days = recent_working_days(3)
+
+    def feed(self, **params):
+        return self.client.get(reverse('attendance_changes'), params).json()
+
+    def test_log_records_inserts_updates_and_deletes(self):
+        AttendanceService.bulk_upsert({(self.employee.pk, day): 'present' for day in self.days})
+        AttendanceService.bulk_upsert({(self.employee.pk, self.days[0]): 'absent'})
+        record = Attendance.objects.get(employee=self.employee, date=self.days[0])
+        self.client.post(reverse('delete_attendance', args=[record.pk]))
+        AttendanceService.set_status(self.employee.pk, self.days[1], None)
+
+        operations = list(AttendanceChangeLog.objects.values_list('operation', 'previous', 'status'))
+        self.assertEqual(operations, [
+            ('insert', None, 'present'), ('insert', None, 'present'), ('insert', None, 'present'),
+            ('update', 'present', 'absent'),
+            ('delete', 'absent', None),
+            ('delete', 'present', None),
+        ])
+
+    def test_view_writes_go_through_the_derived_stores_atomically(self):
+        day = self.days[2]
+        self.client.post(reverse('add_attendance'), {'employee': self.employee.pk, 'date': day, 'status': 'present'})
+        record = Attendance.objects.get(employee=self.employee, date=day)
+        self.assertEqual(AttendanceChangeLog.objects.get().operation, 'insert')
+        month = AttendanceMonth.objects.get(employee=self.employee, year=day.year, month=day.month)
+        self.assertEqual(month.get_status(day.day), 'present')
+
+        with mock.patch.object(AttendanceChangeLogService, 'record', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('delete_attendance', args=[record.pk]))
+        self.assertTrue(Attendance.objects.filter(pk=record.pk).exists())
+        month.refresh_from_db()
+        self.assertEqual(month.get_status(day.day), 'present')
+
+    def test_feed_pages_from_cursor(self):
+        head = self.feed()['next_cursor']
+        AttendanceService.bulk_upsert({(self.employee.pk, day): 'present' for day in self.days})
+
+        page = self.feed(since=head, limit=2)
+        self.assertEqual([change['date'] for change in page['changes']], [str(day) for day in self.days[:2]])
+        self.assertTrue(page['has_more'])
+
+        page = self.feed(since=page['next_cursor'], limit=2)
+        self.assertEqual(len(page['changes']), 1)
+        self.assertFalse(page['has_more'])
+        self.assertEqual(self.feed(since=page['next_cursor'])['changes'], [])
+
+    def test_pruned_cursor_is_rejected(self):
+        AttendanceService.bulk_upsert({(self.employee.pk, day): 'present' for day in self.days})
+        for _ in AttendanceChangeLogService.prune_before(timezone.now() + timedelta(seconds=1)):
+            pass
+        AttendanceService.bulk_upsert({(self.employee.pk, self.days[0]): 'absent'})
+
+        response = self.client.get(reverse('attendance_changes'), {'since': 0})
+        self.assertEqual(response.status_code, 410)
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC_STORAGE)
+class AttendanceIngestTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(
+            first_name='Kiosk', last_name='User', email='kiosk@example.com', phone_number='5550000',
+            hire_date=date(2020, 1, 1),
+        )
+        cls.token, cls.key = IngestService.create_token('Front door')
+        cls.day = recent_working_days(1)[0]
+        cls.sunday = cls.day - timedelta(days=cls.day.weekday() + 1)
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, events, key='batch-1', token=None):
+        return self.client.post(
+            reverse('ingest_attendance'), json.dumps({'events': events}), content_type='application/json',
+            HTTP_AUTHORIZATION=f'Token {token or self.key}', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_requires_a_valid_token(self):
+        response = self.post([{'employee': self.employee.pk, 'date': str(self.day), 'status': 'present'}],
+                             token='wrong')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_reports_a_result_per_event(self):
+        response = self.post([
+            {'employee': self.employee.pk, 'date': str(self.day), 'status': 'absent'},
+            {'employee': 'KIOSK@example.com', 'date': str(self.day), 'status': 'present'},
+            {'employee': 'nobody@example.com', 'date': str(self.day), 'status': 'present'},
+            {'employee': self.employee.pk, 'date': str(self.sunday), 'status': 'present'},
+            {'employee': self.employee.pk, 'date': 'yesterday', 'status': 'present'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([item['result'] for item in body['results']],
+                         ['superseded', 'created', 'rejected', 'rejected', 'rejected'])
+        self.assertEqual(body['summary']['created'], 1)
+        self.assertEqual(Attendance.objects.get(employee=self.employee, date=self.day).status, 'present')
+
+    def test_malformed_status_is_rejected_per_event(self):
+        response = self.post([
+            {'employee': self.employee.pk, 'date': str(self.day), 'status': ['present']},
+            {'employee': self.employee.pk, 'date': str(self.day), 'status': {'a': 1}},
+            {'employee': self.employee.pk, 'date': str(self.day), 'status': 'present'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([item['result'] for item in results], ['rejected', 'rejected', 'created'])
+        self.assertIn('Status must be one of', results[0]['error'])
+
+    def test_retried_batch_is_replayed_not_reapplied(self):
+        events = [{'employee': self.employee.pk, 'date': str(self.day), 'status': 'present'}]
+        first = self.post(events)
+        AttendanceService.set_status(self.employee.pk, self.day, 'absent')
+
+        retry = self.post(events)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Attendance.objects.get(employee=self.employee, date=self.day).status, 'absent')
+
+        conflicting = self.post([{'employee': self.employee.pk, 'date': str(self.day), 'status': 'absent'}])
+        self.assertEqual(conflicting.status_code, 422)
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC_STORAGE, PROFILING_ENABLED=True)
+class RequestProfilerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('profiler', 'profiler@example.com', 'pass', is_staff=True)
+        Employee.objects.create(
+            first_name='Pro', last_name='Filed', email='profiled@example.com', phone_number='5550000',
+            hire_date=date(2020, 1, 1),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+        profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        settings = override_settings(PROFILING_DIR=profile_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.profile_dir = Path(profile_dir.name)
+
+    def profiled_functions(self, response):
+        stats = pstats.Stats(str(self.profile_dir / response['X-Profile-File']))
+        return {name for _, _, name in stats.stats}
+
+    def test_buffered_response_reports_in_headers(self):
+        with self.assertLogs('employees.profiling'):
+            response = self.client.get(reverse('employee_list'), {'_profile': '1'})
+        self.assertTrue(response['X-Profile-Time'].endswith('ms'))
+        self.assertIn('employee_list', self.profiled_functions(response))
+
+    @override_settings(ATTENDANCE_LIST_STREAMING=True)
+    def test_streamed_response_is_profiled_until_the_body_ends(self):
+        with self.assertLogs('employees.profiling'):
+            response = self.client.get(reverse('attendance_list'), {'_profile': '1'})
+            self.assertTrue(RequestProfilerMiddleware._lock.locked())
+            b''.join(response.streaming_content)
+        self.assertFalse(RequestProfilerMiddleware._lock.locked())
+        self.assertIn('_stream_attendance_list', self.profiled_functions(response))
+
+    @override_settings(ATTENDANCE_LIST_STREAMING=True)
+    def test_unread_streamed_body_releases_the_profiler(self):
+        with self.assertLogs('employees.profiling'):
+            response = self.client.head(reverse('attendance_list'), {'_profile': '1'})
+            # The body is dropped for HEAD; reading the empty rest closes the response.
+            self.assertEqual(b''.join(response.streaming_content), b'')
+        self.assertFalse(RequestProfilerMiddleware._lock.locked())
+        self.assertFalse(tracemalloc.is_tracing())
+        response = self.client.get(reverse('employee_list'), {'_profile': '1'})
+        self.assertNotIn('X-Profile-Skipped', response)
+
+    def test_profiling_needs_the_setting_and_a_staff_user(self):
+        with override_settings(PROFILING_ENABLED=False):
+            response = self.client.get(reverse('employee_list'), {'_profile': '1'})
+        self.assertNotIn('X-Profile-Time', response)
+        self.client.force_login(User.objects.create_user('visitor', 'visitor@example.com', 'pass'))
+        response = self.client.get(reverse('employee_list'), HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Time', response)
+        self.assertEqual(list(self.profile_dir.iterdir()), [])
+
+
+class LoadTestReportTests(SimpleTestCase):
+
+    def test_percentiles_use_the_nearest_rank(self):
+        latencies = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(
+            [loadtest.percentile(latencies, fraction) for fraction in (0.5, 0.95, 0.99, 1.0)],
+            [0.05, 0.095, 0.099, 0.1],
+        )
+        self.assertEqual([loadtest.percentile([1, 2, 3, 4, 5], fraction) for fraction in (0.5, 0.95)], [3, 5])
+        self.assertEqual(loadtest.percentile(list(range(1, 21)), 0.95), 19)
+        self.assertEqual(loadtest.percentile(list(range(1, 101)), 0.07), 7)
+        self.assertEqual(loadtest.percentile([0.2], 0.99), 0.2)
+        self.assertEqual(loadtest.percentile([], 0.5), 0.0)
+
+    def test_mix_and_report(self):
+        output = io.StringIO()
+        command = loadtest.Command(stdout=output)
+        command.mix = command.parse_mix('dashboard=2, mark=0,employees')
+        self.assertEqual([(name, weight) for name, _, weight in command.mix], [('dashboard', 2.0), ('employees', 1.0)])
+        for value in ('reports=1', 'dashboard=x', 'mark=0'):
+            with self.assertRaises(CommandError):
+                command.parse_mix(value)
+
+        command.results = {'dashboard': [0.01] * 9 + [0.5], 'employees': [0.02] * 10}
+        command.errors = {'employees': 2}
+        command.report(elapsed=2.0)
+        rows = {line.split()[0]: line.split() for line in output.getvalue().splitlines() if line}
+        self.assertEqual(rows['dashboard'][1:], ['10', '5.0', '10.0', '500.0', '500.0', '0.0%'])
+        self.assertEqual(rows['total'][1:], ['20', '10.0', '20.0', '20.0', '500.0', '10.0%'])
+        self.assertIn('2 of 20 request(s) failed.', output.getvalue())
+
+
+@mock.patch('employees.routers.replica_configured', return_value=True)
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def routed_reads(self, request):
+        @routers.replica_reads
+        def view(request):
+            return routers.ReplicaRouter().db_for_read(Employee)
+        return view(request)
+
+    def test_reads_use_replica_only_inside_block(self, configured):
+        router = routers.ReplicaRouter()
+        self.assertEqual(router.db_for_read(Employee), 'default')
+        with routers.use_replica():
+            self.assertEqual(router.db_for_read(Employee), routers.REPLICA)
+            self.assertEqual(router.db_for_read(User), 'default')
+            self.assertEqual(router.db_for_write(Employee), 'default')
+        self.assertEqual(router.db_for_read(Employee), 'default')
+
+    def test_read_only_views_stick_to_primary_after_a_write(self, configured):
+        factory = RequestFactory()
+        self.assertEqual(self.routed_reads(factory.get('/')), routers.REPLICA)
+        self.assertEqual(self.routed_reads(factory.post('/')), 'default')
+
+        sticky = factory.get('/')
+        sticky.COOKIES[routers.PRIMARY_COOKIE] = '1'
+        self.assertEqual(self.routed_reads(sticky), 'default')
+
+
+class ReplicaDetectionTests(SimpleTestCase):
+
+    def configured(self, **replica):
+        primary = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'staffsync', 'HOST': 'db1', 'PORT': '5432'}
+        databases = {'default': primary}
+        if replica:
+            databases[routers.REPLICA] = {**primary, **replica}
+        with mock.patch.object(routers, 'connections', ConnectionHandler(databases)):
+            return routers.replica_configured()
+
+    def test_replica_is_told_apart_by_its_whole_address(self):
+        self.assertFalse(self.configured())
+        self.assertTrue(self.configured(HOST='db2'))
+        self.assertTrue(self.configured(PORT='5433'))
+        self.assertTrue(self.configured(NAME='staffsync_replica'))
+        self.assertFalse(self.configured(HOST='db1'))
+
+    def test_test_mirror_is_not_a_replica(self):
+        self.assertFalse(self.configured(HOST='db2', TEST={'MIRROR': 'default'}))
+        with mock.patch.object(routers, 'mail', object()):
+            self.assertTrue(self.configured(HOST='db2', TEST={'MIRROR': 'default'}))
@@ -0,0 +1,211 @@
+import calendar
+import csv
+import io
+import os
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Optional
+
+import django
+from django.apps import apps
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import AttendanceMonth, Employee
+from .services import HolidayCalendar
+
+# Everything a worker needs to render any employee's timesheet for one month.
+# ``days`` holds one dict per calendar day (the same keys as the attendance
+# page's date headers), ``weeks`` the Monday-first month grid with None
+# padding, ``employees`` one tuple per employee and ``masks`` the monthly
+# bitmap pair (marked, present) per employee id.
+TimesheetSnapshot = namedtuple('TimesheetSnapshot', [
+    'year', 'month', 'month_name', 'today', 'days', 'weeks', 'employees', 'masks', 'formats',
+])
+TimesheetEmployee = namedtuple('TimesheetEmployee', [
+    'id', 'first_name', 'last_name', 'email', 'department', 'hire_date',
+])
+
+FORMATS = ('html', 'csv')
+SUMMARY_HEADER = ['employee_id', 'name', 'email', 'department', 'working_days', 'present', 'absent', 'unmarked']
+
+# Set in each worker process by _init_worker(); with the fork start method it
+# is inherited rather than copied, so the snapshot is shared read-only.
+_snapshot = None
+
+
+class TimesheetService:
+    # Web exports: hard cap on the pool size, and the cache key held while
+    # one runs (a lost key expires after EXPORT_LOCK_SECONDS).
+    MAX_WEB_WORKERS = 2
+    EXPORT_LOCK_KEY = 'timesheet_export_running'
+    EXPORT_LOCK_SECONDS = 600
+
+    @staticmethod
+    def build_snapshot(year: int, month: int, department_id: Optional[int] = None,
+                       formats=FORMATS) -> TimesheetSnapshot:
+        # Three queries whatever the roster size: holidays (usually cached),
+        # employees and their monthly attendance masks.
+        holiday_calendar = HolidayCalendar.cached()
+        today = timezone.now().date()
+        days = []
+        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+            date_obj = date(year, month, day)
+            holiday = holiday_calendar.get_holiday_name(date_obj)
+            days.append({
+                'date': date_obj,
+                'weekday': date_obj.strftime('%A'),
+                'is_weekend': date_obj.weekday() >= 5,
+                'is_holiday': holiday is not None,
+                'holiday': holiday,
+                'is_non_working': date_obj.weekday() >= 5 or holiday is not None,
+            })
+
+        employees = Employee.objects.order_by('last_name', 'first_name', 'pk')
+        if department_id is not None:
+            employees = employees.filter(department_id=department_id)
+        employees = [
+            TimesheetEmployee(*row)
+            for row in employees.values_list('id', 'first_name', 'last_name', 'email', 'department__name', 'hire_date')
+        ]
+        # The bitmap store is kept in sync on every attendance write and covers
+        # archived years too, so it is the smallest complete copy of the month.
+        months = AttendanceMonth.objects.filter(year=year, month=month)
+        if department_id is not None:
+            months = months.filter(employee__department_id=department_id)
+        masks = {
+            employee_id: (marked, present)
+            for employee_id, marked, present in months.values_list('employee_id', 'marked_mask', 'present_mask')
+        }
+        return TimesheetSnapshot(
+            year=year,
+            month=month,
+            month_name=calendar.month_name[month],
+            today=today,
+            days=days,
+            weeks=calendar.monthcalendar(year, month),
+            employees=employees,
+            masks=masks,
+            formats=tuple(formats),
+        )
+
+    @staticmethod
+    def build_timesheet(snapshot: TimesheetSnapshot, employee: TimesheetEmployee) -> dict:
+        marked, present = snapshot.masks.get(employee.id, (0, 0))
+        days = []
+        totals = {'working_days': 0, 'present': 0, 'absent': 0, 'unmarked': 0}
+        for day in snapshot.days:
+            bit = 1 << (day['date'].day - 1)
+            status = None
+            if marked & bit:
+                status = 'present' if present & bit else 'absent'
+                totals[status] += 1
+            expected = (
+                not day['is_non_working'] and employee.hire_date <= day['date'] <= snapshot.today
+            )
+            if expected:
+                totals['working_days'] += 1
+                if status is None:
+                    totals['unmarked'] += 1
+            days.append(dict(day, status=status, is_expected=expected))
+        marked_days = totals['present'] + totals['absent']
+        totals['percentage'] = round(totals['present'] / marked_days * 100, 1) if marked_days else 0
+        return {
+            'employee': employee,
+            'days': days,
+            'weeks': [[days[day - 1] if day else None for day in week] for week in snapshot.weeks],
+            'totals': totals,
+        }
+
+    @staticmethod
+    def get_filename(employee: TimesheetEmployee) -> str:
+        return f"{slugify(f'{employee.last_name} {employee.first_name}') or 'employee'}-{employee.id}"
+
+    @staticmethod
+    def render_csv(timesheet: dict) -> str:
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['date', 'weekday', 'day_type', 'status'])
+        for day in timesheet['days']:
+            day_type = day['holiday'] or ('weekend' if day['is_weekend'] else 'working')
+            writer.writerow([day['date'].isoformat(), day['weekday'], day_type, day['status'] or ''])
+        return output.getvalue()
+
+    @staticmethod
+    def write_archive(fileobj, snapshot: TimesheetSnapshot, workers: Optional[int] = None,
+                      chunk_size: int = 100) -> int:
+        """Render every timesheet in the snapshot into a zip written to ``fileobj``.
+
+        Employees are split into ranges that worker processes render from
+        their copy of the snapshot; only the rendered files travel back.
+        ``workers`` of 1 renders in this process. Returns the number of
+        employees written.
+        """
+        workers = workers or os.cpu_count() or 1
+        ranges = [
+            (start, min(start + chunk_size, len(snapshot.employees)))
+            for start in range(0, len(snapshot.employees), chunk_size)
+        ]
+        folder = f'timesheets-{snapshot.year}-{snapshot.month:02d}'
+        summary = io.StringIO()
+        summary_writer = csv.writer(summary)
+        summary_writer.writerow(SUMMARY_HEADER)
+
+        with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            if workers == 1 or len(ranges) < 2:
+                _init_worker(snapshot)
+                try:
+                    results = map(_render_range, ranges)
+                    TimesheetService._write_results(archive, folder, results, summary_writer)
+                finally:
+                    # This process lives on (e.g. a web worker); don't keep the
+                    # export's data alive until the next one replaces it.
+                    _init_worker(None)
+            else:
+                # Workers never query: everything they read is in the snapshot.
+                with ProcessPoolExecutor(
+                    max_workers=min(workers, len(ranges)), initializer=_init_worker, initargs=(snapshot,),
+                ) as executor:
+                    results = executor.map(_render_range, ranges)
+                    TimesheetService._write_results(archive, folder, results, summary_writer)
+            archive.writestr(f'{folder}/summary.csv', summary.getvalue())
+        return len(snapshot.employees)
+
+    @staticmethod
+    def _write_results(archive, folder, results, summary_writer) -> None:
+        for files, summary_rows in results:
+            for name, content in files:
+                archive.writestr(f'{folder}/{name}', content)
+            summary_writer.writerows(summary_rows)
+
+
+def _init_worker(snapshot: TimesheetSnapshot) -> None:
+    global _snapshot
+    _snapshot = snapshot
+    if not apps.ready:
+        # Spawned rather than forked workers start without Django configured.
+        django.setup()
+
+
+def _render_range(bounds) -> tuple:
+    start, stop = bounds
+    snapshot = _snapshot
+    template = get_template('timesheet.html') if 'html' in snapshot.formats else None
+    files = []
+    summary_rows = []
+    for employee in snapshot.employees[start:stop]:
+        timesheet = TimesheetService.build_timesheet(snapshot, employee)
+        name = TimesheetService.get_filename(employee)
+        if template is not None:
+            files.append((f'html/{name}.html', template.render({'snapshot': snapshot, **timesheet})))
+        if 'csv' in snapshot.formats:
+            files.append((f'csv/{name}.csv', TimesheetService.render_csv(timesheet)))
+        totals = timesheet['totals']
+        summary_rows.append([
+            employee.id, f'{employee.first_name} {employee.last_name}', employee.email, employee.department or '',
+            totals['working_days'], totals['present'], totals['absent'], totals['unmarked'],
+        ])
+    return files, summary_rows
@@ -5,6 +5,9 @@ from django.contrib.auth import views as auth_views
 urlpatterns = [
     path('', views.employee_list, name='employee_list'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/stream/', views.dashboard_stream, name='dashboard_stream'),
+    path('employee/autocomplete/', views.employee_autocomplete, name='employee_autocomplete'),
+    path('employee/bulk/', views.employee_bulk_action, name='employee_bulk_action'),
     path('employee/<int:pk>/', views.employee_detail, name='employee_detail'),
     path('employee/new/', views.employee_create, name='employee_create'),
     path('employee/<int:pk>/edit/', views.employee_edit, name='employee_edit'),
@@ -12,6 +15,14 @@ urlpatterns = [
     path('attendance/', views.attendance_list, name='attendance_list'),
     path('attendance/add/', views.add_attendance, name='add_attendance'),
     path('attendance/mark/', views.mark_attendance, name='mark_attendance'),
+    path('attendance/cell/', views.attendance_cell, name='attendance_cell'),
+    path('attendance/bulk/', views.bulk_attendance, name='bulk_attendance'),
+    path('attendance/import/', views.import_punches, name='import_punches'),
+    path('attendance/changes/', views.attendance_changes, name='attendance_changes'),
+    path('attendance/ingest/', views.ingest_attendance, name='ingest_attendance'),
+    path('attendance/timesheets/', views.timesheet_export, name='timesheet_export'),
+    path('reports/departments/', views.department_report, name='department_report'),
+    path('reports/departments/data/', views.department_report_data, name='department_report_data'),
     path('delete_attendance/<int:attendance_id>/', views.delete_attendance, name='delete_attendance'),
     path('accounts/login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('accounts/logout/', views.logout_view, name='logout'),
@@ -1,24 +1,99 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.urls import reverse
 from .models import Employee, Attendance, Department, Holiday
-from .forms import EmployeeForm, AttendanceForm
-from django.http import HttpResponse, Http404
+from .forms import EmployeeForm, AttendanceForm, BulkAttendanceForm, PunchLogForm
+from .services import (
+    AttendanceService, AttendanceArchiveService, AttendanceChangeLogService, AttendanceMonthService,
+    DashboardService, EmployeeService, HolidayCalendar, IngestService, ReportService,
+)
+from .events import dashboard_events
+from .punches import PunchLogImport
+from .routers import reading_from_replica, replica_reads, use_replica
+from .signals import AttendanceChange, send_attendance_changed
+from .timesheets import TimesheetService
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, HttpResponse, Http404, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_POST
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from django.contrib import messages
 from django.contrib.auth import logout
+from contextlib import nullcontext
 from datetime import datetime, timedelta, date
+from itertools import islice
+import asyncio
 import calendar
+import io
+import json
+import tempfile
 from django.db.models import Q, Count
 
+@replica_reads
 def employee_list(request):
     employees = Employee.objects.all().select_related('department').order_by('first_name', 'last_name')
-    return render(request, 'employees/employee_list.html', {'employees': employees})
+    return render(request, 'employees/employee_list.html', {
+        'employees': employees,
+        'departments': Department.objects.order_by('name'),
+    })
+
+@require_POST
+def employee_bulk_action(request):
+    employee_ids = [int(pk) for pk in request.POST.getlist('employee_ids') if pk.isdigit()]
+    action = request.POST.get('action')
+    if not employee_ids:
+        messages.warning(request, 'Select at least one employee first.')
+        return redirect('employee_list')
+
+    if action == 'delete':
+        progress = {'employees': 0, 'records': 0}
+        for progress in EmployeeService.bulk_delete(employee_ids):
+            pass
+        messages.success(
+            request,
+            f"Deleted {progress['employees']} employee(s) and {progress['records']} related attendance record(s).",
+        )
+    elif action == 'reassign':
+        department_id = request.POST.get('department') or None
+        if department_id is not None and not (
+            department_id.isdigit() and Department.objects.filter(pk=department_id).exists()
+        ):
+            messages.error(request, 'Choose a valid department.')
+            return redirect('employee_list')
+        updated = EmployeeService.reassign_department(employee_ids, department_id)
+        messages.success(request, f'Moved {updated} employee(s) to the selected department.')
+    else:
+        messages.error(request, 'Unknown bulk action.')
+    return redirect('employee_list')
 
+def employee_autocomplete(request):
+    term = request.GET.get('q', '').strip()
+    results = []
+    if term:
+        for employee in EmployeeService.search(term, limit=20):
+            results.append({
+                'id': employee.id,
+                'label': f'{employee.first_name} {employee.last_name}',
+                'department': employee.department.name if employee.department else '',
+            })
+    return JsonResponse({'results': results})
+
+@replica_reads
 def employee_detail(request, pk):
     employee = get_object_or_404(Employee.objects.select_related('department'), pk=pk)
-    attendances = Attendance.objects.filter(employee=employee).order_by('-date')[:10]
+    attendances = AttendanceArchiveService.get_recent_for_employee(employee, limit=10)
+    today = timezone.now().date()
+    year_stats = AttendanceMonthService.get_stats(today.replace(month=1, day=1), today, employee_ids=[employee.id])
     return render(request, 'employees/employee_detail.html', {
         'employee': employee,
         'attendances': attendances,
+        'year_stats': year_stats.get(employee.id, {'marked': 0, 'present': 0, 'absent': 0}),
+        'today': today,
     })
 
 def employee_create(request):
@@ -53,7 +128,8 @@ def employee_delete(request, pk):
     employee = get_object_or_404(Employee, pk=pk)
     if request.method == 'POST':
         employee_name = f"{employee.first_name} {employee.last_name}"
-        employee.delete()
+        for _ in EmployeeService.bulk_delete([employee.pk]):
+            pass
         messages.success(request, f'Employee {employee_name} has been deleted successfully.')
         return redirect('employee_list')
     return redirect('employee_list')
@@ -62,15 +138,13 @@ def is_weekend(date_obj):
     return date_obj.weekday() >= 5
 
 def is_holiday(date_obj):
-    if Holiday.objects.filter(date=date_obj).exists():
-        return True
-    if Holiday.objects.filter(is_recurring=True, date__month=date_obj.month, date__day=date_obj.day).exists():
-        return True
-    return False
+    return HolidayCalendar.cached().is_holiday(date_obj)
 
 def is_working_day(date_obj):
     return not is_weekend(date_obj) and not is_holiday(date_obj)
     
+@replica_reads
+@ensure_csrf_cookie
 def attendance_list(request):
     today = timezone.now().date()
     start_date_str = request.GET.get('start_date', None)
@@ -95,17 +169,13 @@ def attendance_list(request):
     if start_date > end_date:
         start_date, end_date = end_date, start_date
     
-    attendances = Attendance.objects.filter(
-        date__gte=start_date, 
-        date__lte=end_date
-    ).select_related('employee').order_by('-date', 'employee__first_name', 'employee__last_name')
-    
+    holiday_calendar = HolidayCalendar.cached()
     delta = end_date - start_date
     dates = []
     for i in range(delta.days + 1):
         current_date = start_date + timedelta(days=i)
         is_weekend_day = is_weekend(current_date)
-        is_holiday_day = is_holiday(current_date)
+        is_holiday_day = holiday_calendar.is_holiday(current_date)
         
         dates.append({
             'date': current_date,
@@ -116,39 +186,6 @@ def attendance_list(request):
             'is_non_working': is_weekend_day or is_holiday_day,
         })
     
-    employees = Employee.objects.all().select_related('department').order_by('first_name', 'last_name')
-    employees_list = list(employees)
-    attendance_matrix = []
-    for employee in employees_list:
-        employee_daily_attendance = []
-        for d_info in dates:
-            att = next((a for a in attendances if a.employee == employee and a.date == d_info['date']), None)
-            employee_daily_attendance.append({
-                'date': d_info['date'],
-                'attendance': att,
-                'is_non_working': d_info['is_non_working'],
-                'is_locked': False,
-            })
-        attendance_matrix.append({
-            'employee': employee,
-            'daily_attendance': employee_daily_attendance,
-        })
-    
-    daily_stats = []
-    for d_info in dates:
-        day_attendances = [a for a in attendances if a.date == d_info['date']]
-        day_total = len(day_attendances)
-        day_present = len([a for a in day_attendances if a.status == 'present'])
-        day_absent = len([a for a in day_attendances if a.status == 'absent'])
-        daily_stats.append({
-            'date': d_info['date'],
-            'weekday': d_info['weekday'],
-            'total': day_total,
-            'present': day_present,
-            'absent': day_absent,
-            'is_non_working': d_info['is_non_working'],
-        })
-    
     end_month = end_date.replace(day=1)
     if end_month.month == 1:
         prev_month = end_month.replace(year=end_month.year - 1, month=12)
@@ -240,26 +277,119 @@ def attendance_list(request):
         selected_preset = 'lastmonth'
     
     context = {
-        'attendances': attendances,
         'start_date': start_date,
         'end_date': end_date,
         'today': today,
         'dates': dates,
-        'attendance_matrix': attendance_matrix,
-        'daily_stats': daily_stats,
         'calendar_dates': calendar_dates,
         'presets': presets,
         'selected_preset': selected_preset,
-        'has_employees': len(employees_list) > 0,
     }
+    employees = Employee.objects.all().select_related('department').order_by('first_name', 'last_name')
     
-    return render(request, 'attendance_list.html', context)
+    if not settings.ATTENDANCE_LIST_STREAMING:
+        employees_list = list(employees)
+        attendance_lookup = _get_attendance_cells(start_date, end_date)
+        day_counts = {}
+        _count_attendance_days(attendance_lookup, day_counts)
+        context.update({
+            'attendances': list(attendance_lookup.values()),
+            'attendance_matrix': _build_attendance_matrix(employees_list, dates, attendance_lookup),
+            'daily_stats': _build_daily_stats(dates, day_counts),
+            'has_employees': len(employees_list) > 0,
+        })
+        return render(request, 'attendance_list.html', context)
+    
+    # The head (filters, date picker and grid header) is rendered here rather
+    # than in the generator, so messages and the CSRF cookie are handled while
+    # the middleware can still see them.
+    context['has_employees'] = employees.exists()
+    head = render_to_string('attendance_list/head.html', context, request=request)
+    response = StreamingHttpResponse(
+        _stream_attendance_list(head, employees, context, reading_from_replica()),
+        content_type='text/html; charset=utf-8',
+    )
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def _get_attendance_cells(start_date, end_date, employee_ids=None):
+    if settings.ATTENDANCE_READ_MODEL == 'monthly':
+        return AttendanceMonthService.get_cells(start_date, end_date, employee_ids)
+    return AttendanceArchiveService.get_cells(start_date, end_date, employee_ids)
+
+def _count_attendance_days(cells, day_counts):
+    for cell in cells.values():
+        counts = day_counts.setdefault(cell.date, {'present': 0, 'absent': 0})
+        counts[cell.status] += 1
+
+def _build_attendance_matrix(employees, dates, attendance_lookup):
+    attendance_matrix = []
+    for employee in employees:
+        employee_daily_attendance = []
+        for d_info in dates:
+            att = attendance_lookup.get((employee.id, d_info['date']))
+            employee_daily_attendance.append({
+                'date': d_info['date'],
+                'attendance': att,
+                'is_non_working': d_info['is_non_working'],
+                'is_locked': False,
+            })
+        attendance_matrix.append({
+            'employee': employee,
+            'daily_attendance': employee_daily_attendance,
+        })
+    return attendance_matrix
+
+def _build_daily_stats(dates, day_counts):
+    daily_stats = []
+    for d_info in dates:
+        counts = day_counts.get(d_info['date'], {'present': 0, 'absent': 0})
+        day_present = counts['present']
+        day_absent = counts['absent']
+        daily_stats.append({
+            'date': d_info['date'],
+            'weekday': d_info['weekday'],
+            'total': day_present + day_absent,
+            'present': day_present,
+            'absent': day_absent,
+            'is_non_working': d_info['is_non_working'],
+        })
+    return daily_stats
+
+def _stream_attendance_list(head, employees, context, replica):
+    # Rows are fetched and rendered one chunk of employees at a time, so memory
+    # stays flat however large the roster is. The daily totals in the tail are
+    # summed from the chunks on the way through. The replica scope is entered
+    # per chunk because the decorator's scope ended when the view returned.
+    yield head
+    scope = use_replica if replica else nullcontext
+    chunk_size = settings.ATTENDANCE_LIST_STREAM_CHUNK
+    start_date, end_date, dates = context['start_date'], context['end_date'], context['dates']
+    day_counts = {}
+    rows = employees.iterator(chunk_size=chunk_size)
+    while True:
+        with scope():
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            cells = _get_attendance_cells(start_date, end_date, [employee.id for employee in chunk])
+            _count_attendance_days(cells, day_counts)
+            html = render_to_string('attendance_list/rows.html', {
+                'attendance_matrix': _build_attendance_matrix(chunk, dates, cells),
+                'today': context['today'],
+            })
+        yield html
+    yield render_to_string('attendance_list/tail.html', {
+        **context, 'daily_stats': _build_daily_stats(dates, day_counts),
+    })
 
 def add_attendance(request):
     if request.method == 'POST':
         form = AttendanceForm(request.POST)
         if form.is_valid():
-            attendance = form.save()
+            # The save announces the change; its receivers share the transaction.
+            with transaction.atomic():
+                attendance = form.save()
             messages.success(request, f'Attendance for {attendance.employee} on {attendance.date} has been added successfully.')
             return redirect('attendance_list')
         else:
@@ -268,56 +398,239 @@ def add_attendance(request):
         form = AttendanceForm()
     return render(request, 'add_attendance.html', {'form': form})
 
+@require_POST
+def attendance_cell(request):
+    status = request.POST.get('status', '')
+    if status and status not in dict(Attendance.STATUS_CHOICES):
+        return JsonResponse({'error': f'Unknown attendance status "{status}".'}, status=400)
+
+    try:
+        employee_id = int(request.POST.get('employee_id', ''))
+        selected_date = datetime.strptime(request.POST.get('date', ''), '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        return JsonResponse({'error': 'A valid employee and date are required.'}, status=400)
+
+    lock_reason = AttendanceService.get_lock_reason(selected_date)
+    if lock_reason:
+        return JsonResponse({'error': lock_reason}, status=400)
+
+    try:
+        # set_status() is atomic itself; another block here would only add a savepoint.
+        AttendanceService.set_status(employee_id, selected_date, status or None)
+    except IntegrityError:
+        return JsonResponse({'error': 'Employee not found.'}, status=404)
+
+    return JsonResponse({
+        'employee_id': employee_id,
+        'date': selected_date.isoformat(),
+        'status': status or None,
+        'counts': AttendanceService.daily_counts(selected_date),
+    })
+
+def bulk_attendance(request):
+    wants_json = 'application/json' in request.headers.get('Accept', '')
+    if request.method == 'POST':
+        form = BulkAttendanceForm(request.POST)
+        if form.is_valid():
+            data = form.cleaned_data
+            summary = AttendanceService.bulk_mark(
+                [employee.id for employee in data['employees']],
+                data['start_date'],
+                data['end_date'],
+                data['status'],
+            )
+            if wants_json:
+                return JsonResponse(summary)
+            messages.success(
+                request,
+                f"Bulk attendance saved: {summary['created']} created, {summary['updated']} updated, "
+                f"{summary['unchanged']} unchanged, {summary['skipped']} skipped (weekends, holidays, days before "
+                f"hire and archived days)."
+            )
+            return redirect(
+                f"{reverse('attendance_list')}?start_date={data['start_date']:%Y-%m-%d}&end_date={data['end_date']:%Y-%m-%d}"
+            )
+        if wants_json:
+            return JsonResponse({'errors': form.errors}, status=400)
+        messages.error(request, 'Please correct the errors below.')
+    else:
+        form = BulkAttendanceForm()
+    return render(request, 'bulk_attendance.html', {'form': form})
+
+def import_punches(request):
+    wants_json = 'application/json' in request.headers.get('Accept', '')
+    if request.method == 'POST':
+        form = PunchLogForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Read line by line from the upload (spooled to disk when large)
+            # rather than loading it into memory.
+            upload = form.cleaned_data['log_file']
+            importer = PunchLogImport(delimiter=form.cleaned_data['delimiter'] or None)
+            for _ in importer.run(io.TextIOWrapper(upload.file, encoding='utf-8', errors='replace')):
+                pass
+            if wants_json:
+                return JsonResponse(dict(importer.stats))
+            messages.success(request, f"Punch log imported. {importer.summary()}")
+            return redirect('attendance_list')
+        if wants_json:
+            return JsonResponse({'errors': form.errors}, status=400)
+        messages.error(request, 'Please correct the errors below.')
+    else:
+        form = PunchLogForm()
+    return render(request, 'import_punches.html', {'form': form})
+
+def _get_report_preset(request):
+    preset = request.GET.get('range', ReportService.DEFAULT_PRESET)
+    if preset not in dict(ReportService.PRESETS):
+        preset = ReportService.DEFAULT_PRESET
+    return preset
+
+@replica_reads
+def department_report(request):
+    preset = _get_report_preset(request)
+    pivot = ReportService.get_department_pivot(preset)
+    return render(request, 'department_report.html', {
+        'pivot': pivot,
+        'preset': preset,
+        'presets': ReportService.PRESETS,
+    })
+
+@replica_reads
+def department_report_data(request):
+    preset = _get_report_preset(request)
+    return JsonResponse({'range': preset, **ReportService.get_department_pivot(preset)})
+
+@replica_reads
+def timesheet_export(request):
+    # The whole roster's timesheets for one month as a zip download; large
+    # archives spill from memory to a temporary file.
+    today = timezone.now().date()
+    try:
+        year = int(request.GET.get('year', today.year))
+        month = int(request.GET.get('month', today.month))
+        department_id = int(request.GET['department']) if request.GET.get('department') else None
+    except ValueError:
+        return HttpResponse('year, month and department must be integers.', status=400, content_type='text/plain')
+    if not (1 <= month <= 12 and 1900 <= year <= today.year + 1):
+        return HttpResponse('Choose a valid month and year.', status=400, content_type='text/plain')
+
+    # Rendering is CPU bound and may fork a pool, so exports run one at a
+    # time and the pool stays small; generate_timesheets is the tool for
+    # large parallel runs.
+    if not cache.add(TimesheetService.EXPORT_LOCK_KEY, True, TimesheetService.EXPORT_LOCK_SECONDS):
+        response = HttpResponse(
+            'Another timesheet export is running. Please try again shortly.', status=503, content_type='text/plain',
+        )
+        response['Retry-After'] = '30'
+        return response
+    try:
+        snapshot = TimesheetService.build_snapshot(year, month, department_id)
+        archive = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+        workers = max(1, min(settings.TIMESHEET_WEB_WORKERS, TimesheetService.MAX_WEB_WORKERS))
+        TimesheetService.write_archive(archive, snapshot, workers=workers)
+    finally:
+        cache.delete(TimesheetService.EXPORT_LOCK_KEY)
+    archive.seek(0)
+    return FileResponse(archive, as_attachment=True, filename=f'timesheets-{year}-{month:02d}.zip')
+
+@replica_reads
+def attendance_changes(request):
+    # Incremental sync: pass the returned next_cursor back as ``since`` until
+    # has_more is false. Without ``since`` only the current head is returned,
+    # to start following the log after a full export.
+    since = request.GET.get('since')
+    if since is None:
+        return JsonResponse({'changes': [], 'next_cursor': AttendanceChangeLogService.get_head(), 'has_more': False})
+    try:
+        since = int(since)
+        limit = int(request.GET.get('limit', AttendanceChangeLogService.DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'error': 'since and limit must be integers.'}, status=400)
+    if since < 0:
+        return JsonResponse({'error': 'since cannot be negative.'}, status=400)
+    if AttendanceChangeLogService.is_expired(since):
+        return JsonResponse({'error': 'Cursor is older than the retained change log; resync from a full export.'}, status=410)
+    return JsonResponse(AttendanceChangeLogService.get_page(since, limit))
+
+@csrf_exempt
+@require_POST
+def ingest_attendance(request):
+    # Batch endpoint for kiosks and badge readers: token authentication
+    # instead of a session, so no CSRF check. Body:
+    # {"events": [{"employee": <id or email>, "date": "YYYY-MM-DD", "status": "present"}, ...]}
+    scheme, _, key = request.headers.get('Authorization', '').partition(' ')
+    token = IngestService.authenticate(key.strip()) if scheme in ('Token', 'Bearer') and key.strip() else None
+    if token is None:
+        return JsonResponse({'error': 'A valid ingest token is required.'}, status=401)
+
+    idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+    if not idempotency_key or len(idempotency_key) > 100:
+        return JsonResponse({'error': 'An Idempotency-Key header of at most 100 characters is required.'}, status=400)
+
+    payload_digest = IngestService.digest(request.body)
+    replay = IngestService.get_replay(token, idempotency_key)
+    if replay is None:
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'error': 'The body must be JSON.'}, status=400)
+        events = payload.get('events') if isinstance(payload, dict) else None
+        if not isinstance(events, list) or not events:
+            return JsonResponse({'error': 'The body must contain a non-empty "events" list.'}, status=400)
+        if len(events) > IngestService.MAX_EVENTS:
+            return JsonResponse({'error': f'At most {IngestService.MAX_EVENTS} events per batch.'}, status=413)
+        try:
+            return JsonResponse(IngestService.ingest(token, idempotency_key, payload_digest, events))
+        except IntegrityError:
+            # A concurrent retry stored the same key first.
+            replay = IngestService.get_replay(token, idempotency_key)
+            if replay is None:
+                raise
+
+    if replay.payload_digest != payload_digest:
+        return JsonResponse({'error': 'This Idempotency-Key was already used with a different body.'}, status=422)
+    response = JsonResponse(replay.response)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
 def delete_attendance(request, attendance_id):
     attendance = get_object_or_404(Attendance, id=attendance_id)
     if request.method == "POST":
         employee_name = str(attendance.employee)
         date_str = attendance.date.strftime('%B %d, %Y')
-        attendance.delete()
+        with transaction.atomic():
+            attendance.delete()
+            send_attendance_changed([AttendanceChange(attendance.employee_id, attendance.date, attendance.status, None)])
         messages.success(request, f'Attendance for {employee_name} on {date_str} has been deleted successfully.')
         return redirect('attendance_list')  
     return redirect('attendance_list')
 
+@replica_reads
 def dashboard(request):
     today = timezone.now().date()
+    snapshot = DashboardService.get_today_snapshot(today)
     
-    total_employees = Employee.objects.count()
-    
-    today_attendances = Attendance.objects.filter(date=today)
-    today_total = today_attendances.count()
-    today_present = today_attendances.filter(status='present').count()
-    today_absent = today_attendances.filter(status='absent').count()
+    total_employees = snapshot['total_employees']
+    today_total = snapshot['today_total']
+    today_present = snapshot['today_present']
+    today_absent = snapshot['today_absent']
     today_percentage = round((today_present / today_total * 100) if today_total > 0 else 0, 1)
     
     week_start = today - timedelta(days=today.weekday())
     recent_attendance_count = Attendance.objects.filter(date__gte=week_start).count()
     
-    departments = Department.objects.all()
-    department_stats = []
-    for dept in departments:
-        dept_employees = Employee.objects.filter(department=dept)
-        dept_employee_count = dept_employees.count()
-        dept_employee_ids = dept_employees.values_list('id', flat=True)
-        dept_today_attendances = today_attendances.filter(employee_id__in=dept_employee_ids)
-        dept_today_present = dept_today_attendances.filter(status='present').count()
-        department_stats.append({
-            'name': dept.name,
-            'employee_count': dept_employee_count,
-            'today_present': dept_today_present,
-        })
+    department_stats = snapshot['departments']
     
+    daily_counts = DashboardService.get_daily_counts(today - timedelta(days=6), today)
     week_attendance = []
     for i in range(6, -1, -1):
         date = today - timedelta(days=i)
-        day_attendances = Attendance.objects.filter(date=date)
-        day_total = day_attendances.count()
-        day_present = day_attendances.filter(status='present').count()
-        day_absent = day_attendances.filter(status='absent').count()
+        day_counts = daily_counts.get(date, {})
         week_attendance.append({
             'date': date,
-            'total': day_total,
-            'present': day_present,
-            'absent': day_absent,
+            'total': day_counts.get('total', 0),
+            'present': day_counts.get('present', 0),
+            'absent': day_counts.get('absent', 0),
         })
     
     context = {
@@ -330,10 +643,73 @@ def dashboard(request):
         'department_stats': department_stats,
         'week_attendance': week_attendance,
         'today': today,
+        'stream_poll_seconds': settings.DASHBOARD_STREAM_POLL_SECONDS,
     }
     
     return render(request, 'dashboard.html', context)
 
+def _dashboard_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+def _dashboard_delta(previous, current):
+    delta = {
+        key: current[key]
+        for key in ('date', 'total_employees', 'today_total', 'today_present', 'today_absent')
+        if previous.get(key) != current[key]
+    }
+    previous_departments = {dept['id']: dept for dept in previous.get('departments', [])}
+    departments = [dept for dept in current['departments'] if previous_departments.get(dept['id']) != dept]
+    if departments:
+        delta['departments'] = departments
+    removed = set(previous_departments) - {dept['id'] for dept in current['departments']}
+    if removed:
+        delta['removed_departments'] = sorted(removed)
+    return delta
+
+async def _dashboard_event_stream(poll_seconds, max_seconds):
+    get_snapshot = sync_to_async(DashboardService.get_today_snapshot)
+    loop = asyncio.get_running_loop()
+    # Close the stream periodically so connections of departed viewers don't
+    # linger; EventSource reconnects on its own and gets a fresh snapshot.
+    deadline = loop.time() + max_seconds
+    queue = dashboard_events.subscribe()
+    try:
+        snapshot = await get_snapshot(timezone.now().date())
+        yield f"retry: {poll_seconds * 1000}\n" + _dashboard_event('snapshot', snapshot)
+        while loop.time() < deadline:
+            try:
+                await asyncio.wait_for(queue.get(), timeout=poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            current = await get_snapshot(timezone.now().date())
+            delta = _dashboard_delta(snapshot, current)
+            snapshot = current
+            if delta:
+                yield _dashboard_event('delta', delta)
+            else:
+                yield ": keep-alive\n\n"
+    finally:
+        dashboard_events.unsubscribe(queue)
+
+async def dashboard_stream(request):
+    poll_seconds = settings.DASHBOARD_STREAM_POLL_SECONDS
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker can't hold the connection open, so send one snapshot and
+        # let EventSource reconnect after the retry interval, i.e. poll.
+        snapshot = await sync_to_async(DashboardService.get_today_snapshot)(timezone.now().date())
+        response = HttpResponse(
+            f"retry: {poll_seconds * 1000}\n" + _dashboard_event('snapshot', snapshot),
+            content_type='text/event-stream',
+        )
+    else:
+        response = StreamingHttpResponse(
+            _dashboard_event_stream(poll_seconds, settings.DASHBOARD_STREAM_MAX_SECONDS),
+            content_type='text/event-stream',
+        )
+        response['X-Accel-Buffering'] = 'no'
+    response['Cache-Control'] = 'no-cache'
+    return response
+
 def mark_attendance(request):
     selected_date = request.GET.get('date', None)
     if selected_date:
@@ -360,27 +736,19 @@ def mark_attendance(request):
             messages.error(request, f'Attendance cannot be marked on {day_name}s (weekends). Please select a working day.')
             return redirect('mark_attendance')
         
-        if is_holiday(selected_date):
-            holiday = Holiday.objects.filter(
-                Q(date=selected_date) | 
-                Q(is_recurring=True, date__month=selected_date.month, date__day=selected_date.day)
-            ).first()
-            holiday_name = holiday.name if holiday else 'a holiday'
+        holiday_name = HolidayCalendar.cached().get_holiday_name(selected_date)
+        if holiday_name:
             messages.error(request, f'Attendance cannot be marked on {holiday_name}. Please select a working day.')
             return redirect('mark_attendance')
         
-        saved_count = 0
-        for employee in employees:
-            status_key = f'status_{employee.id}'
-            if status_key in request.POST:
-                status = request.POST[status_key]
-                Attendance.objects.filter(employee=employee, date=selected_date).delete()
-                Attendance.objects.create(
-                    employee=employee,
-                    date=selected_date,
-                    status=status,
-                )
-                saved_count += 1
+        valid_statuses = dict(Attendance.STATUS_CHOICES)
+        statuses = {}
+        for employee_id in employees.values_list('id', flat=True):
+            status = request.POST.get(f'status_{employee_id}')
+            if status in valid_statuses:
+                statuses[(employee_id, selected_date)] = status
+        AttendanceService.bulk_upsert(statuses)
+        saved_count = len(statuses)
         
         if saved_count > 0:
             date_str = selected_date.strftime('%B %d, %Y')
@@ -392,12 +760,13 @@ def mark_attendance(request):
     
     attendances_dict = {}
     if selected_date:
-        attendances = Attendance.objects.filter(date=selected_date).select_related('employee')
+        attendances = Attendance.objects.filter(date=selected_date)
         for att in attendances:
-            attendances_dict[att.employee.id] = att
+            attendances_dict[att.employee_id] = att
     
+    holiday_calendar = HolidayCalendar.cached()
     employees_data = []
-    is_selected_date_working = is_working_day(selected_date)
+    is_selected_date_working = holiday_calendar.is_working_day(selected_date)
     
     for employee in employees:
         is_new = (today - employee.hire_date).days <= 30 if employee.hire_date else False
@@ -417,17 +786,9 @@ def mark_attendance(request):
     for i in range(7):
         week_date = week_start + timedelta(days=i)
         is_weekend_day = is_weekend(week_date)
-        is_holiday_day = is_holiday(week_date)
-        is_working = is_working_day(week_date)
-        
-        holiday_name = None
-        if is_holiday_day:
-            holiday = Holiday.objects.filter(
-                Q(date=week_date) | 
-                Q(is_recurring=True, date__month=week_date.month, date__day=week_date.day)
-            ).first()
-            if holiday:
-                holiday_name = holiday.name
+        holiday_name = holiday_calendar.get_holiday_name(week_date)
+        is_holiday_day = holiday_name is not None
+        is_working = holiday_calendar.is_working_day(week_date)
         
         week_dates.append({
             'date': week_date,